@@ -45,6 +45,10 @@ else:
     print('Admin user already exists')
 "
 
-# Start Django development server
-echo "Starting Django server on 0.0.0.0:8009..."
-exec python manage.py runserver 0.0.0.0:8009
+# Start verification worker (processes the DB-backed verification job queue)
+echo "Starting verification worker..."
+python manage.py run_verification_worker &
+
+# Start the ASGI server (async LLM endpoints keep many OpenAI calls in flight per process)
+echo "Starting Django ASGI server on 0.0.0.0:8009..."
+exec uvicorn research_agent.asgi:application --host 0.0.0.0 --port 8009
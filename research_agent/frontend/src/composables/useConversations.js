@@ -1,9 +1,11 @@
-import { ref, readonly, watch } from 'vue'
+import { ref, readonly, watch, computed } from 'vue'
 import { useAuth } from './useAuth'
 import { useProjects } from './useProjects'
 import { useVerification } from './useVerification'
 
 const conversations = ref([])
+// Cursor of the next page of the conversation list (null once everything is loaded)
+const conversationsCursor = ref(null)
 const currentConversation = ref(null)
 const isLoading = ref(false)
 const isSending = ref(false)
@@ -35,6 +37,51 @@ export function useConversations() {
         return data
     }
 
+    // POST a request answered with Server-Sent Events; calls onEvent(event, data) per event
+    // and resolves with the data of the final 'done' event
+    async function streamRequest(url, body, onEvent) {
+        const response = await fetch(url, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': getCsrfToken()
+            },
+            credentials: 'include',
+            body: JSON.stringify(body)
+        })
+
+        if (!response.ok) {
+            const data = await response.json().catch(() => ({}))
+            throw new Error(data.error || 'Request failed')
+        }
+
+        const reader = response.body.getReader()
+        const decoder = new TextDecoder()
+        let buffer = ''
+        while (true) {
+            const { value, done } = await reader.read()
+            if (done) break
+            buffer += decoder.decode(value, { stream: true })
+
+            let boundary
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const block = buffer.slice(0, boundary)
+                buffer = buffer.slice(boundary + 2)
+                let event = 'message'
+                let data = ''
+                for (const line of block.split('\n')) {
+                    if (line.startsWith('event: ')) event = line.slice(7)
+                    else if (line.startsWith('data: ')) data += line.slice(6)
+                }
+                const payload = data ? JSON.parse(data) : null
+                if (event === 'error') throw new Error(payload?.error || 'Stream failed')
+                if (event === 'done') return payload
+                onEvent(event, payload)
+            }
+        }
+        throw new Error('Stream ended unexpectedly')
+    }
+
     const fetchConversations = async () => {
         if (!currentProject.value) return
 
@@ -42,6 +89,7 @@ export function useConversations() {
         try {
             const data = await apiRequest(`/api/conversations/?project_id=${currentProject.value.id}`)
             conversations.value = data.conversations
+            conversationsCursor.value = data.next_cursor
         } catch (e) {
             console.error('Failed to fetch conversations:', e)
         } finally {
@@ -49,6 +97,25 @@ export function useConversations() {
         }
     }
 
+    const hasMoreConversations = computed(() => !!conversationsCursor.value)
+
+    const loadMoreConversations = async () => {
+        if (!currentProject.value || !conversationsCursor.value || isLoading.value) return
+
+        isLoading.value = true
+        try {
+            const data = await apiRequest(`/api/conversations/?project_id=${currentProject.value.id}&cursor=${conversationsCursor.value}`)
+            // Skip conversations already listed (moved to the top by new messages since the first page)
+            const listed = new Set(conversations.value.map(c => c.id))
+            conversations.value = [...conversations.value, ...data.conversations.filter(c => !listed.has(c.id))]
+            conversationsCursor.value = data.next_cursor
+        } catch (e) {
+            console.error('Failed to load more conversations:', e)
+        } finally {
+            isLoading.value = false
+        }
+    }
+
     // Watch for project changes
     watch(currentProject, (newP) => {
         if (newP) {
@@ -57,6 +124,7 @@ export function useConversations() {
             fetchConversations()
         } else {
             conversations.value = []
+            conversationsCursor.value = null
             currentConversation.value = null
         }
     })
@@ -78,20 +146,38 @@ export function useConversations() {
         }
     }
 
+    // Show a title generated in the background once it is ready (title_status 'pending')
+    const followTitle = (id) => {
+        const source = new EventSource(`/api/conversations/${id}/title/events/`, { withCredentials: true })
+        source.addEventListener('title', (event) => {
+            const { title } = JSON.parse(event.data)
+            const idx = conversations.value.findIndex(c => c.id === id)
+            if (idx !== -1) {
+                conversations.value.splice(idx, 1, { ...conversations.value[idx], title })
+            }
+            if (currentConversation.value?.id === id) {
+                currentConversation.value = { ...currentConversation.value, title, title_status: 'final' }
+            }
+            source.close()
+        })
+        source.addEventListener('timeout', () => source.close())
+        // Nothing is generating the title any more: keep the provisional one
+        source.addEventListener('stalled', () => source.close())
+        // Stop instead of letting EventSource reconnect forever
+        source.onerror = () => source.close()
+    }
+
     const loadConversation = async (id) => {
         isLoading.value = true
         try {
             const data = await apiRequest(`/api/conversations/${id}/`)
             currentConversation.value = data
+            if (data.title_status === 'pending') {
+                followTitle(id)
+            }
 
             // Populate verifications from history
-            if (data.messages) {
-                data.messages.forEach(msg => {
-                    if (msg.verification) {
-                        setVerification(msg.id, msg.verification)
-                    }
-                })
-            }
+            populateVerifications(data.messages)
 
             return data
         } catch (e) {
@@ -102,6 +188,38 @@ export function useConversations() {
         }
     }
 
+    const populateVerifications = (messages) => {
+        (messages || []).forEach(msg => {
+            if (msg.verification) {
+                setVerification(msg.id, msg.verification)
+            }
+        })
+    }
+
+    const hasEarlierMessages = computed(() => !!currentConversation.value?.messages_cursor)
+
+    // The conversation endpoint returns the most recent messages; older ones are loaded page by page
+    const loadEarlierMessages = async () => {
+        const conversation = currentConversation.value
+        if (!conversation?.messages_cursor || isLoading.value) return
+
+        isLoading.value = true
+        try {
+            const data = await apiRequest(`/api/conversations/${conversation.id}/?before=${conversation.messages_cursor}`)
+            if (currentConversation.value?.id !== conversation.id) return
+            populateVerifications(data.messages)
+            currentConversation.value = {
+                ...currentConversation.value,
+                messages: [...data.messages, ...currentConversation.value.messages],
+                messages_cursor: data.messages_cursor
+            }
+        } catch (e) {
+            console.error('Failed to load earlier messages:', e)
+        } finally {
+            isLoading.value = false
+        }
+    }
+
     const updateConversationTitle = async (id, title) => {
         try {
             const data = await apiRequest(`/api/conversations/${id}/`, {
@@ -167,37 +285,62 @@ export function useConversations() {
                 listUpdate.title = optimisticTitle
             }
             // Update preview immediately to user message (will be replaced by AI response later)
-            listUpdate.preview = message.length > 50 ? message.slice(0, 50) + '...' : message
+            listUpdate.preview = message
 
             conversations.value.splice(listIdx, 1, listUpdate)
         }
 
+        // Assistant message filled in while the answer streams (added with the first tokens)
+        const tempAssistantMessage = { id: `temp-assistant-${Date.now()}`, role: 'assistant', content: { text: '', papers: [] }, streaming: true }
+        const updateStreamingMessage = (update) => {
+            if (currentConversation.value?.id !== conversationId) return
+            const messages = currentConversation.value.messages
+            const existing = messages.find(m => m.id === tempAssistantMessage.id)
+            currentConversation.value = {
+                ...currentConversation.value,
+                messages: existing
+                    ? messages.map(m => m.id === tempAssistantMessage.id ? { ...m, content: update(m.content) } : m)
+                    : [...messages, { ...tempAssistantMessage, content: update(tempAssistantMessage.content) }]
+            }
+        }
+
         isSending.value = true
         try {
-            const data = await apiRequest(`/api/conversations/${conversationId}/chat/`, {
-                method: 'POST',
-                body: JSON.stringify({ message, ...settings, filters })
+            const data = await streamRequest(`/api/conversations/${conversationId}/chat/stream/`, { message, ...settings, filters }, (event, payload) => {
+                if (event === 'text') {
+                    updateStreamingMessage(content => ({ ...content, text: content.text + payload.delta }))
+                } else if (event === 'paper') {
+                    // Papers arrive in order, each once its JSON object is complete
+                    updateStreamingMessage(content => ({ ...content, papers: [...content.papers, payload.paper] }))
+                }
             })
             if (currentConversation.value?.id === conversationId) {
-                // Replace temp message with real one and add assistant message
-                const newMessages = currentConversation.value.messages.filter(m => m.id !== tempUserMessage.id)
+                // Replace temp messages with the saved user and assistant messages
+                const newMessages = currentConversation.value.messages.filter(m => m.id !== tempUserMessage.id && m.id !== tempAssistantMessage.id)
                 newMessages.push(data.user_message)
                 newMessages.push(data.assistant_message)
                 currentConversation.value = {
                     ...currentConversation.value,
                     messages: newMessages,
-                    title: data.conversation_title || currentConversation.value.title
+                    title: data.conversation_title || currentConversation.value.title,
+                    title_status: data.title_status
                 }
             }
+            if (data.title_status === 'pending') {
+                followTitle(conversationId)
+            }
             const idx = conversations.value.findIndex(c => c.id === conversationId)
             if (idx !== -1) {
                 // Create updated conversation object to ensure reactivity
                 const updatedConv = {
                     ...conversations.value[idx],
-                    preview: data.assistant_message.content.slice(0, 50),
+                    // Same as the server's preview: the answer text (assistant content is the parsed JSON)
+                    preview: data.assistant_message.content?.text || '',
+                    message_count: (conversations.value[idx].message_count || 0) + 2,
+                    last_activity_at: data.assistant_message.created_at,
                     updated_at: new Date().toISOString()
                 }
-                // Update title if it was generated
+                // Provisional title until the generated one arrives
                 if (data.conversation_title) {
                     updatedConv.title = data.conversation_title
                 }
@@ -207,11 +350,11 @@ export function useConversations() {
             }
             return data
         } catch (e) {
-            // Remove temp message on error
+            // Remove temp messages on error
             if (currentConversation.value?.id === conversationId) {
                 currentConversation.value = {
                     ...currentConversation.value,
-                    messages: currentConversation.value.messages.filter(m => m.id !== tempUserMessage.id)
+                    messages: currentConversation.value.messages.filter(m => m.id !== tempUserMessage.id && m.id !== tempAssistantMessage.id)
                 }
             }
             throw e
@@ -226,6 +369,7 @@ export function useConversations() {
 
     const clearAll = () => {
         conversations.value = []
+        conversationsCursor.value = null
         currentConversation.value = null
     }
 
@@ -234,9 +378,13 @@ export function useConversations() {
         currentConversation: readonly(currentConversation),
         isLoading: readonly(isLoading),
         isSending: readonly(isSending),
+        hasMoreConversations,
+        hasEarlierMessages,
         fetchConversations,
+        loadMoreConversations,
         createConversation,
         loadConversation,
+        loadEarlierMessages,
         updateConversationTitle,
         deleteConversation,
         sendMessage,
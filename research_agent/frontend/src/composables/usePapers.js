@@ -1,8 +1,10 @@
-import { ref, readonly, watch } from 'vue'
+import { ref, readonly, watch, computed } from 'vue'
 import { useAuth } from './useAuth'
 import { useProjects } from './useProjects'
 
 const papers = ref([])
+// Cursor of the next page of papers (null once everything is loaded)
+const papersCursor = ref(null)
 const isLoading = ref(false)
 
 export function usePapers() {
@@ -38,6 +40,11 @@ export function usePapers() {
         try {
             const data = await apiRequest(`/api/papers/?project_id=${currentProject.value.id}`)
             papers.value = data.papers
+            papersCursor.value = data.next_cursor
+            // Fill in missing BibTeX entries with a single batch request (covers the whole project)
+            if (papers.value.some(p => !p.bibtex)) {
+                generateProjectBibtex(currentProject.value.id)
+            }
         } catch (e) {
             console.error('Failed to fetch papers:', e)
         } finally {
@@ -45,12 +52,34 @@ export function usePapers() {
         }
     }
 
+    const hasMorePapers = computed(() => !!papersCursor.value)
+
+    const loadMorePapers = async () => {
+        if (!currentProject.value || !papersCursor.value || isLoading.value) return
+
+        isLoading.value = true
+        try {
+            const data = await apiRequest(`/api/papers/?project_id=${currentProject.value.id}&cursor=${papersCursor.value}`)
+            const listed = new Set(papers.value.map(p => p.id))
+            papers.value = [...papers.value, ...data.papers.filter(p => !listed.has(p.id))]
+            papersCursor.value = data.next_cursor
+            if (data.papers.some(p => !p.bibtex)) {
+                generateProjectBibtex(currentProject.value.id)
+            }
+        } catch (e) {
+            console.error('Failed to load more papers:', e)
+        } finally {
+            isLoading.value = false
+        }
+    }
+
     // Watch for project changes
     watch(currentProject, (newP) => {
         if (newP) {
             fetchPapers()
         } else {
             papers.value = []
+            papersCursor.value = null
         }
     })
 
@@ -98,6 +127,27 @@ export function usePapers() {
         }
     }
 
+    const generateProjectBibtex = async (projectId) => {
+        const pending = papers.value.filter(p => !p.bibtex && !p.bibtexLoading).map(p => p.id)
+        papers.value.forEach(p => { if (pending.includes(p.id)) p.bibtexLoading = true })
+        try {
+            const data = await apiRequest(`/api/projects/${projectId}/generate-bibtex/`, {
+                method: 'POST'
+            })
+            data.papers.forEach(({ id, bibtex }) => {
+                const idx = papers.value.findIndex(p => p.id === id)
+                if (idx !== -1) {
+                    papers.value[idx].bibtex = bibtex
+                }
+            })
+            return data
+        } catch (e) {
+            console.error('Failed to generate project bibtex:', e)
+        } finally {
+            papers.value.forEach(p => { if (pending.includes(p.id)) p.bibtexLoading = false })
+        }
+    }
+
     const updatePaper = async (id, updates) => {
         try {
             const data = await apiRequest(`/api/papers/${id}/`, {
@@ -134,6 +184,7 @@ export function usePapers() {
 
     const clearPapers = () => {
         papers.value = []
+        papersCursor.value = null
     }
 
     const copyPaperToProject = async (paperId, targetProjectId) => {
@@ -152,8 +203,11 @@ export function usePapers() {
     return {
         papers: readonly(papers),
         isLoading: readonly(isLoading),
+        hasMorePapers,
         fetchPapers,
+        loadMorePapers,
         addPaper,
+        generateProjectBibtex,
         updatePaper,
         deletePaper,
         toggleContext,
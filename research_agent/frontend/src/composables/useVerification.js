@@ -33,16 +33,51 @@ export function useVerification() {
         return data
     }
 
+    // Follow a background verification job via Server-Sent Events.
+    // Paper results are stored as they arrive; resolves with the final verification.
+    const waitForJob = (messageId, job) => {
+        return new Promise((resolve, reject) => {
+            const partial = { message_id: messageId, paper_verifications: [] }
+            const source = new EventSource(job.events_url, { withCredentials: true })
+
+            source.addEventListener('paper', (event) => {
+                const paper = JSON.parse(event.data)
+                if (!paper.result) return
+                partial.paper_verifications = [
+                    ...partial.paper_verifications.filter(pv => pv.paper_index !== paper.paper_index),
+                    paper.result
+                ].sort((a, b) => a.paper_index - b.paper_index)
+                verificationResults.value[messageId] = { ...partial }
+            })
+            source.addEventListener('complete', (event) => {
+                source.close()
+                resolve(JSON.parse(event.data))
+            })
+            source.addEventListener('error', (event) => {
+                source.close()
+                const data = event.data ? JSON.parse(event.data) : null
+                reject(new Error(data?.error || 'Verification failed'))
+            })
+            source.addEventListener('timeout', () => {
+                source.close()
+                reject(new Error('Verification is taking too long, please try again later'))
+            })
+        })
+    }
+
     const verifyMessage = async (messageId) => {
         verifying.value = true
         verificationError.value = null
 
         try {
             const settings = getSettings()
-            const data = await apiRequest(`/api/messages/${messageId}/verify/`, {
+            let data = await apiRequest(`/api/messages/${messageId}/verify/`, {
                 method: 'POST',
                 body: JSON.stringify({ model: settings.model })
             })
+            if (data.job_id) {
+                data = await waitForJob(messageId, data)
+            }
             verificationResults.value[messageId] = data
             return data
         } catch (error) {
@@ -2,7 +2,7 @@ from django.contrib import admin as django_admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import User
 from research_agent.admin import admin_site
-from .models import UserProfile, Conversation, Message, Paper, Verification, PaperVerification
+from .models import UserProfile, Conversation, Message, MessagePaper, Paper, Verification, PaperVerification, PaperVerificationCache, VerificationJob, VerificationJobPaper
 
 
 class UserProfileInline(django_admin.StackedInline):
@@ -46,7 +46,8 @@ class ConversationAdmin(django_admin.ModelAdmin):
     inlines = [MessageInline]
 
     def message_count(self, obj):
-        return obj.messages.count()
+        # Maintained by Message.save(), no COUNT per row
+        return obj.message_count
     message_count.short_description = 'Messages'
 
 
@@ -62,6 +63,16 @@ class PaperAdmin(django_admin.ModelAdmin):
     title_short.short_description = 'Title'
 
 
+class MessagePaperAdmin(django_admin.ModelAdmin):
+    list_display = ('title_short', 'authors', 'date', 'link', 'message')
+    search_fields = ('title', 'authors', 'link')
+    readonly_fields = ('message', 'position')
+
+    def title_short(self, obj):
+        return obj.title[:60] + '...' if len(obj.title) > 60 else obj.title
+    title_short.short_description = 'Title'
+
+
 class PaperVerificationInline(django_admin.TabularInline):
     model = PaperVerification
     extra = 0
@@ -81,9 +92,34 @@ class VerificationAdmin(django_admin.ModelAdmin):
     paper_count.short_description = 'Papers'
 
 
+class PaperVerificationCacheAdmin(django_admin.ModelAdmin):
+    list_display = ('identifier', 'identifier_type', 'title', 'hit_count', 'verified_at', 'last_used_at')
+    list_filter = ('identifier_type',)
+    search_fields = ('identifier', 'title', 'link')
+    readonly_fields = ('hit_count', 'verified_at', 'last_used_at', 'created_at')
+
+
+class VerificationJobPaperInline(django_admin.TabularInline):
+    model = VerificationJobPaper
+    extra = 0
+    readonly_fields = ('paper_index', 'title', 'status', 'updated_at')
+    fields = ('paper_index', 'title', 'status', 'updated_at')
+    can_delete = False
+
+
+class VerificationJobAdmin(django_admin.ModelAdmin):
+    list_display = ('id', 'message', 'user', 'status', 'stage', 'attempts', 'worker_id', 'created_at', 'finished_at')
+    list_filter = ('status', 'stage', 'created_at')
+    readonly_fields = ('message', 'user', 'verification', 'created_at', 'updated_at', 'started_at', 'finished_at')
+    inlines = [VerificationJobPaperInline]
+
+
 # Register with custom admin site
 admin_site.register(User, UserAdmin)
 admin_site.register(UserProfile, UserProfileAdmin)
 admin_site.register(Conversation, ConversationAdmin)
 admin_site.register(Paper, PaperAdmin)
+admin_site.register(MessagePaper, MessagePaperAdmin)
 admin_site.register(Verification, VerificationAdmin)
+admin_site.register(PaperVerificationCache, PaperVerificationCacheAdmin)
+admin_site.register(VerificationJob, VerificationJobAdmin)
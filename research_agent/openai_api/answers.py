@@ -0,0 +1,91 @@
+"""
+Structured storage of the assistant's {"text": ..., "papers": [...]} answers.
+
+Assistant messages used to be stored only as the JSON string of the parsed answer in
+Message.content, and every later read (history, verification, titles, sidebar preview) ran
+it through one of two parse_papers_response() implementations again, with regex fallbacks.
+The answer is now parsed once, when the message is saved:
+
+- Message.payload holds the normalized answer: {'text': str, 'papers': [dict, ...]}, plus
+  'error' when the model's answer could not be parsed
+- one MessagePaper row per entry of payload['papers'] (position = the paper_index used by
+  verifications), so recommended papers can be looked up by link or title in queries
+- Message.content keeps the raw JSON string, which is what recent turns replay to the model
+
+Readers use Message.text and Message.payload and never parse content. parse_papers_response()
+here is the only parser left; it reads the model's output (and legacy rows in the migration).
+"""
+
+import json
+import re
+
+
+def parse_papers_response(content):
+    """Extract papers JSON from response content."""
+    try:
+        # Try direct JSON parse first
+        return json.loads(content)
+    except json.JSONDecodeError:
+        # Try to extract JSON from markdown code blocks
+        match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', content, re.DOTALL)
+        if match:
+            return json.loads(match.group(1))
+        # Try to find raw JSON object
+        match = re.search(r'\{[^{}]*"papers"[^{}]*\[.*?\]\s*\}', content, re.DOTALL)
+        if match:
+            return json.loads(match.group(0))
+        # Return empty papers array if parsing fails
+        return {"papers": [], "error": "Failed to parse response"}
+
+
+def answer_payload(data):
+    """The stored form of a parsed answer (None if it is not a JSON object)."""
+    if not isinstance(data, dict):
+        return None
+    text = data.get('text')
+    papers = data.get('papers')
+    payload = {
+        'text': text if isinstance(text, str) else '',
+        'papers': [paper for paper in papers if isinstance(paper, dict)] if isinstance(papers, list) else [],
+    }
+    if data.get('error'):
+        payload['error'] = str(data['error'])
+    return payload
+
+
+def payload_from_content(content):
+    """Payload of a stored answer string (for rows saved before payloads existed)."""
+    try:
+        return answer_payload(parse_papers_response(content or ''))
+    except (TypeError, ValueError):
+        return None
+
+
+def message_text(role, content, payload=None):
+    """What a message says: the user's message, or the text of an assistant answer."""
+    if role != 'assistant' or payload is None:
+        return content or ''
+    return payload.get('text', '')
+
+
+def paper_field(paper, name, max_length=None):
+    """A field of a recommended paper as a string (the model does not always return strings)."""
+    value = paper.get(name)
+    value = '' if value is None else str(value)
+    return value[:max_length] if max_length else value
+
+
+def paper_rows(payload):
+    """Field values of the MessagePaper rows of a payload, in order."""
+    return [
+        {
+            'position': position,
+            'title': paper_field(paper, 'title'),
+            'authors': paper_field(paper, 'authors'),
+            'date': paper_field(paper, 'date', 50),
+            'paper_type': paper_field(paper, 'type', 50),
+            'link': paper_field(paper, 'link', 1000),
+            'summary': paper_field(paper, 'summary'),
+        }
+        for position, paper in enumerate((payload or {}).get('papers', []))
+    ]
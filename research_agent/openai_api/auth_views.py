@@ -4,6 +4,7 @@ from rest_framework.response import Response
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.models import User
 from django.views.decorators.csrf import ensure_csrf_cookie
+from . import openai_clients
 
 
 def get_api_key_preview(user):
@@ -103,6 +104,8 @@ def save_api_key(request):
         return Response({'error': 'API key is required'}, status=400)
 
     profile = request.user.profile
+    # Drop the cached client of the replaced key
+    openai_clients.invalidate(profile.openai_api_key)
     profile.openai_api_key = api_key
     profile.save()
 
@@ -118,6 +121,7 @@ def save_api_key(request):
 def delete_api_key(request):
     """Delete user's OpenAI API key"""
     profile = request.user.profile
+    openai_clients.invalidate(profile.openai_api_key)
     profile.openai_api_key = None
     profile.save()
 
@@ -0,0 +1,240 @@
+"""
+Streaming bibliography export of a project (.bib, CSL-JSON, RIS).
+
+Exports are generated while they are sent, so a project with thousands of papers is
+exported in constant memory (apart from the set of citation keys, kept while papers
+without BibTeX need new keys):
+
+- papers are read with iterator() in chunks of BIBLIOGRAPHY_EXPORT_CHUNK_SIZE rows
+- papers without BibTeX get an entry rendered on the fly from cached metadata or their
+  own fields (bibtex_builder.build_entries with fallback, no OpenAlex or LLM requests);
+  the entries are not saved, exporting has no side effects
+- CSL-JSON and RIS records are derived from each paper's BibTeX entry, so all three
+  formats describe the same data
+- export_etag() summarizes everything the export depends on with two aggregate queries,
+  so unchanged exports are answered with 304 Not Modified without reading any paper
+"""
+
+from hashlib import sha256
+import json
+import re
+
+from django.conf import settings
+from django.db.models import Count, Max, Q
+
+from .bibtex_builder import build_entries, existing_keys, split_authors
+from .identifiers import extract_doi
+from .models import PaperVerificationCache
+
+# Bump when the rendering changes, so cached exports are not reused
+EXPORT_VERSION = 1
+
+# format -> (content type, file extension)
+EXPORT_FORMATS = {
+    'bib': ('application/x-bibtex; charset=utf-8', 'bib'),
+    'csl-json': ('application/vnd.citationstyles.csl+json; charset=utf-8', 'json'),
+    'ris': ('application/x-research-info-systems; charset=utf-8', 'ris'),
+}
+
+# BibTeX entry type -> (CSL type, RIS type)
+ENTRY_TYPES = {
+    'article': ('article-journal', 'JOUR'),
+    'inproceedings': ('paper-conference', 'CPAPER'),
+    'conference': ('paper-conference', 'CPAPER'),
+    'book': ('book', 'BOOK'),
+    'incollection': ('chapter', 'CHAP'),
+    'phdthesis': ('thesis', 'THES'),
+    'mastersthesis': ('thesis', 'THES'),
+    'techreport': ('report', 'RPRT'),
+}
+
+ENTRY_HEADER = re.compile(r'@(\w+)\s*\{\s*([^,\s]+)\s*,')
+ENTRY_FIELD = re.compile(r'^\s*(\w+)\s*=\s*(.+?)\s*,?\s*$', re.MULTILINE)
+LATEX_UNESCAPES = {r'\&': '&', r'\%': '%', r'\$': '$', r'\#': '#', r'\_': '_'}
+
+
+def setting(name, default):
+    return getattr(settings, name, default)
+
+
+# ============ ETAG ============
+
+def export_etag(project, export_format):
+    """
+    ETag of a project export.
+
+    Changes whenever a paper is added, removed or edited (Paper.updated_at), and, while some
+    papers have no BibTeX entry, whenever the verification cache their entries are rendered
+    from changes.
+    """
+    stats = project.papers.aggregate(
+        count=Count('id'),
+        last_id=Max('id'),
+        last_update=Max('updated_at'),
+        missing=Count('id', filter=Q(bibtex='')),
+    )
+    parts = [EXPORT_VERSION, export_format, project.id, stats['count'], stats['last_id'], stats['last_update']]
+    if stats['missing']:
+        parts.append(PaperVerificationCache.objects.aggregate(Max('verified_at'))['verified_at__max'])
+    return sha256('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()[:32]
+
+
+# ============ BIBTEX PARSING ============
+
+def clean_value(value):
+    """Field value without delimiters, protective braces and LaTeX escapes."""
+    value = value.strip()
+    if value[:1] in '{"' and value[-1:] in '}"':
+        value = value[1:-1]
+    for escaped, char in LATEX_UNESCAPES.items():
+        value = value.replace(escaped, char)
+    return ' '.join(value.replace('{', '').replace('}', '').split())
+
+
+def parse_entry(bibtex):
+    """(entry type, key, fields) of a BibTeX entry with one field per line, or None."""
+    header = ENTRY_HEADER.search(bibtex or '')
+    if not header:
+        return None
+    fields = {}
+    for name, value in ENTRY_FIELD.findall(bibtex[header.end():]):
+        fields.setdefault(name.lower(), clean_value(value))
+    return header.group(1).lower(), header.group(2), fields
+
+
+def split_name(name):
+    """BibTeX name -> (family, given)."""
+    if ',' in name:
+        family, given = name.split(',', 1)
+        return family.strip(), given.strip()
+    parts = name.split(' ')
+    return parts[-1], ' '.join(parts[:-1])
+
+
+def paper_record(paper):
+    """Citation data of a paper from its BibTeX entry, completed with the paper's own fields."""
+    entry_type, key, fields = parse_entry(paper.bibtex) or ('misc', f'paper{paper.id}', {})
+    if fields.get('author'):
+        authors = [name.strip() for name in re.split(r'\s+and\s+', fields['author'])]
+    else:
+        authors = split_authors(paper.authors)[0]
+    year = re.search(r'\d{4}', fields.get('year') or paper.date or '')
+    return {
+        'entry_type': entry_type,
+        'key': key,
+        'title': fields.get('title') or paper.title,
+        'authors': [split_name(name) for name in authors if name and name != 'others'],
+        'container': fields.get('journal') or fields.get('booktitle') or '',
+        'publisher': fields.get('publisher') or '',
+        'year': year.group(0) if year else '',
+        'volume': fields.get('volume') or '',
+        'issue': fields.get('number') or '',
+        'pages': fields.get('pages') or '',
+        'doi': fields.get('doi') or extract_doi(paper.link) or '',
+        'eprint': fields.get('eprint') or '',
+        'url': fields.get('url') or paper.link,
+        'abstract': paper.summary,
+    }
+
+
+# ============ FORMATS ============
+
+def csl_item(record):
+    csl_type, _ = ENTRY_TYPES.get(record['entry_type'], ('article', 'GEN'))
+    item = {
+        'id': record['key'],
+        'type': csl_type,
+        'title': record['title'],
+        'author': [
+            {'family': family, 'given': given} if given else {'literal': family}
+            for family, given in record['authors']
+        ],
+    }
+    optional = {
+        'container-title': record['container'],
+        'publisher': record['publisher'],
+        'volume': record['volume'],
+        'issue': record['issue'],
+        'page': record['pages'],
+        'DOI': record['doi'],
+        'URL': record['url'],
+        'abstract': record['abstract'],
+    }
+    if record['eprint']:
+        optional['number'] = f"arXiv:{record['eprint']}"
+        optional['publisher'] = optional['publisher'] or 'arXiv'
+    item.update({name: value for name, value in optional.items() if value})
+    if record['year']:
+        item['issued'] = {'date-parts': [[int(record['year'])]]}
+    return item
+
+
+def ris_record(record):
+    _, ris_type = ENTRY_TYPES.get(record['entry_type'], ('article', 'GEN'))
+    lines = [('TY', ris_type), ('ID', record['key'])]
+    lines += [('AU', f'{family}, {given}' if given else family) for family, given in record['authors']]
+    lines += [
+        ('TI', record['title']),
+        ('JO' if ris_type == 'JOUR' else 'T2', record['container']),
+        ('PB', record['publisher']),
+        ('PY', record['year']),
+        ('VL', record['volume']),
+        ('IS', record['issue']),
+        ('SP', record['pages']),
+        ('DO', record['doi']),
+        ('UR', record['url']),
+        ('AB', ' '.join((record['abstract'] or '').split())),
+        ('ER', ''),
+    ]
+    return ''.join(f'{tag}  - {value}\r\n' for tag, value in lines if value or tag == 'ER')
+
+
+# ============ STREAMING ============
+
+def chunked(iterator, size):
+    chunk = []
+    for item in iterator:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def export_papers(project):
+    """Papers of a project with a BibTeX entry each (rendered on the fly where missing), chunk by chunk."""
+    chunk_size = setting('BIBLIOGRAPHY_EXPORT_CHUNK_SIZE', 500)
+    papers = project.papers.only('id', 'project', 'title', 'authors', 'date', 'link', 'summary', 'bibtex').order_by('created_at', 'id')
+
+    taken = None
+    for chunk in chunked(papers.iterator(chunk_size=chunk_size), chunk_size):
+        missing = [paper for paper in chunk if not paper.bibtex]
+        if missing:
+            if taken is None:
+                # Keys of the stored entries, so rendered keys don't collide with them
+                taken = existing_keys(
+                    project.papers.exclude(bibtex='').values_list('bibtex', flat=True).iterator(chunk_size=chunk_size)
+                )
+            entries = build_entries(missing, taken, lookup=False, fallback=True)
+            for paper in missing:
+                paper.bibtex = entries[paper.id]
+        yield chunk
+
+
+def export_stream(project, export_format):
+    """Iterator over the parts of a project export in export_format (see EXPORT_FORMATS)."""
+    if export_format == 'csl-json':
+        yield '['
+        first = True
+        for chunk in export_papers(project):
+            for paper in chunk:
+                yield ('\n' if first else ',\n') + json.dumps(csl_item(paper_record(paper)), ensure_ascii=False)
+                first = False
+        yield '\n]\n'
+    elif export_format == 'ris':
+        for chunk in export_papers(project):
+            yield ''.join(ris_record(paper_record(paper)) + '\r\n' for paper in chunk)
+    else:
+        for chunk in export_papers(project):
+            yield ''.join(paper.bibtex.strip() + '\n\n' for paper in chunk)
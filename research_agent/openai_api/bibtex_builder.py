@@ -0,0 +1,299 @@
+"""
+Deterministic BibTeX entries from resolved paper metadata.
+
+Asking the LLM to write every entry was slow, cost tokens and often produced wrong
+entries. Entries are now rendered locally from OpenAlex metadata:
+
+- metadata comes from the verification cache (PaperVerificationCache rows of the same
+  DOI / arXiv id / URL or title, any age: bibliographic data does not go stale) and otherwise from
+  OpenAlex itself when BIBTEX_OPENALEX_LOOKUP is enabled (DOIs batched into one request)
+- metadata found by title search is only used if its title matches the paper's
+  (BIBTEX_TITLE_MATCH); metadata whose DOI is the one in the paper's link is always used
+- the entry type follows the venue type (journal -> @article, conference and book series
+  -> @inproceedings, otherwise @misc); arXiv papers get eprint/archivePrefix fields
+- keys are <first author's last name><year><first title word>, made unique within the
+  project with a/b/c suffixes
+
+Papers whose metadata cannot be resolved (and that have no arXiv id) are left to the LLM
+(see views.generate_bibtex); build_entries() reports them as unresolved (None).
+"""
+
+from difflib import SequenceMatcher
+import re
+import unicodedata
+
+from django.conf import settings
+from django.db.models.functions import Lower
+
+from .identifiers import extract_arxiv_id, extract_doi, paper_identifier
+from .models import PaperVerificationCache
+from . import openalex
+
+MONTHS = ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec']
+
+# OpenAlex source type -> (entry type, field holding the venue name)
+VENUE_ENTRY_TYPES = {
+    'journal': ('article', 'journal'),
+    'conference': ('inproceedings', 'booktitle'),
+    'book series': ('inproceedings', 'booktitle'),
+}
+
+# Words skipped when picking the title word of a key
+KEY_STOPWORDS = {'a', 'an', 'the', 'on', 'of', 'in', 'for', 'to', 'and', 'with', 'towards', 'toward', 'via', 'is', 'are'}
+
+LATEX_ESCAPES = {'&': r'\&', '%': r'\%', '$': r'\$', '#': r'\#', '_': r'\_'}
+
+KEY_PATTERN = re.compile(r'@\w+\s*\{\s*([^,\s]+)\s*,')
+
+
+def setting(name, default):
+    return getattr(settings, name, default)
+
+
+def ascii_fold(text):
+    return unicodedata.normalize('NFKD', text or '').encode('ascii', 'ignore').decode('ascii')
+
+
+def normalize_title(title):
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', ascii_fold(title).lower()).split())
+
+
+def titles_match(a, b):
+    a, b = normalize_title(a), normalize_title(b)
+    if not a or not b:
+        return False
+    return a == b or SequenceMatcher(None, a, b).ratio() >= setting('BIBTEX_TITLE_MATCH', 0.9)
+
+
+def paper_doi(link):
+    """DOI of a paper link, including arXiv DOIs (which OpenAlex reports for arXiv papers)."""
+    return extract_doi(link, allow_arxiv=True)
+
+
+def usable_metadata(paper, metadata):
+    """OpenAlex metadata if it describes the paper: same DOI as the link, or a matching title."""
+    if not metadata or not metadata.get('success') or not metadata.get('title'):
+        return None
+    doi = paper_doi(paper.link)
+    if doi and extract_doi(metadata.get('doi') or '', allow_arxiv=True) == doi:
+        return metadata
+    return metadata if titles_match(paper.title, metadata['title']) else None
+
+
+# ============ METADATA RESOLUTION ============
+
+def cached_metadata(papers):
+    """
+    paper id -> OpenAlex metadata from the verification cache.
+
+    Entries are matched by identifier, then by title (the same paper verified under another link).
+    """
+    identifiers = {paper.id: paper_identifier(paper.link)[1] for paper in papers}
+    by_identifier = dict(PaperVerificationCache.objects.filter(
+        identifier__in=[i for i in identifiers.values() if i]
+    ).values_list('identifier', 'openalex_metadata'))
+    result = {paper.id: by_identifier.get(identifiers[paper.id]) for paper in papers}
+
+    missing = {paper.title.lower(): paper.id for paper in papers if not result[paper.id] and paper.title}
+    if missing:
+        by_title = PaperVerificationCache.objects.annotate(lower_title=Lower('title')).filter(
+            lower_title__in=list(missing)
+        ).values_list('lower_title', 'openalex_metadata')
+        for title, metadata in by_title:
+            if metadata and metadata.get('success'):
+                result[missing[title]] = metadata
+    return result
+
+
+def resolve_metadata(papers, lookup=True):
+    """
+    paper id -> usable OpenAlex metadata (or None) for several papers.
+
+    Cached verification results first, then one OpenAlex lookup for the rest (DOIs batched,
+    titles searched in parallel) if lookup is true and BIBTEX_OPENALEX_LOOKUP is enabled.
+    """
+    cached = cached_metadata(papers)
+    resolved = {paper.id: usable_metadata(paper, cached.get(paper.id)) for paper in papers}
+
+    missing = [paper for paper in papers if resolved[paper.id] is None]
+    if missing and lookup and setting('BIBTEX_OPENALEX_LOOKUP', True):
+        results = openalex.resolve_papers([{'link': paper.link, 'title': paper.title} for paper in missing])
+        for paper, metadata in zip(missing, results):
+            resolved[paper.id] = usable_metadata(paper, metadata)
+    return resolved
+
+
+# ============ RENDERING ============
+
+def escape(value):
+    return ''.join(LATEX_ESCAPES.get(char, char) for char in str(value))
+
+
+def protect_title(title):
+    """Escape a title and brace words with inner capitals (acronyms, names like BERT or ImageNet)."""
+    words = []
+    for word in escape(' '.join(title.split())).split(' '):
+        lead, core, trail = re.match(r'^([^\w\\]*)(.*?)([^\w\\]*)$', word).groups()
+        words.append(f'{lead}{{{core}}}{trail}' if any(char.isupper() for char in core[1:]) else word)
+    return ' '.join(words)
+
+
+def bibtex_name(name):
+    """'Ashish Vaswani' -> 'Vaswani, Ashish' (names that already have a comma are kept)."""
+    name = ' '.join((name or '').split())
+    if not name or ',' in name:
+        return name
+    parts = name.split(' ')
+    if len(parts) == 1:
+        return name
+    return f"{parts[-1]}, {' '.join(parts[:-1])}"
+
+
+def split_authors(authors):
+    """
+    Split a free-text author list ('Doe, J., Smith, A., et al.' or 'Jane Doe and Al Smith').
+
+    Returns (names, truncated) where truncated means the list ended with 'et al.'.
+    """
+    text = (authors or '').strip()
+    truncated = bool(re.search(r',?\s*(et al\.?|and others)\s*$', text, re.IGNORECASE))
+    text = re.sub(r',?\s*(et al\.?|and others)\s*$', '', text, flags=re.IGNORECASE)
+    if not text:
+        return [], truncated
+    if ';' in text or ' and ' in text:
+        parts = re.split(r'\s*;\s*|\s+and\s+', text)
+    else:
+        parts = [part.strip() for part in text.split(',')]
+        # 'Doe, J., Smith, A.' splits into surname / initials pairs
+        if len(parts) % 2 == 0 and all(re.fullmatch(r'([A-Z]\.\s?-?)+', p) for p in parts[1::2]):
+            parts = [f'{surname}, {initials}' for surname, initials in zip(parts[::2], parts[1::2])]
+    return [bibtex_name(part) for part in parts if part.strip()], truncated
+
+
+def last_name(name):
+    return name.split(',')[0].split(' ')[-1] if name else ''
+
+
+class CitationKeys:
+    """Citation keys in use; hands out new keys with a/b/c suffixes where the base key is taken."""
+
+    def __init__(self, keys=()):
+        self.keys = set(keys)
+        # base key -> index of the next suffix to try, so papers sharing a base stay O(1)
+        self.next_suffix = {}
+
+    def __contains__(self, key):
+        return key in self.keys
+
+    def unique(self, base):
+        key, suffix = base, self.next_suffix.get(base, 0)
+        while key in self.keys:
+            key = base + chr(ord('a') + suffix % 26) * (suffix // 26 + 1)
+            suffix += 1
+        self.next_suffix[base] = suffix
+        self.keys.add(key)
+        return key
+
+
+def make_key(first_author, year, title, taken):
+    """<last name><year><first title word>, made unique among the CitationKeys taken."""
+    surname = re.sub(r'[^a-z]', '', ascii_fold(last_name(first_author)).lower()) or 'anonymous'
+    words = [w for w in normalize_title(title).split() if w not in KEY_STOPWORDS]
+    return taken.unique(f"{surname}{year or ''}{words[0] if words else ''}")
+
+
+def render_entry(entry_type, key, fields):
+    lines = [f'@{entry_type}{{{key},']
+    # Months are written as the standard BibTeX macros (jan, feb, ...), without braces
+    lines += [f'  {name} = {value},' if name == 'month' else f'  {name} = {{{value}}},' for name, value in fields if value]
+    lines[-1] = lines[-1].rstrip(',')
+    return '\n'.join(lines) + '\n}'
+
+
+def entry_from_metadata(paper, metadata, taken):
+    """Render the BibTeX entry of a paper from its OpenAlex metadata."""
+    authors = [bibtex_name(author.get('name')) for author in metadata.get('authors') or [] if author.get('name')]
+    year = metadata.get('publication_year') or ''
+    venue = metadata.get('venue') or {}
+    arxiv_id = extract_arxiv_id(paper.link) or extract_arxiv_id(metadata.get('doi') or '')
+    doi = extract_doi(metadata.get('doi') or '', allow_arxiv=True) or paper_doi(paper.link)
+    entry_type, venue_field = VENUE_ENTRY_TYPES.get(venue.get('type'), ('misc', 'howpublished'))
+    if arxiv_id and entry_type == 'misc':
+        venue_field = None
+
+    month = None
+    date = metadata.get('publication_date') or ''
+    if entry_type == 'article' and re.match(r'\d{4}-\d{2}', date):
+        month = MONTHS[int(date[5:7]) - 1]
+
+    fields = [
+        ('author', ' and '.join(escape(author) for author in authors)),
+        ('title', protect_title(metadata['title'])),
+        (venue_field, escape(venue.get('name') or '') if venue_field else ''),
+        ('year', year),
+        ('month', month),
+    ]
+    if arxiv_id:
+        fields += [('eprint', arxiv_id), ('archivePrefix', 'arXiv')]
+    fields += [('doi', doi), ('url', paper.link)]
+    return render_entry(entry_type, make_key(authors[0] if authors else '', year, metadata['title'], taken), fields)
+
+
+def entry_from_paper(paper, taken, arxiv_id=None):
+    """Render a @misc entry from the paper's own fields (no OpenAlex metadata)."""
+    authors, truncated = split_authors(paper.authors)
+    year = re.search(r'\d{4}', paper.date or '')
+    if year:
+        year = year.group(0)
+    else:
+        # New-style arXiv ids start with YYMM
+        year = f'20{arxiv_id[:2]}' if arxiv_id and re.match(r'\d{4}\.', arxiv_id) else ''
+    author_field = ' and '.join(escape(author) for author in authors + (['others'] if truncated else []))
+    fields = [
+        ('author', author_field),
+        ('title', protect_title(paper.title)),
+        ('year', year),
+        ('eprint', arxiv_id),
+        ('archivePrefix', 'arXiv' if arxiv_id else None),
+        ('doi', extract_doi(paper.link)),
+        ('url', paper.link),
+    ]
+    return render_entry('misc', make_key(authors[0] if authors else '', year, paper.title, taken), fields)
+
+
+def existing_keys(bibtex_entries):
+    """CitationKeys of the keys already used by BibTeX entries (strings)."""
+    keys = CitationKeys()
+    for bibtex in bibtex_entries:
+        match = KEY_PATTERN.search(bibtex or '')
+        if match:
+            keys.keys.add(match.group(1))
+    return keys
+
+
+def build_entries(papers, taken=None, lookup=True, fallback=False):
+    """
+    Render BibTeX entries for papers without calling the LLM.
+
+    taken holds the CitationKeys already in use (extended with the new keys); lookup allows
+    OpenAlex requests. Returns dict paper id -> entry, with None for papers whose metadata
+    could not be resolved, unless fallback is true: then those are rendered from their own fields.
+    """
+    taken = CitationKeys() if taken is None else taken
+    metadata = resolve_metadata(papers, lookup)
+    entries = {}
+    for paper in papers:
+        arxiv_id = extract_arxiv_id(paper.link)
+        if metadata[paper.id]:
+            entries[paper.id] = entry_from_metadata(paper, metadata[paper.id], taken)
+        elif arxiv_id or fallback:
+            entries[paper.id] = entry_from_paper(paper, taken, arxiv_id)
+        else:
+            entries[paper.id] = None
+    return entries
+
+
+def build_entry(paper):
+    """BibTeX entry of a single paper (keys unique within its project), or None if unresolved."""
+    others = paper.project.papers.exclude(pk=paper.pk) if paper.project_id else paper.user.papers.exclude(pk=paper.pk)
+    return build_entries([paper], existing_keys(others.values_list('bibtex', flat=True)))[paper.id]
@@ -0,0 +1,152 @@
+"""
+Local relevance ranking of a project's context papers (hashed TF-IDF vectors in NumPy).
+
+Projects with hundreds of saved papers made every chat turn paste all of them into the
+system prompt. When a project's context papers exceed CONTEXT_PAPERS_TOKEN_BUDGET,
+system_prompts.context_block() lists only the papers most relevant to the user's message,
+ranked by this index; no external vector service is involved:
+
+- every paper has a sparse term vector (Paper.term_vector): hashed term counts of its title
+  (counted twice), authors and summary, with sublinear weights
+- vectors are stored with a checksum of the text they were computed from, so only papers
+  that are new or whose text changed are vectorized again (and saved with bulk_update, which
+  neither bumps updated_at nor Project.context_version)
+- a ContextIndex stacks the vectors of one project version into flat arrays (a CSR-like
+  layout) with IDF weights; it is cached with the project's prompt block (see
+  system_prompts.py) and rebuilt when Project.context_version changes
+- rank() scores the papers by cosine similarity of TF-IDF vectors in O(stored terms), most
+  recent papers first among equal scores
+
+Hashing terms into 2**HASH_BITS buckets keeps vectors independent of a vocabulary, so a
+paper's vector never has to be recomputed because other papers changed.
+"""
+
+import re
+import zlib
+
+import numpy as np
+
+from .models import Paper
+
+# Bump when tokenization or weighting changes, so stored vectors are recomputed
+VECTOR_VERSION = 1
+HASH_BITS = 20
+
+# Stored vector: header (version, text checksum) followed by (bucket, weight) pairs
+HEADER_DTYPE = np.dtype('<u4')
+TERM_DTYPE = np.dtype([('bucket', '<u4'), ('weight', '<f4')])
+HEADER_SIZE = 2 * HEADER_DTYPE.itemsize
+
+_word = re.compile(r'[a-z0-9]+')
+
+STOPWORDS = frozenset('''
+a about all also an and any are as at be been but by can could do does et for from has have
+how i in into is it its me more most my of on or our paper papers show some such than that the
+their them there these they this those to using via was we were what when which who why will
+with would you your
+'''.split())
+
+
+def terms(text):
+    """Lowercase words of text without stopwords and single characters."""
+    return [word for word in _word.findall((text or '').lower()) if len(word) > 1 and word not in STOPWORDS]
+
+
+def bucket(term):
+    # crc32 instead of hash(): buckets must be the same in every process
+    return zlib.crc32(term.encode('utf-8')) & ((1 << HASH_BITS) - 1)
+
+
+def term_counts(words):
+    """Sorted unique buckets and sublinear weights (1 + log count) of a list of terms."""
+    if not words:
+        return np.zeros(0, dtype=np.uint32), np.zeros(0, dtype=np.float32)
+    buckets, counts = np.unique(np.fromiter((bucket(word) for word in words), dtype=np.uint32, count=len(words)), return_counts=True)
+    return buckets, (1 + np.log(counts)).astype(np.float32)
+
+
+def paper_text(paper):
+    return '\n'.join((paper.title, paper.title, paper.authors, paper.summary))
+
+
+def text_checksum(text):
+    return zlib.crc32(text.encode('utf-8'))
+
+
+def encode_vector(text):
+    buckets, weights = term_counts(terms(text))
+    vector = np.empty(len(buckets), dtype=TERM_DTYPE)
+    vector['bucket'] = buckets
+    vector['weight'] = weights
+    return np.array([VECTOR_VERSION, text_checksum(text)], dtype=HEADER_DTYPE).tobytes() + vector.tobytes()
+
+
+def decode_vector(data, text):
+    """The stored (bucket, weight) array, or None if it is missing or outdated for text."""
+    data = bytes(data or b'')
+    if len(data) < HEADER_SIZE:
+        return None
+    version, checksum = np.frombuffer(data[:HEADER_SIZE], dtype=HEADER_DTYPE)
+    if version != VECTOR_VERSION or checksum != text_checksum(text):
+        return None
+    return np.frombuffer(data[HEADER_SIZE:], dtype=TERM_DTYPE)
+
+
+def paper_vectors(papers):
+    """
+    Term vectors of papers (with id, title, authors, summary and term_vector loaded), in order.
+
+    Missing or outdated vectors are computed and saved.
+    """
+    vectors, changed = [], []
+    for paper in papers:
+        text = paper_text(paper)
+        vector = decode_vector(paper.term_vector, text)
+        if vector is None:
+            paper.term_vector = encode_vector(text)
+            vector = decode_vector(paper.term_vector, text)
+            changed.append(paper)
+        vectors.append(vector)
+    if changed:
+        Paper.objects.bulk_update(changed, ['term_vector'], batch_size=500)
+        print(f"[Context Index] Vectorized {len(changed)} paper(s)")
+    return vectors
+
+
+class ContextIndex:
+    """TF-IDF index over the term vectors of one version of a project's context papers."""
+
+    def __init__(self, vectors):
+        self.size = len(vectors)
+        lengths = np.fromiter((len(vector) for vector in vectors), dtype=np.int64, count=self.size)
+        stacked = np.concatenate(vectors) if self.size else np.zeros(0, dtype=TERM_DTYPE)
+        self.rows = np.repeat(np.arange(self.size), lengths)
+        self.buckets = stacked['bucket']
+        # Document frequency per bucket; every bucket occurs at most once per paper
+        self.vocabulary, inverse, document_frequency = np.unique(self.buckets, return_inverse=True, return_counts=True)
+        self.idf = (np.log((self.size + 1) / (document_frequency + 1)) + 1).astype(np.float32)
+        self.weights = stacked['weight'] * self.idf[inverse]
+        norms = np.sqrt(np.bincount(self.rows, weights=self.weights ** 2, minlength=self.size))
+        self.norms = np.where(norms > 0, norms, 1)
+
+    def scores(self, query):
+        """Cosine similarity of every paper to the query text."""
+        query_buckets, query_weights = term_counts(terms(query))
+        if not len(query_buckets) or not len(self.vocabulary):
+            return np.zeros(self.size)
+        # IDF of the query terms (terms no paper contains cannot contribute)
+        position = np.minimum(np.searchsorted(self.vocabulary, query_buckets), len(self.vocabulary) - 1)
+        known = self.vocabulary[position] == query_buckets
+        query_buckets, query_weights = query_buckets[known], query_weights[known] * self.idf[position[known]]
+        if not len(query_buckets):
+            return np.zeros(self.size)
+
+        # Weight of each stored term in the query (0 for terms not in the query)
+        position = np.minimum(np.searchsorted(query_buckets, self.buckets), len(query_buckets) - 1)
+        matched = np.where(query_buckets[position] == self.buckets, query_weights[position], 0)
+        return np.bincount(self.rows, weights=self.weights * matched, minlength=self.size) / self.norms
+
+    def rank(self, query):
+        """Paper positions by descending relevance to query; later (newer) papers first among equal scores."""
+        order = np.arange(self.size)[::-1]
+        return order[np.argsort(-self.scores(query)[order], kind='stable')]
@@ -0,0 +1,103 @@
+"""
+JSON schemas for LLM paper evaluations.
+
+PAPER_EVALUATION_SCHEMA describes one paper evaluation (the format verify_single_paper asks
+for); BATCH_EVALUATION_SCHEMA wraps one evaluation per paper, keyed by paper_index, for the
+batched evaluation mode. The batch schema is sent as an OpenAI structured-output
+response_format (strict mode: every property required, no additional properties), and every
+returned evaluation is checked again locally with schema_errors() before it is used.
+"""
+
+ISSUES = {'type': 'array', 'items': {'type': 'string'}}
+
+
+def strict_object(properties):
+    return {
+        'type': 'object',
+        'properties': properties,
+        'required': list(properties),
+        'additionalProperties': False,
+    }
+
+
+PAPER_EVALUATION_PROPERTIES = {
+    'content_match': strict_object({
+        'matches': {'type': 'boolean'},
+        'confidence': {'type': 'number'},
+        'title_match': {'type': 'boolean'},
+        'author_match': {'type': 'boolean'},
+        'date_match': {'type': 'boolean'},
+        'issues': ISSUES,
+        'explanation': {'type': 'string'},
+    }),
+    'paper_quality': strict_object({
+        'credibility_score': {'type': 'number'},
+        'quality_score': {'type': 'number'},
+        'credibility_notes': {'type': 'string'},
+        'quality_notes': {'type': 'string'},
+    }),
+    'summary_evaluation': strict_object({
+        'accurate': {'type': 'boolean'},
+        'score': {'type': 'number'},
+        'issues': ISSUES,
+        'notes': {'type': 'string'},
+    }),
+    'overall_assessment': {'type': 'string'},
+}
+
+PAPER_EVALUATION_SCHEMA = strict_object(PAPER_EVALUATION_PROPERTIES)
+
+BATCH_EVALUATION_SCHEMA = strict_object({
+    'papers': {
+        'type': 'array',
+        'items': strict_object({
+            'paper_index': {'type': 'integer'},
+            **PAPER_EVALUATION_PROPERTIES,
+        }),
+    },
+})
+
+
+def batch_response_format():
+    """response_format argument for a batched evaluation request."""
+    return {
+        'type': 'json_schema',
+        'json_schema': {
+            'name': 'paper_evaluations',
+            'strict': True,
+            'schema': BATCH_EVALUATION_SCHEMA,
+        },
+    }
+
+
+def schema_errors(value, schema, path='$'):
+    """
+    Validate value against the subset of JSON Schema used in this module.
+
+    Returns a list of error messages (empty if the value is valid).
+    """
+    expected = schema.get('type')
+    if expected == 'object':
+        if not isinstance(value, dict):
+            return [f'{path}: expected object']
+        errors = [f'{path}.{key}: missing' for key in schema.get('required', []) if key not in value]
+        for key, subschema in schema.get('properties', {}).items():
+            if key in value:
+                errors.extend(schema_errors(value[key], subschema, f'{path}.{key}'))
+        return errors
+    if expected == 'array':
+        if not isinstance(value, list):
+            return [f'{path}: expected array']
+        errors = []
+        for i, item in enumerate(value):
+            errors.extend(schema_errors(item, schema.get('items', {}), f'{path}[{i}]'))
+        return errors
+    if expected == 'string' and not isinstance(value, str):
+        return [f'{path}: expected string']
+    if expected == 'boolean' and not isinstance(value, bool):
+        return [f'{path}: expected boolean']
+    if expected == 'integer' and (isinstance(value, bool) or not isinstance(value, int)):
+        return [f'{path}: expected integer']
+    if expected == 'number' and (isinstance(value, bool) or not isinstance(value, (int, float))):
+        return [f'{path}: expected number']
+    return []
@@ -0,0 +1,207 @@
+"""
+HTML/PDF to paper metadata/text extraction in a process pool.
+
+trafilatura parsing is CPU-heavy and holds the GIL, so running it in the request or
+verification threads serializes concurrent verifications. Documents are instead sent
+to a bounded ProcessPoolExecutor (EXTRACTION_WORKERS processes, started with "spawn"
+so no Django state or threads are forked).
+
+- Input is capped at EXTRACTION_MAX_INPUT_BYTES characters before it is sent to a worker.
+- Each document gets EXTRACTION_TIMEOUT seconds of CPU time inside the worker; a worker
+  that stops responding altogether is replaced.
+- metadata_only=True skips main-text extraction when only title/authors/date are needed.
+- PDFs are parsed with pypdf, reading only the first EXTRACTION_PDF_PAGES pages; PDFs cut
+  off by the download budget are repaired on a best-effort basis.
+
+Set EXTRACTION_USE_PROCESS_POOL = False to extract in the calling thread.
+"""
+
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+import io
+import logging
+import multiprocessing
+import re
+import signal
+import threading
+
+from pypdf import PdfReader
+import trafilatura
+from django.conf import settings
+
+# Characters of main text kept per document
+MAX_TEXT_CHARS = 3000
+
+
+class ExtractionTimeout(Exception):
+    pass
+
+
+def _raise_timeout(signum, frame):
+    raise ExtractionTimeout('Extraction CPU time limit exceeded')
+
+
+def extract_document(html, metadata_only=False, cpu_timeout=None):
+    """
+    Extract title, authors, date and (unless metadata_only) the first MAX_TEXT_CHARS of text.
+
+    Runs in a worker process (or in-thread); must not touch Django settings.
+    """
+    use_timer = cpu_timeout and hasattr(signal, 'setitimer') and threading.current_thread() is threading.main_thread()
+    if use_timer:
+        # ITIMER_PROF counts CPU time of this process, so waiting on I/O never trips it
+        signal.signal(signal.SIGPROF, _raise_timeout)
+        signal.setitimer(signal.ITIMER_PROF, cpu_timeout)
+    try:
+        if metadata_only:
+            data = trafilatura.extract_metadata(html)
+            text = None
+        else:
+            data = trafilatura.bare_extraction(
+                html,
+                include_comments=False,
+                with_metadata=True
+            )
+            text = data.text if data and data.text else None
+        return {
+            'title': data.title if data and data.title else None,
+            'authors': data.author if data and data.author else None,
+            'date': data.date if data and data.date else None,
+            'full_text': text[:MAX_TEXT_CHARS] if text else None,
+        }
+    finally:
+        if use_timer:
+            signal.setitimer(signal.ITIMER_PROF, 0)
+
+
+def repair_truncated_pdf(data):
+    """
+    Make a PDF cut off by the download budget readable.
+
+    Drops the incomplete last object and appends a trailer pointing at the document
+    catalog (and info dictionary) if they were downloaded; the reader then rebuilds the
+    cross-reference table by scanning the objects. Only works when the catalog and first
+    pages precede the cut (e.g. uncompressed or linearized files).
+    """
+    end = data.rfind(b'endobj')
+    if end == -1:
+        return data
+    data = data[:end + len(b'endobj')]
+    catalog = re.search(rb'(\d+)\s+(\d+)\s+obj\s*<<(?:(?!endobj).){0,2000}?/Type\s*/Catalog', data, re.S)
+    if not catalog:
+        return data
+    trailer = b'\ntrailer\n<< /Root %s %s R' % (catalog.group(1), catalog.group(2))
+    info = re.search(rb'(\d+)\s+(\d+)\s+obj\s*<<(?:(?!endobj).){0,2000}?/(?:Producer|Creator)\b', data, re.S)
+    if info:
+        trailer += b' /Info %s %s R' % (info.group(1), info.group(2))
+    return data + trailer + b' >>\nstartxref\n0\n%%EOF\n'
+
+
+def extract_pdf_document(data, max_pages, truncated=False, cpu_timeout=None):
+    """
+    Extract title, authors, date and the text of the first max_pages pages of a PDF.
+
+    Runs in a worker process (or in-thread); must not touch Django settings.
+    """
+    use_timer = cpu_timeout and hasattr(signal, 'setitimer') and threading.current_thread() is threading.main_thread()
+    if use_timer:
+        signal.signal(signal.SIGPROF, _raise_timeout)
+        signal.setitimer(signal.ITIMER_PROF, cpu_timeout)
+    try:
+        # pypdf logs every structure it has to repair, which is expected for truncated files
+        logging.getLogger('pypdf').setLevel(logging.ERROR)
+        reader = PdfReader(io.BytesIO(repair_truncated_pdf(data) if truncated else data), strict=False)
+        metadata = reader.metadata or {}
+
+        texts = []
+        for page in reader.pages[:max_pages]:
+            try:
+                texts.append(page.extract_text() or '')
+            except Exception:
+                # Page content lies beyond the downloaded part of the file
+                break
+        text = '\n'.join(t for t in texts if t).strip()
+
+        date = None
+        match = re.match(r'D:(\d{4})(\d{2})?(\d{2})?', str(metadata.get('/CreationDate') or ''))
+        if match:
+            date = '-'.join(part for part in match.groups() if part)
+
+        return {
+            'title': str(metadata['/Title']) if metadata.get('/Title') else None,
+            'authors': str(metadata['/Author']) if metadata.get('/Author') else None,
+            'date': date,
+            'full_text': text[:MAX_TEXT_CHARS] if text else None,
+        }
+    finally:
+        if use_timer:
+            signal.setitimer(signal.ITIMER_PROF, 0)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=getattr(settings, 'EXTRACTION_WORKERS', 2),
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _pool
+
+
+def reset_pool(pool):
+    """Replace a broken or hung pool (no-op if another thread already replaced it)."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    # Terminate hung workers; shutdown alone would wait for them
+    for process in list((getattr(pool, '_processes', None) or {}).values()):
+        process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def run_in_pool(func, *args):
+    """Run an extraction function in the process pool (or in-thread if the pool is disabled)."""
+    cpu_timeout = getattr(settings, 'EXTRACTION_TIMEOUT', 5)
+
+    if not getattr(settings, 'EXTRACTION_USE_PROCESS_POOL', True):
+        return func(*args)
+
+    pool = get_pool()
+    try:
+        future = pool.submit(func, *args, cpu_timeout=cpu_timeout)
+        # Wall-clock guard on top of the CPU limit (queueing + pickling + a worker that hangs in C code)
+        return future.result(timeout=cpu_timeout * 3 + 5)
+    except FuturesTimeoutError:
+        reset_pool(pool)
+        raise ExtractionTimeout('Extraction worker did not respond')
+    except BrokenProcessPool:
+        reset_pool(pool)
+        raise
+
+
+def extract(html, metadata_only=False):
+    """
+    Extract paper metadata (and text) from an HTML document (str, or bytes in any encoding).
+
+    Returns dict with title, authors, date and full_text.
+    Raises ExtractionTimeout if the document exceeds its CPU budget.
+    """
+    max_input = getattr(settings, 'EXTRACTION_MAX_INPUT_BYTES', 2 * 1024 * 1024)
+    html = html[:max_input] if html else ''
+    return run_in_pool(extract_document, html, metadata_only)
+
+
+def extract_pdf(data, truncated=False):
+    """
+    Extract PDF metadata and the text of the first EXTRACTION_PDF_PAGES pages.
+
+    truncated marks data that was cut off by the download budget.
+    Returns dict with title, authors, date and full_text.
+    """
+    return run_in_pool(extract_pdf_document, data, getattr(settings, 'EXTRACTION_PDF_PAGES', 2), truncated)
@@ -0,0 +1,176 @@
+"""
+Pooled page fetcher built on curl_cffi sessions.
+
+Outbound paper page fetches go through long-lived sessions instead of module-level
+requests.get(), so the impersonated TLS connections, the connection cache and the DNS
+cache (FETCH_DNS_CACHE_TTL) are reused across requests and verification threads.
+
+A fixed pool of FETCH_POOL_SIZE sessions is shared by all threads, each session checked out
+by one thread at a time (a curl handle must not be used concurrently). Fetches respect
+per-host limits: at most FETCH_PER_HOST_CONCURRENCY requests in flight per host and at
+least FETCH_HOST_DELAY seconds between request starts to the same host, so concurrent
+verifications don't get us throttled by a single publisher.
+
+fetch_limited() streams the body and stops after a per-content-type byte budget, so a
+multi-megabyte PDF or page never has to be downloaded in full.
+"""
+
+from contextlib import contextmanager
+from urllib.parse import urlparse
+import queue
+import threading
+import time
+
+from curl_cffi import CurlOpt
+from curl_cffi import requests
+from django.conf import settings
+
+
+def setting(name, default):
+    return getattr(settings, name, default)
+
+
+def session_options():
+    return {
+        'impersonate': setting('FETCH_IMPERSONATE', 'chrome'),
+        'timeout': setting('FETCH_TIMEOUT', 15),
+        'curl_options': {
+            CurlOpt.DNS_CACHE_TIMEOUT: setting('FETCH_DNS_CACHE_TTL', 300),
+            CurlOpt.MAXCONNECTS: setting('FETCH_MAX_CONNECTIONS_PER_SESSION', 16),
+        },
+    }
+
+
+# ============ PER-HOST LIMITS ============
+
+_host_lock = threading.Lock()
+_host_semaphores = {}
+_host_next_start = {}
+
+
+def host_of(url):
+    return urlparse(url).netloc.lower()
+
+
+def host_semaphore(host):
+    with _host_lock:
+        if host not in _host_semaphores:
+            _host_semaphores[host] = threading.BoundedSemaphore(setting('FETCH_PER_HOST_CONCURRENCY', 2))
+        return _host_semaphores[host]
+
+
+def reserve_start(host):
+    """Reserve the next request start time for a host. Returns seconds to wait until then."""
+    delay = setting('FETCH_HOST_DELAY', 0.5)
+    with _host_lock:
+        now = time.monotonic()
+        start = max(now, _host_next_start.get(host, now))
+        _host_next_start[host] = start + delay
+    return start - now
+
+
+@contextmanager
+def host_slot(url):
+    """Hold one of the host's concurrency slots, after its politeness delay."""
+    host = host_of(url)
+    semaphore = host_semaphore(host)
+    if not semaphore.acquire(timeout=setting('FETCH_HOST_WAIT_TIMEOUT', 30)):
+        raise TimeoutError(f'Too many concurrent requests to {host}')
+    try:
+        wait = reserve_start(host)
+        if wait > 0:
+            time.sleep(wait)
+        yield
+    finally:
+        semaphore.release()
+
+
+# ============ SESSION POOL ============
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = queue.LifoQueue()
+            for _ in range(setting('FETCH_POOL_SIZE', 8)):
+                # Not thread-local: the session's curl handle (and its connections) outlives the thread
+                _pool.put(requests.Session(use_thread_local_curl=False, **session_options()))
+        return _pool
+
+
+@contextmanager
+def checkout_session():
+    """Borrow a session from the pool for exclusive use."""
+    pool = get_pool()
+    session = pool.get(timeout=setting('FETCH_HOST_WAIT_TIMEOUT', 30))
+    try:
+        yield session
+    finally:
+        pool.put(session)
+
+
+def sniff_content_type(first_bytes, content_type_header=''):
+    """Classify a response as 'pdf' or 'html' from its first bytes, falling back to the header."""
+    head = first_bytes[:1024].lstrip()
+    if head.startswith(b'%PDF-'):
+        return 'pdf'
+    if head[:1] == b'<':
+        return 'html'
+    if 'pdf' in (content_type_header or '').lower():
+        return 'pdf'
+    return 'html'
+
+
+def fetch_limited(url, headers=None, budgets=None, **kwargs):
+    """
+    Stream a page through the session pool and stop reading once its byte budget is spent.
+
+    The content type is sniffed from the first bytes; budgets maps 'pdf'/'html' to the
+    maximum number of bytes to read (default FETCH_MAX_PDF_BYTES / FETCH_MAX_HTML_BYTES).
+
+    Returns tuple (response, kind, content, truncated). The response body has already been
+    consumed; use content instead.
+    """
+    budgets = budgets or {
+        'pdf': setting('FETCH_MAX_PDF_BYTES', 4 * 1024 * 1024),
+        'html': setting('FETCH_MAX_HTML_BYTES', 1024 * 1024),
+    }
+    with host_slot(url):
+        with checkout_session() as session:
+            response = session.get(url, headers=headers, stream=True, **kwargs)
+            try:
+                chunks = []
+                size = 0
+                kind = None
+                truncated = False
+                for chunk in response.iter_content():
+                    if not chunk:
+                        continue
+                    if kind is None:
+                        kind = sniff_content_type(chunk, response.headers.get('content-type'))
+                    chunks.append(chunk)
+                    size += len(chunk)
+                    if size >= budgets[kind]:
+                        # Stop the transfer; the rest of the body is never downloaded
+                        truncated = True
+                        break
+                content = b''.join(chunks)
+                if truncated:
+                    content = content[:budgets[kind]]
+                return response, kind or 'html', content, truncated
+            finally:
+                response.close()
+
+
+def close_pool():
+    """Close all pooled sessions (the pool is recreated on next use)."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    while pool is not None and not pool.empty():
+        pool.get_nowait().close()
+
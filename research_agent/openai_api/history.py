@@ -0,0 +1,273 @@
+"""
+Sliding-window conversation history for conversation_chat.
+
+Instead of replaying every stored message (raw assistant JSON with full papers arrays and a
+verification note per answer), the prompt history is built from three parts:
+
+- the last CHAT_HISTORY_RECENT_TURNS turns verbatim, with verification notes
+- the older turns not summarized yet (normally up to CHAT_HISTORY_COMPACT_TURNS), assistant
+  answers shrunk to their text and the titles of the papers they recommended
+- a rolling summary of everything before that, stored on the Conversation
+
+Building the history never calls the LLM. Once an answer is saved, turns that fell out of the
+compact window are folded into the summary with one LLM call, in batches of
+CHAT_HISTORY_SUMMARY_BATCH turns, in a background thread of the serving process
+(start_summary); until that is done the next request sends the previous summary and the
+turns as compact turns. Only messages newer than Conversation.summarized_through_message_id
+are ever loaded, so the prompt size stays bounded however long the conversation gets. If the
+summary call fails, the turns are appended to the summary in condensed form instead.
+
+abuild_history() does the same for the async views (async ORM).
+"""
+
+import threading
+
+from django.conf import settings
+from django.db import connection
+
+from .models import Conversation, Verification
+from .prompt_budget import clip
+from . import openai_clients
+
+
+# Conversations whose summary is being folded by a thread of this process
+folding = set()
+folding_lock = threading.Lock()
+
+
+def setting(name, default):
+    return getattr(settings, name, default)
+
+
+def split_turns(messages):
+    """Group messages into turns, each starting at a user message."""
+    turns = []
+    for msg in messages:
+        if msg.role == 'user' or not turns:
+            turns.append([])
+        turns[-1].append(msg)
+    return turns
+
+
+def compact_assistant_content(message):
+    """Shrink a stored assistant answer to its text and the titles of its papers."""
+    text = message.text
+    titles = [str(paper.get('title') or '') for paper in message.papers]
+    if titles:
+        text += '\n[Papers recommended: ' + '; '.join(clip(title, 150) for title in titles) + ']'
+    return text
+
+
+def verification_note(verification):
+    """The verification context injected after a recent assistant answer (or None)."""
+    if not verification or not verification.textual_verification:
+        return None
+    summary = verification.summary or ''
+    suggestion = verification.textual_verification.get('next_step_suggestion', '')
+    if not (summary or suggestion):
+        return None
+    note = f"[VERIFICATION OF PREVIOUS RESPONSE: {summary}]"
+    if suggestion:
+        note += f"\n[SUGGESTED NEXT STEP: {suggestion}]"
+    return note
+
+
+def condensed_turn(turn):
+    """One line per message of a turn, for the summary prompt and its fallback."""
+    lines = []
+    for msg in turn:
+        content = msg.content if msg.role == 'user' else compact_assistant_content(msg)
+        lines.append(f"{msg.role.upper()}: {clip(' '.join(content.split()), 1500)}")
+    return "\n".join(lines)
+
+
+def summary_request(model, previous_summary, turns):
+    """Keyword arguments of the chat completion that folds turns into the rolling summary."""
+    max_chars = setting('CHAT_HISTORY_SUMMARY_MAX_CHARS', 3000)
+    new_turns = "\n\n".join(condensed_turn(turn) for turn in turns)
+    prompt = f"""Update the running summary of a research conversation with the new exchanges below.
+Keep the user's research questions and goals, key findings and conclusions, the titles of papers discussed
+(and whether they were found useful), stated preferences and open questions. Drop small talk and repetition.
+Write at most {max_chars // 6} words. Return ONLY the updated summary.
+
+CURRENT SUMMARY:
+{previous_summary or '(none yet)'}
+
+NEW EXCHANGES:
+{new_turns}"""
+
+    return {
+        'model': setting('CHAT_HISTORY_SUMMARY_MODEL', None) or model,
+        'messages': [
+            {'role': 'system', 'content': 'You maintain concise running summaries of research conversations.'},
+            {'role': 'user', 'content': prompt}
+        ],
+        'max_completion_tokens': max_chars // 3,
+    }
+
+
+def summary_text(response):
+    summary = (response.choices[0].message.content or '').strip()
+    if not summary:
+        raise ValueError('Empty summary')
+    return clip(summary, setting('CHAT_HISTORY_SUMMARY_MAX_CHARS', 3000))
+
+
+def summarize_turns(client, model, previous_summary, turns):
+    """Fold turns into the rolling summary with the LLM. Returns the new summary."""
+    return summary_text(client.chat.completions.create(**summary_request(model, previous_summary, turns)))
+
+
+def fallback_summary(previous_summary, turns):
+    """Append condensed turns to the summary without the LLM, keeping its newest part."""
+    max_chars = setting('CHAT_HISTORY_SUMMARY_MAX_CHARS', 3000)
+    lines = [previous_summary] if previous_summary else []
+    for turn in turns:
+        lines.extend(clip(line, 200) for line in condensed_turn(turn).split("\n"))
+    summary = "\n".join(lines)
+    if len(summary) > max_chars:
+        summary = '...' + summary[-max_chars:]
+    return summary
+
+
+def turns_to_fold(turns):
+    """Split turns into (turns to fold into the summary, turns still to be included in the prompt)."""
+    keep = setting('CHAT_HISTORY_RECENT_TURNS', 4) + setting('CHAT_HISTORY_COMPACT_TURNS', 8)
+    overflow = len(turns) - keep
+    if overflow < setting('CHAT_HISTORY_SUMMARY_BATCH', 4):
+        return [], turns
+    return turns[:overflow], turns[overflow:]
+
+
+def fold_summary(conversation_id, model):
+    """
+    Fold turns that left the compact window into the conversation's history_summary.
+
+    Returns the number of turns folded.
+    """
+    conversation = Conversation.objects.select_related('user__profile').get(pk=conversation_id)
+    folded, _ = turns_to_fold(split_turns(unsummarized_messages(conversation)))
+    if not folded:
+        return 0
+
+    try:
+        client = openai_clients.get_client(conversation.user.profile.openai_api_key)
+        summary = summarize_turns(client, model, conversation.history_summary, folded)
+    except Exception as e:
+        print(f"[History] Summary update failed, condensing turns instead: {e}")
+        summary = fallback_summary(conversation.history_summary, folded)
+    # Only if no other request folded these turns meanwhile; update(): folding history is
+    # not activity, so updated_at is left alone
+    if not Conversation.objects.filter(
+        pk=conversation_id, summarized_through_message_id=conversation.summarized_through_message_id
+    ).update(history_summary=summary, summarized_through_message_id=folded[-1][-1].id):
+        return 0
+    print(f"[History] Folded {len(folded)} turn(s) into the summary of conversation {conversation_id}")
+    return len(folded)
+
+
+def fold_in_background(conversation_id, model):
+    try:
+        fold_summary(conversation_id, model)
+    except Exception as e:
+        # The turns stay in the prompt as compact turns; the next answer tries again
+        print(f"[History] Background summary of conversation {conversation_id} failed: {e}")
+    finally:
+        with folding_lock:
+            folding.discard(conversation_id)
+        connection.close()
+
+
+def start_summary(conversation_id, model):
+    """Fold the turns due for the summary in a background thread (see fold_summary)."""
+    with folding_lock:
+        # A fold of this conversation is still running: it takes the new turns into account next time
+        if conversation_id in folding:
+            return
+        folding.add(conversation_id)
+    threading.Thread(target=fold_in_background, args=(conversation_id, model), daemon=True).start()
+
+
+def pending_turns(conversation):
+    """Query of the user messages not summarized yet (one per turn)."""
+    return conversation.messages.filter(id__gt=conversation.summarized_through_message_id, role='user')
+
+
+def summary_due(turn_count):
+    """True if a conversation with turn_count unsummarized turns has a batch to fold."""
+    keep = setting('CHAT_HISTORY_RECENT_TURNS', 4) + setting('CHAT_HISTORY_COMPACT_TURNS', 8)
+    return turn_count - keep >= setting('CHAT_HISTORY_SUMMARY_BATCH', 4)
+
+
+def unsummarized_messages(conversation):
+    return (
+        conversation.messages
+        .filter(id__gt=conversation.summarized_through_message_id)
+        .order_by('created_at', 'id')
+    )
+
+
+def latest_verifications(message_ids):
+    # Verification notes only for the recent answers, fetched in one query
+    return Verification.objects.filter(message_id__in=message_ids).order_by('-created_at')
+
+
+def recent_split(turns):
+    """Split the remaining turns into (compact turns, recent turns)."""
+    recent_count = max(1, setting('CHAT_HISTORY_RECENT_TURNS', 4))
+    return turns[:-recent_count], turns[-recent_count:]
+
+
+def assemble_history(conversation, system_prompt, compact, recent, verifications):
+    """The messages list from the summary, compact turns and recent turns (no I/O)."""
+    history = [{'role': 'system', 'content': system_prompt}]
+    if conversation.history_summary:
+        history.append({'role': 'system', 'content': f"[SUMMARY OF EARLIER CONVERSATION: {conversation.history_summary}]"})
+
+    for turn in compact:
+        for msg in turn:
+            content = msg.content if msg.role == 'user' else compact_assistant_content(msg)
+            history.append({'role': msg.role, 'content': content})
+
+    for turn in recent:
+        for msg in turn:
+            history.append({'role': msg.role, 'content': msg.content})
+            if msg.role == 'assistant':
+                note = verification_note(verifications.get(msg.id))
+                if note:
+                    history.append({'role': 'system', 'content': note})
+    return history
+
+
+def recent_assistant_ids(recent):
+    return [msg.id for turn in recent for msg in turn if msg.role == 'assistant']
+
+
+def build_history(conversation, system_prompt):
+    """
+    Build the message list for the next chat request of a conversation.
+
+    The user message of this turn must already be saved. Returns the messages list
+    (system prompt, summary, compact turns, recent turns).
+    """
+    compact, recent = recent_split(split_turns(unsummarized_messages(conversation)))
+
+    verifications = {}
+    assistant_ids = recent_assistant_ids(recent)
+    if assistant_ids:
+        for verification in latest_verifications(assistant_ids):
+            verifications.setdefault(verification.message_id, verification)
+    return assemble_history(conversation, system_prompt, compact, recent, verifications)
+
+
+async def abuild_history(conversation, system_prompt):
+    """build_history with the async ORM."""
+    messages = [msg async for msg in unsummarized_messages(conversation)]
+    compact, recent = recent_split(split_turns(messages))
+
+    verifications = {}
+    assistant_ids = recent_assistant_ids(recent)
+    if assistant_ids:
+        async for verification in latest_verifications(assistant_ids):
+            verifications.setdefault(verification.message_id, verification)
+    return assemble_history(conversation, system_prompt, compact, recent, verifications)
@@ -0,0 +1,301 @@
+"""
+Persistent on-disk cache for paper page fetches.
+
+Stores the *extracted* result of fetch_paper_content (not the raw page) keyed by canonical
+URL, one JSON file per entry in HTTP_CACHE_DIR. Entries are:
+- fresh until their TTL (Cache-Control max-age, else HTTP_CACHE_DEFAULT_TTL) expires
+- revalidated afterwards with If-None-Match / If-Modified-Since when the server sent validators
+- negatively cached for HTTP_CACHE_NEGATIVE_TTL when the server answered 4xx/5xx
+
+The cache is bounded to HTTP_CACHE_MAX_BYTES; least recently used entries (by file mtime,
+touched with os.utime on every hit) are evicted first. A hit never rewrites its entry, and a
+store does not list the directory: each process keeps a running total of the cache size (from
+one scan, plus the bytes it writes) and only evicts once that exceeds the limit, rescanning
+every HTTP_CACHE_RESCAN_INTERVAL seconds to pick up the other processes' writes.
+
+Each entry counts its own hits, full fetches and revalidations so that stats() works across
+processes (see the http_cache_stats command). Hits are tallied in memory and added to the
+entry every HTTP_CACHE_HIT_FLUSH hits or when it is next written.
+"""
+
+from email.utils import parsedate_to_datetime
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+
+from .identifiers import canonical_url
+
+# Running total of the cache size in bytes (None until the first scan) and when it was scanned
+tracked_bytes = None
+scanned_at = 0.0
+# Hits not yet written to their entries, by entry path
+pending_hits = {}
+lock = threading.Lock()
+
+
+def setting(name, default):
+    return getattr(settings, name, default)
+
+
+def cache_dir():
+    path = getattr(settings, 'HTTP_CACHE_DIR', settings.BASE_DIR / 'http_cache')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def entry_path(url):
+    key = canonical_url(url) or url
+    return os.path.join(cache_dir(), hashlib.sha256(key.encode('utf-8')).hexdigest() + '.json')
+
+
+def read_entry(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_entry(path, entry):
+    """Write atomically so concurrent readers never see a partial file."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def parse_ttl(headers, default_ttl):
+    """TTL from Cache-Control max-age or Expires; None if the response must not be stored."""
+    cache_control = (headers.get('cache-control') or '').lower()
+    if 'no-store' in cache_control:
+        return None
+    match = re.search(r'max-age=(\d+)', cache_control)
+    if match:
+        return int(match.group(1))
+    expires = headers.get('expires')
+    if expires:
+        try:
+            return max(0, int(parsedate_to_datetime(expires).timestamp() - time.time()))
+        except (TypeError, ValueError):
+            pass
+    return default_ttl
+
+
+def lookup(url):
+    """
+    Look up a cached fetch result.
+
+    Returns tuple (result, entry):
+    - (result, entry) for a fresh entry: use the result directly (counted as a hit)
+    - (None, entry) for an expired entry with validators: revalidate with conditional_headers(entry)
+    - (None, None) on a miss
+    """
+    path = entry_path(url)
+    entry = read_entry(path)
+    if not entry:
+        return None, None
+
+    if entry['expires_at'] > time.time():
+        try:
+            os.utime(path)  # LRU order
+        except OSError:
+            pass
+        count_hit(path)
+        return entry['result'], entry
+
+    if entry.get('etag') or entry.get('last_modified'):
+        return None, entry
+    return None, None
+
+
+def count_hit(path):
+    """Tally a hit, writing the tally to the entry every HTTP_CACHE_HIT_FLUSH hits."""
+    with lock:
+        pending_hits[path] = pending_hits.get(path, 0) + 1
+        if pending_hits[path] < setting('HTTP_CACHE_HIT_FLUSH', 20):
+            return
+        hits = pending_hits.pop(path)
+    entry = read_entry(path)
+    if not entry:
+        return
+    entry['hits'] = entry.get('hits', 0) + hits
+    try:
+        write_entry(path, entry)
+    except OSError:
+        pass
+
+
+def take_pending_hits(path):
+    with lock:
+        return pending_hits.pop(path, 0)
+
+
+def file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def conditional_headers(entry):
+    """Request headers to revalidate an expired entry."""
+    headers = {}
+    if entry and entry.get('etag'):
+        headers['If-None-Match'] = entry['etag']
+    if entry and entry.get('last_modified'):
+        headers['If-Modified-Since'] = entry['last_modified']
+    return headers
+
+
+def revalidated(url, entry, headers):
+    """Extend an entry after a 304 Not Modified response and return its result."""
+    ttl = parse_ttl(headers, getattr(settings, 'HTTP_CACHE_DEFAULT_TTL', 60 * 60 * 24))
+    entry['expires_at'] = time.time() + (ttl or 0)
+    entry['etag'] = headers.get('etag') or entry.get('etag')
+    entry['last_modified'] = headers.get('last-modified') or entry.get('last_modified')
+    entry['revalidations'] = entry.get('revalidations', 0) + 1
+    path = entry_path(url)
+    entry['hits'] = entry.get('hits', 0) + take_pending_hits(path)
+    try:
+        write_entry(path, entry)
+    except OSError as e:
+        print(f"[HTTP Cache] Write failed: {e}")
+    return entry['result']
+
+
+def store(url, status_code, headers, result):
+    """
+    Store a fetch result.
+
+    Successful responses are kept for their TTL, 4xx/5xx responses for HTTP_CACHE_NEGATIVE_TTL.
+    """
+    if status_code >= 400:
+        ttl = getattr(settings, 'HTTP_CACHE_NEGATIVE_TTL', 60 * 10)
+        etag = last_modified = None
+    else:
+        ttl = parse_ttl(headers, getattr(settings, 'HTTP_CACHE_DEFAULT_TTL', 60 * 60 * 24))
+        etag = headers.get('etag')
+        last_modified = headers.get('last-modified')
+    if ttl is None:
+        return
+
+    path = entry_path(url)
+    previous = read_entry(path) or {}
+    entry = {
+        'url': url,
+        'status_code': status_code,
+        'etag': etag,
+        'last_modified': last_modified,
+        'stored_at': time.time(),
+        'expires_at': time.time() + ttl,
+        'result': result,
+        'hits': previous.get('hits', 0) + take_pending_hits(path),
+        'fetches': previous.get('fetches', 0) + 1,
+        'revalidations': previous.get('revalidations', 0),
+    }
+    previous_size = file_size(path)
+    try:
+        write_entry(path, entry)
+        grew(file_size(path) - previous_size)
+    except OSError as e:
+        print(f"[HTTP Cache] Write failed: {e}")
+
+
+def grew(added_bytes):
+    """Add to the running size total; evict once it exceeds HTTP_CACHE_MAX_BYTES."""
+    global tracked_bytes
+    with lock:
+        rescan = tracked_bytes is None or time.time() - scanned_at > setting('HTTP_CACHE_RESCAN_INTERVAL', 300)
+        if not rescan:
+            tracked_bytes += added_bytes
+            if tracked_bytes <= setting('HTTP_CACHE_MAX_BYTES', 100 * 1024 * 1024):
+                return
+    evict()
+
+
+def scan():
+    """List (path, size, mtime) of all cache entries."""
+    entries = []
+    with os.scandir(cache_dir()) as it:
+        for item in it:
+            if item.name.endswith('.json'):
+                stat = item.stat()
+                entries.append((item.path, stat.st_size, stat.st_mtime))
+    return entries
+
+
+def evict():
+    """
+    Delete least recently used entries until the cache fits in HTTP_CACHE_MAX_BYTES.
+
+    Resets the running size total to the size of what is left.
+    """
+    global tracked_bytes, scanned_at
+    max_bytes = setting('HTTP_CACHE_MAX_BYTES', 100 * 1024 * 1024)
+    entries = scan()
+    total = sum(size for _, size, _ in entries)
+
+    evicted = 0
+    if total > max_bytes:
+        for path, size, _ in sorted(entries, key=lambda e: e[2]):
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                evicted += 1
+            except OSError:
+                pass
+    with lock:
+        tracked_bytes, scanned_at = total, time.time()
+    return evicted
+
+
+def clear():
+    """Delete all cache entries. Returns the number of removed entries."""
+    global tracked_bytes
+    with lock:
+        tracked_bytes = None
+        pending_hits.clear()
+    removed = 0
+    for path, _, _ in scan():
+        try:
+            os.remove(path)
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+def stats():
+    """Size and hit statistics summed over all current entries."""
+    now = time.time()
+    totals = {'entries': 0, 'bytes': 0, 'fresh': 0, 'negative': 0, 'hits': 0, 'fetches': 0, 'revalidations': 0}
+    for path, size, _ in scan():
+        entry = read_entry(path)
+        if not entry:
+            continue
+        totals['entries'] += 1
+        totals['bytes'] += size
+        totals['fresh'] += entry['expires_at'] > now
+        totals['negative'] += entry['status_code'] >= 400
+        for key in ('hits', 'fetches', 'revalidations'):
+            totals[key] += entry.get(key, 0)
+        # This process's hits not written yet (other processes' show up once flushed)
+        totals['hits'] += pending_hits.get(path, 0)
+    requests = totals['hits'] + totals['fetches'] + totals['revalidations']
+    # Revalidations avoid the download but still cost a round trip, so they don't count as hits
+    totals['hit_ratio'] = round(totals['hits'] / requests, 3) if requests else None
+    totals['max_bytes'] = setting('HTTP_CACHE_MAX_BYTES', 100 * 1024 * 1024)
+    return totals
@@ -0,0 +1,102 @@
+"""
+Paper identifier normalization.
+
+Papers returned by the assistant point to the same work through many URL variants
+(arxiv.org/abs/X, arxiv.org/pdf/Xv2, doi.org/..., publisher pages embedding the DOI).
+These helpers reduce a link to a canonical identifier so verifications can be shared.
+"""
+
+import re
+from urllib.parse import urlparse, parse_qsl, urlencode, unquote
+
+DOI_PATTERN = re.compile(r'(10\.\d{4,9}/[^\s?#"<>]+)', re.IGNORECASE)
+ARXIV_NEW_ID = re.compile(r'(\d{4}\.\d{4,5})(?:v\d+)?', re.IGNORECASE)
+ARXIV_OLD_ID = re.compile(r'([a-z\-]+(?:\.[a-z]{2})?/\d{7})(?:v\d+)?', re.IGNORECASE)
+ARXIV_DOI_PREFIX = '10.48550/arxiv.'
+
+# Query parameters that never change the referenced document
+TRACKING_PARAMS = {'utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content', 'ref', 'source', 'via'}
+
+
+def normalize_arxiv_id(value):
+    """Return the version-less arXiv id contained in value, or None."""
+    if not value:
+        return None
+    match = ARXIV_NEW_ID.search(value) or ARXIV_OLD_ID.search(value)
+    return match.group(1).lower() if match else None
+
+
+def extract_arxiv_id(link):
+    """Extract the arXiv id from arxiv.org links (abs, pdf, html) and arXiv DOIs."""
+    if not link:
+        return None
+    parsed = urlparse(link.strip())
+    host = parsed.netloc.lower()
+    if host.endswith('arxiv.org'):
+        path = re.sub(r'^/(abs|pdf|html|format)/', '', parsed.path)
+        path = re.sub(r'\.pdf$', '', path)
+        return normalize_arxiv_id(path)
+    doi = extract_doi(link, allow_arxiv=True)
+    if doi and doi.startswith(ARXIV_DOI_PREFIX):
+        return normalize_arxiv_id(doi[len(ARXIV_DOI_PREFIX):])
+    return None
+
+
+def normalize_doi(value):
+    """Return the lowercase bare DOI contained in value (doi.org URL, doi: prefix or plain), or None."""
+    if not value:
+        return None
+    match = DOI_PATTERN.search(unquote(value))
+    if not match:
+        return None
+    doi = match.group(1).rstrip('.,;)')
+    doi = re.sub(r'(\.pdf|/pdf|/full|/abstract|/epdf)$', '', doi, flags=re.IGNORECASE)
+    return doi.lower()
+
+
+def extract_doi(link, allow_arxiv=False):
+    """Extract a DOI from doi.org links or publisher URLs that embed it (ACM, Wiley, Springer, ...)."""
+    if not link:
+        return None
+    doi = normalize_doi(link)
+    if doi and not allow_arxiv and doi.startswith(ARXIV_DOI_PREFIX):
+        return None
+    return doi
+
+
+def canonical_url(link):
+    """Normalize a URL: lowercase host without www, no fragment, tracking params or trailing slash."""
+    if not link:
+        return None
+    parsed = urlparse(link.strip())
+    if not parsed.netloc:
+        return None
+    host = parsed.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    path = parsed.path.rstrip('/') or '/'
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS
+    ))
+    return f"{host}{path}" + (f"?{query}" if query else '')
+
+
+def paper_identifier(link):
+    """
+    Canonical identifier for a paper link.
+
+    Returns tuple (identifier_type, identifier) where identifier is prefixed with its type,
+    e.g. ('arxiv', 'arxiv:1706.03762'), ('doi', 'doi:10.1145/3292500.3330701'),
+    ('url', 'url:nature.com/articles/nature14539'), or (None, None) without a usable link.
+    """
+    arxiv_id = extract_arxiv_id(link)
+    if arxiv_id:
+        return 'arxiv', f'arxiv:{arxiv_id}'
+    doi = extract_doi(link)
+    if doi:
+        return 'doi', f'doi:{doi}'
+    url = canonical_url(link)
+    if url:
+        return 'url', f'url:{url}'
+    return None, None
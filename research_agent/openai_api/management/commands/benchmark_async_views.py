@@ -0,0 +1,138 @@
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import json
+import statistics
+import threading
+import time
+import uuid
+from types import ModuleType
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client
+from django.urls import clear_url_caches, path
+
+from openai_api import views, views_async
+from openai_api.models import Conversation, Paper, Project
+from .openai_standin_server import standin_server
+
+ENDPOINTS = ('conversation_chat', 'chat', 'paper_generate_bibtex')
+
+
+def urlconf(module):
+    """A URLconf serving the LLM-bound endpoints of views or views_async."""
+    conf = ModuleType(f'{module.__name__}_benchmark_urls')
+    conf.urlpatterns = [
+        path('api/chat/', module.chat),
+        path('api/conversations/<int:pk>/chat/', module.conversation_chat),
+        path('api/papers/<int:pk>/generate-bibtex/', module.paper_generate_bibtex),
+    ]
+    return conf
+
+
+class Command(BaseCommand):
+    help = ('Load test the sync (thread-per-request) and async implementations of an LLM-bound endpoint '
+            'against the local OpenAI stand-in with simulated model latency.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoint', choices=ENDPOINTS, default='conversation_chat')
+        parser.add_argument('--requests', type=int, default=100, help='Concurrent requests per run')
+        parser.add_argument('--threads', type=int, default=8, help='Worker threads of the sync (WSGI) server')
+        parser.add_argument('--latency', type=float, default=1.0, help='Simulated model latency in seconds')
+
+    def handle(self, *args, **options):
+        server = standin_server(0, latency=options['latency'])
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        settings.OPENAI_BASE_URL = f'http://127.0.0.1:{server.server_address[1]}/v1'
+        # Papers without resolvable metadata: every BibTeX request takes the LLM path, no OpenAlex requests
+        settings.BIBTEX_OPENALEX_LOOKUP = False
+
+        user = User.objects.create_user(f'loadtest-{uuid.uuid4().hex[:12]}')
+        user.profile.openai_api_key = 'sk-loadtest'
+        user.profile.save()
+        original_urlconf = settings.ROOT_URLCONF
+        try:
+            targets = self.create_targets(user, options['endpoint'], options['requests'])
+            body = json.dumps({'message': 'Find papers on retrieval-augmented generation', 'web_search': False})
+            self.stdout.write(
+                f"{options['requests']} concurrent {options['endpoint']} requests, {options['latency']:.1f}s model latency, "
+                f"{options['threads']} sync worker threads"
+            )
+
+            for label, module, run in (('sync', views, self.run_sync), ('async', views_async, self.run_async)):
+                settings.ROOT_URLCONF = urlconf(module)
+                clear_url_caches()
+                server.peak_in_flight = 0
+                started = time.perf_counter()
+                results = run(user, targets, body, options['threads'])
+                elapsed = time.perf_counter() - started
+                self.report(label, results, elapsed, server.peak_in_flight)
+        finally:
+            settings.ROOT_URLCONF = original_urlconf
+            clear_url_caches()
+            user.delete()
+            server.shutdown()
+            server.server_close()
+
+    def create_targets(self, user, endpoint, count):
+        """URLs of the requests, one conversation or paper per request."""
+        project = Project.objects.create(user=user, name='Load test')
+        if endpoint == 'chat':
+            return ['/api/chat/'] * count
+        if endpoint == 'conversation_chat':
+            # Titled conversations: one model call per request, no title generation
+            conversations = Conversation.objects.bulk_create([
+                Conversation(user=user, project=project, title='Load test') for _ in range(count)
+            ])
+            return [f'/api/conversations/{c.pk}/chat/' for c in conversations]
+        papers = Paper.objects.bulk_create([
+            Paper(user=user, project=project, title=f'Paper {i}', authors='Doe, J.', date='2024') for i in range(count)
+        ])
+        return [f'/api/papers/{p.pk}/generate-bibtex/' for p in papers]
+
+    def run_sync(self, user, targets, body, threads):
+        """Requests through the WSGI handler, at most `threads` at a time."""
+        local = threading.local()
+        clients = []
+
+        def send(url):
+            if not hasattr(local, 'client'):
+                local.client = Client()
+                local.client.force_login(user)
+                clients.append(local.client)
+            started = time.perf_counter()
+            response = local.client.post(url, body, content_type='application/json')
+            return response.status_code, time.perf_counter() - started
+
+        with ThreadPoolExecutor(threads) as executor:
+            results = list(executor.map(send, targets))
+        for client in clients:
+            client.logout()
+        return results
+
+    def run_async(self, user, targets, body, threads):
+        """All requests at once through the ASGI handler."""
+        async def send(client, url):
+            started = time.perf_counter()
+            response = await client.post(url, body, content_type='application/json')
+            return response.status_code, time.perf_counter() - started
+
+        async def run():
+            client = AsyncClient()
+            await client.aforce_login(user)
+            results = await asyncio.gather(*(send(client, url) for url in targets))
+            await client.alogout()
+            return results
+
+        return asyncio.run(run())
+
+    def report(self, label, results, elapsed, peak_in_flight):
+        durations = sorted(duration for _, duration in results)
+        errors = sum(1 for status, _ in results if status != 200)
+        p95 = durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+        self.stdout.write(
+            f"{label:>6}: {elapsed:6.2f}s  {len(results) / elapsed:6.1f} req/s  "
+            f"peak {peak_in_flight:4d} model calls in flight  "
+            f"median {statistics.median(durations):5.2f}s  p95 {p95:5.2f}s  errors {errors}"
+        )
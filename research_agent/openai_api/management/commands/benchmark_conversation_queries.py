@@ -0,0 +1,122 @@
+import json
+import time
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from openai_api import serializers
+from openai_api.models import (
+    Conversation, Message, PaperVerification, PaperVerificationCache, Project, Verification,
+)
+
+# Most queries a request may take, whatever the number of conversations or messages
+# (session and user lookups included)
+QUERY_BUDGETS = {
+    'conversation_list': 4,
+    'conversation_detail': 6,
+}
+
+
+class Command(BaseCommand):
+    help = ('Seed a project with many conversations and a long verified conversation, then check that '
+            'conversation_list and conversation_detail take a constant number of queries (QUERY_BUDGETS) '
+            'and compare them with loading the related rows per conversation or message.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--conversations', type=int, default=1000, help='Conversations of the large project')
+        parser.add_argument('--messages', type=int, default=400, help='Messages of the long conversation')
+        parser.add_argument('--papers', type=int, default=5, help='Verified papers per assistant message')
+
+    def handle(self, *args, **options):
+        user = User.objects.create_user(f'querytest-{uuid.uuid4().hex[:12]}')
+        identifier = f'benchmark:{uuid.uuid4().hex[:12]}'
+        try:
+            started = time.perf_counter()
+            small_project, small_conversation = self.seed(user, identifier, 1, 2, options['papers'])
+            large_project, large_conversation = self.seed(
+                user, identifier, options['conversations'], options['messages'], options['papers']
+            )
+            self.stdout.write(f"Seeded in {time.perf_counter() - started:.1f}s")
+
+            client = Client()
+            client.force_login(user)
+            failures = []
+            for endpoint, small_url, large_url, naive in (
+                ('conversation_list',
+                 f'/api/conversations/?project_id={small_project.id}', f'/api/conversations/?project_id={large_project.id}',
+                 # The previous listing: last message loaded per conversation
+                 lambda: [c.messages.last().content[:50] if c.messages.exists() else '' for c in large_project.conversations.all()]),
+                ('conversation_detail',
+                 f'/api/conversations/{small_conversation.id}/', f'/api/conversations/{large_conversation.id}/',
+                 lambda: [serializers.serialize_message(m) for m in large_conversation.messages.all()]),
+            ):
+                small_queries, _, _ = self.measure(lambda: client.get(small_url))
+                large_queries, elapsed, response = self.measure(lambda: client.get(large_url))
+                naive_queries, naive_elapsed, _ = self.measure(naive)
+                self.stdout.write(
+                    f"{endpoint:>20}: {small_queries} queries small, {large_queries} queries large "
+                    f"({elapsed * 1000:.0f}ms, {len(response.content) / 1024:.0f} KiB)  "
+                    f"per-row loading {naive_queries} queries ({naive_elapsed * 1000:.0f}ms)"
+                )
+                if response.status_code != 200:
+                    failures.append(f"{endpoint} returned {response.status_code}")
+                if large_queries != small_queries:
+                    failures.append(f"{endpoint} query count grows with size ({small_queries} -> {large_queries})")
+                if large_queries > QUERY_BUDGETS[endpoint]:
+                    failures.append(f"{endpoint} takes {large_queries} queries, budget {QUERY_BUDGETS[endpoint]}")
+            client.logout()
+        finally:
+            user.delete()
+            PaperVerificationCache.objects.filter(identifier__startswith=identifier).delete()
+
+        if failures:
+            raise CommandError('; '.join(failures))
+        self.stdout.write(self.style.SUCCESS('Query counts are within budget and independent of size'))
+
+    def seed(self, user, identifier, conversation_count, message_count, paper_count):
+        """A project of conversation_count conversations; the first has message_count messages, the others 2."""
+        project = Project.objects.create(user=user, name='Query benchmark')
+        # bulk_create() skips Message.save(): the summary fields are set here (no recommended paper rows)
+        conversations = Conversation.objects.bulk_create([
+            Conversation(user=user, project=project, title=f'Conversation {i}', preview='Here are some papers.',
+                         message_count=message_count if i == 0 else 2)
+            for i in range(conversation_count)
+        ])
+        payload = {'text': 'Here are some papers.', 'papers': [{'title': f'Paper {i}'} for i in range(paper_count)]}
+        messages = Message.objects.bulk_create([
+            Message(conversation=conversation, role='user' if i % 2 == 0 else 'assistant',
+                    content='Find papers' if i % 2 == 0 else json.dumps(payload),
+                    payload=None if i % 2 == 0 else payload)
+            for conversation in conversations
+            for i in range(message_count if conversation is conversations[0] else 2)
+        ])
+
+        now = timezone.now()
+        cache_entry = PaperVerificationCache.objects.create(
+            identifier=f'{identifier}:{project.id}', identifier_type='url', verified_at=now, last_used_at=now,
+            openalex_metadata={'success': True}, content_fetch={'success': True},
+        )
+        verifications = Verification.objects.bulk_create([
+            Verification(message=message, confidence_score=80.0, textual_verification={}, summary='Verified.')
+            for message in messages if message.role == 'assistant' and message.conversation_id == conversations[0].id
+        ])
+        PaperVerification.objects.bulk_create([
+            PaperVerification(verification=verification, paper_index=i, title=f'Paper {i}',
+                              cache_entry=cache_entry if i % 2 else None)
+            for verification in verifications
+            for i in range(paper_count)
+        ])
+        return project, conversations[0]
+
+    def measure(self, call):
+        """(queries, seconds, result) of a call."""
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            result = call()
+            elapsed = time.perf_counter() - started
+        return len(queries), elapsed, result
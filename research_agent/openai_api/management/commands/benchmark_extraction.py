@@ -0,0 +1,61 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from openai_api import extraction
+
+
+def synthetic_page(i):
+    """A publisher-like page: metadata headers, navigation boilerplate and a long abstract/body."""
+    paragraphs = ''.join(
+        f'<p>Section {j} of paper {i}. ' + 'We evaluate transformer models on retrieval benchmarks and report results. ' * 20 + '</p>'
+        for j in range(40)
+    )
+    nav = ''.join(f'<li><a href="/journal/{j}">Journal link {j}</a></li>' for j in range(200))
+    return f"""<html><head><title>Paper {i}: A Study of Benchmarks</title>
+<meta name="citation_title" content="Paper {i}: A Study of Benchmarks">
+<meta name="citation_author" content="Doe, Jane"><meta name="citation_author" content="Smith, John">
+<meta name="citation_publication_date" content="2023/05/01"></head>
+<body><nav><ul>{nav}</ul></nav><article><h1>Paper {i}</h1>{paragraphs}</article>
+<footer>{nav}</footer></body></html>"""
+
+
+class Command(BaseCommand):
+    help = 'Compare in-thread and process-pool HTML extraction throughput on a corpus of saved pages.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('corpus', nargs='?', help='Directory of saved .html pages (default: synthetic pages)')
+        parser.add_argument('--documents', type=int, default=40, help='Number of documents to extract per run')
+        parser.add_argument('--threads', type=int, default=5, help='Concurrent callers (like parallel paper verifications)')
+        parser.add_argument('--metadata-only', action='store_true', help='Benchmark the metadata-only mode')
+
+    def handle(self, *args, **options):
+        if options['corpus']:
+            paths = sorted(Path(options['corpus']).glob('*.htm*'))
+            if not paths:
+                raise CommandError(f"No .html files in {options['corpus']}")
+            corpus = [path.read_text(encoding='utf-8', errors='replace') for path in paths]
+        else:
+            corpus = [synthetic_page(i) for i in range(10)]
+
+        documents = [corpus[i % len(corpus)] for i in range(options['documents'])]
+        size = sum(len(d) for d in documents) / len(documents) / 1024
+        self.stdout.write(
+            f"{len(documents)} documents (avg {size:.0f} KiB), {options['threads']} concurrent callers, "
+            f"{getattr(settings, 'EXTRACTION_WORKERS', 2)} pool workers"
+        )
+
+        # Warm up: spawn pool workers and import trafilatura outside the measurement
+        settings.EXTRACTION_USE_PROCESS_POOL = True
+        list(ThreadPoolExecutor(options['threads']).map(lambda d: extraction.extract(d), corpus[:options['threads']]))
+
+        for label, use_pool in (('in-thread', False), ('process pool', True)):
+            settings.EXTRACTION_USE_PROCESS_POOL = use_pool
+            started = time.perf_counter()
+            with ThreadPoolExecutor(options['threads']) as executor:
+                list(executor.map(lambda d: extraction.extract(d, metadata_only=options['metadata_only']), documents))
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"{label:>14}: {elapsed:6.2f}s  {len(documents) / elapsed:6.1f} docs/s")
@@ -0,0 +1,155 @@
+import statistics
+import time
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from openai_api import system_prompts
+from openai_api.models import Paper, Project
+from openai_api.prompt_budget import estimate_tokens
+
+# Per-request options of the turns whose prompts are compared (verbosity, thinking level, role, knowledge, filters)
+VARIANTS = [
+    ('normal', 'medium', '', '', None),
+    ('detailed', 'high', 'PhD student', '', None),
+    ('minimal', 'low', '', 'undergraduate statistics', {'yearStart': '2020'}),
+    ('normal', 'medium', '', '', {'domain': 'information retrieval', 'authors': 'Lewis'}),
+]
+
+# Topics of the generated papers: (title words, summary words, user message about the topic)
+TOPICS = [
+    ('Retrieval-augmented generation', 'retrieval passages dense index generation',
+     'Which retrieval-augmented generation papers use a dense passage index?'),
+    ('Protein structure prediction', 'protein folding structure alignment residues',
+     'What is known about protein folding and structure prediction?'),
+    ('Graph neural networks', 'graph message passing node embeddings',
+     'Find work on message passing in graph neural networks'),
+    ('Climate model downscaling', 'climate precipitation downscaling regional simulations',
+     'How is regional climate downscaling of precipitation done?'),
+    ('Reinforcement learning from human feedback', 'reward model preference policy optimization',
+     'Papers on reward models and preference optimization'),
+]
+
+
+def legacy_prompt(verbosity, thinking_level, user_role, user_knowledge, filters, papers_block):
+    """The prompt in the previous layout: options and constraints before the papers list."""
+    prompt = system_prompts.RESEARCH_SYSTEM_PROMPT
+    prompt += ''.join(
+        f"\n{line}" for line in system_prompts.response_preferences(verbosity, thinking_level, user_role, user_knowledge)
+    )
+    constraints = system_prompts.search_constraints(filters)
+    if constraints:
+        prompt += "\n\n## Search Constraints\nThe user has specified the following strict constraints for the papers you find. You MUST respect these filters:\n"
+        prompt += ''.join(f"- {c}\n" for c in constraints)
+    return prompt + papers_block
+
+
+def common_prefix(prompts):
+    first, last = min(prompts), max(prompts)
+    for i, (a, b) in enumerate(zip(first, last)):
+        if a != b:
+            return i
+    return len(first)
+
+
+class Command(BaseCommand):
+    help = ('Benchmark system prompt assembly for projects of 10, 100 and 1000 context papers: uncached '
+            'rendering per turn against the per-project cached papers block (relevance-ranked beyond '
+            'the token budget), and the stable prompt prefix.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000], help='Context papers per project')
+        parser.add_argument('--turns', type=int, default=50, help='Prompts built per measurement')
+
+    def handle(self, *args, **options):
+        user = User.objects.create_user(f'prompttest-{uuid.uuid4().hex[:12]}')
+        try:
+            self.stdout.write(
+                f"{options['turns']} prompts per measurement, times are medians per prompt; "
+                f"context budget {system_prompts.setting('CONTEXT_PAPERS_TOKEN_BUDGET', 6000)} tokens"
+            )
+            for size in options['sizes']:
+                self.run(user, size, options['turns'])
+        finally:
+            user.delete()
+            system_prompts.clear()
+
+    def create_project(self, user, size):
+        project = Project.objects.create(user=user, name=f'Prompt benchmark {size}')
+        Paper.objects.bulk_create([
+            Paper(
+                user=user, project=project, title=f'{TOPICS[i % len(TOPICS)][0]} study {i}',
+                authors='Lewis, P., Perez, E., Piktus, A., et al.', date='2020',
+                link=f'https://arxiv.org/abs/2005.{i:05d}',
+                summary=f'We explore {TOPICS[i % len(TOPICS)][1]} with a general-purpose fine-tuning recipe '
+                        'and evaluate it on several benchmarks against strong baselines.',
+            )
+            for i in range(size)
+        ])
+        return project
+
+    def measure(self, turns, build):
+        """(median seconds, queries per prompt) of building `turns` prompts."""
+        durations = []
+        with CaptureQueriesContext(connection) as queries:
+            for turn in range(turns):
+                started = time.perf_counter()
+                build(turn)
+                durations.append(time.perf_counter() - started)
+        return statistics.median(durations), len(queries) / turns
+
+    def run(self, user, size, turns):
+        project = self.create_project(user, size)
+        system_prompts.clear()
+
+        def uncached(turn):
+            # What every turn did before: query and render all context papers
+            verbosity, thinking_level, user_role, user_knowledge, filters = VARIANTS[turn % len(VARIANTS)]
+            entries = [system_prompts.render_paper(paper) for paper in system_prompts.context_papers(project)]
+            return system_prompts.build_system_prompt(
+                verbosity, thinking_level, user_role, user_knowledge, None,
+                system_prompts.render_context_block(entries), filters
+            )
+
+        def cached(turn):
+            verbosity, thinking_level, user_role, user_knowledge, filters = VARIANTS[turn % len(VARIANTS)]
+            block = system_prompts.context_block(project, TOPICS[turn % len(TOPICS)][2])
+            return system_prompts.build_system_prompt(verbosity, thinking_level, user_role, user_knowledge, None, block, filters)
+
+        uncached_time, uncached_queries = self.measure(turns, uncached)
+        miss_time, _ = self.measure(1, cached)
+        hit_time, hit_queries = self.measure(turns, cached)
+
+        # A new paper bumps the project's version: the next prompt renders the block again
+        # (only the new paper needs a term vector)
+        Paper.objects.create(user=user, project=project, title='Added paper', authors='Doe, J.', date='2024', summary='Added.')
+        project.refresh_from_db(fields=['context_version'])
+        invalidated_time, _ = self.measure(1, cached)
+
+        context = system_prompts.project_context(project)
+        relevant = listed = 0
+        for title, _, message in TOPICS:
+            block = context.block(message)
+            listed += block.count('**') // 2
+            relevant += block.count(f'**{title} study')
+        full_tokens = context.total_tokens
+        context_tokens = max(estimate_tokens(context.block(message)) for _, _, message in TOPICS)
+
+        block = context.block(TOPICS[0][2])
+        prompts = [system_prompts.build_system_prompt(v, t, r, k, None, block, f) for v, t, r, k, f in VARIANTS]
+        legacy = [legacy_prompt(v, t, r, k, f, block) for v, t, r, k, f in VARIANTS]
+        stable, legacy_stable = common_prefix(prompts), common_prefix(legacy)
+        length = max(len(prompt) for prompt in prompts)
+
+        self.stdout.write(
+            f"{size:5d} papers: context ~{full_tokens:6d} tokens, listed ~{context_tokens:5d} "
+            f"({'ranked' if context.index is not None else 'all'}, {relevant / listed if listed else 0:4.0%} on topic)  "
+            f"prompt {length / 1024:5.1f} KiB  "
+            f"uncached {uncached_time * 1000:7.2f}ms {uncached_queries:.0f} queries  "
+            f"miss {miss_time * 1000:7.2f}ms  hit {hit_time * 1000:6.3f}ms {hit_queries:.0f} queries  "
+            f"after new paper {invalidated_time * 1000:7.2f}ms  "
+            f"stable prefix {stable / length:6.1%} (previous layout {legacy_stable / length:6.1%})"
+        )
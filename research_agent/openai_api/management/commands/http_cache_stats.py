@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from openai_api import http_cache
+
+
+class Command(BaseCommand):
+    help = 'Report size and hit ratio of the on-disk paper fetch cache.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--evict', action='store_true', help='Evict least recently used entries over the size limit first')
+        parser.add_argument('--clear', action='store_true', help='Delete all cache entries')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            self.stdout.write(f'Removed {http_cache.clear()} entries')
+        elif options['evict']:
+            self.stdout.write(f'Evicted {http_cache.evict()} entries')
+
+        stats = http_cache.stats()
+        hit_ratio = f"{stats['hit_ratio']:.1%}" if stats['hit_ratio'] is not None else 'n/a'
+        self.stdout.write(f"Directory:      {http_cache.cache_dir()}")
+        self.stdout.write(f"Entries:        {stats['entries']} ({stats['fresh']} fresh, {stats['negative']} negative)")
+        self.stdout.write(f"Size:           {stats['bytes'] / 1024:.1f} KiB of {stats['max_bytes'] / 1024 / 1024:.0f} MiB")
+        self.stdout.write(f"Hits:           {stats['hits']}")
+        self.stdout.write(f"Full fetches:   {stats['fetches']}")
+        self.stdout.write(f"Revalidations:  {stats['revalidations']}")
+        self.stdout.write(f"Hit ratio:      {hit_ratio}")
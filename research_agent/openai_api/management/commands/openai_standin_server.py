@@ -0,0 +1,208 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+
+
+def papers_reply(text):
+    """A reply in the research assistant's papers JSON format."""
+    return json.dumps({'text': text, 'papers': [{
+        'title': 'Stand-in Paper',
+        'authors': 'Doe, J.',
+        'date': '2024',
+        'type': 'PDF',
+        'link': 'https://arxiv.org/abs/2401.00001',
+        'summary': 'Placeholder paper returned by the local stand-in server.',
+    }]})
+
+
+def chunks(text, size=8):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class StandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Load tests open hundreds of connections at once
+    request_queue_size = 1024
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.counter_lock = threading.Lock()
+        # (path, request body) of every request, for tests
+        self.received = []
+
+    def simulate_latency(self, seconds):
+        """Wait like the model would, counting the requests waiting at the same time."""
+        with self.counter_lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            time.sleep(seconds)
+        finally:
+            with self.counter_lock:
+                self.in_flight -= 1
+
+
+def standin_server(port, write=None, expire_after=None, latency=0.0):
+    """
+    Create the stand-in server (call serve_forever() to run it).
+
+    write: callable for the per-request log lines (None to stay quiet); latency: seconds
+    every response is delayed, to simulate the time the model takes to answer.
+    """
+    write = write or (lambda line: None)
+    # response id -> (stored at, conversation items up to and including the response)
+    responses = {}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        # Keep-alive like the real API, so client connection pooling is exercised
+        protocol_version = 'HTTP/1.1'
+
+        def send_json(self, status, data):
+            body = json.dumps(data).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def send_events(self, events):
+            """Stream (event, data) pairs like the OpenAI API does (stream=True)."""
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            for event, data in events:
+                prefix = f'event: {event}\n' if event else ''
+                payload = data if isinstance(data, str) else json.dumps(data)
+                self.wfile.write(f'{prefix}data: {payload}\n\n'.encode('utf-8'))
+                self.wfile.flush()
+                time.sleep(0.01)
+            self.close_connection = True
+
+        def do_POST(self):
+            raw = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+            request = json.loads(raw or b'{}')
+            with self.server.counter_lock:
+                self.server.received.append((self.path, request))
+            if latency:
+                self.server.simulate_latency(latency)
+            if self.path.endswith('/responses'):
+                self.handle_responses(request, len(raw))
+            elif self.path.endswith('/chat/completions'):
+                write(f"[Stand-in] chat.completions  {len(raw):>8} bytes  {len(request.get('messages', []))} messages")
+                completion_id = f'chatcmpl-{uuid.uuid4().hex}'
+                text = papers_reply(f"{len(request.get('messages', []))} messages received")
+                if request.get('stream'):
+                    chunk = {'id': completion_id, 'object': 'chat.completion.chunk', 'created': int(time.time()), 'model': request.get('model')}
+                    self.send_events(
+                        [(None, {**chunk, 'choices': [{'index': 0, 'delta': {'content': part}, 'finish_reason': None}]}) for part in chunks(text)]
+                        + [(None, {**chunk, 'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]}), (None, '[DONE]')]
+                    )
+                    return
+                self.send_json(200, {
+                    'id': completion_id,
+                    'object': 'chat.completion',
+                    'created': int(time.time()),
+                    'model': request.get('model'),
+                    'choices': [{
+                        'index': 0,
+                        'message': {'role': 'assistant', 'content': text},
+                        'finish_reason': 'stop',
+                    }],
+                })
+            else:
+                self.send_json(404, {'error': {'message': f'Unknown path {self.path}', 'type': 'invalid_request_error'}})
+
+        def handle_responses(self, request, size):
+            items = request.get('input')
+            items = [{'role': 'user', 'content': items}] if isinstance(items, str) else list(items or [])
+            previous_id = request.get('previous_response_id')
+            with lock:
+                if expire_after is not None:
+                    for key in [k for k, (stored_at, _) in responses.items() if time.time() - stored_at > expire_after]:
+                        del responses[key]
+                if previous_id and previous_id not in responses:
+                    write(f"[Stand-in] responses         {size:>8} bytes  previous_response_id {previous_id} not found")
+                    self.send_json(400, {'error': {
+                        'message': f"Previous response with id '{previous_id}' not found.",
+                        'type': 'invalid_request_error',
+                        'param': 'previous_response_id',
+                        'code': 'previous_response_not_found',
+                    }})
+                    return
+                context = (responses[previous_id][1] if previous_id else []) + items
+                response_id = f'resp_{uuid.uuid4().hex}'
+                text = papers_reply(f'{len(items)} new items, {len(context)} items of context')
+                responses[response_id] = (time.time(), context + [{'role': 'assistant', 'content': text}])
+
+            write(
+                f"[Stand-in] responses         {size:>8} bytes  {len(items)} input items"
+                f"{', chained' if previous_id else ''} -> {response_id}"
+            )
+            response = {
+                'id': response_id,
+                'object': 'response',
+                'created_at': int(time.time()),
+                'status': 'completed',
+                'model': request.get('model'),
+                'previous_response_id': previous_id,
+                'output': [{
+                    'type': 'message',
+                    'id': f'msg_{uuid.uuid4().hex}',
+                    'role': 'assistant',
+                    'status': 'completed',
+                    'content': [{'type': 'output_text', 'text': text, 'annotations': []}],
+                }],
+                'parallel_tool_calls': True,
+                'tool_choice': 'auto',
+                'tools': request.get('tools', []),
+            }
+            if request.get('stream'):
+                item_id = response['output'][0]['id']
+                self.send_events(
+                    [('response.created', {'type': 'response.created', 'sequence_number': 0, 'response': {**response, 'status': 'in_progress', 'output': []}})]
+                    + [
+                        ('response.output_text.delta', {
+                            'type': 'response.output_text.delta', 'sequence_number': i + 1, 'item_id': item_id,
+                            'output_index': 0, 'content_index': 0, 'delta': part, 'logprobs': [],
+                        })
+                        for i, part in enumerate(chunks(text))
+                    ]
+                    + [('response.completed', {'type': 'response.completed', 'sequence_number': len(text) + 1, 'response': response})]
+                )
+                return
+            self.send_json(200, response)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StandinServer(('127.0.0.1', port), Handler)
+
+
+class Command(BaseCommand):
+    help = ('Run a local stand-in for the OpenAI API (chat completions and stateful Responses API, '
+            'both also streamed) that logs request sizes. Point OPENAI_BASE_URL at http://127.0.0.1:<port>/v1 to use it.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--expire-after', type=float, default=None,
+                            help='Forget stored responses after this many seconds (simulates broken chains)')
+        parser.add_argument('--latency', type=float, default=0.0,
+                            help='Delay every response by this many seconds (simulates model latency)')
+
+    def handle(self, *args, **options):
+        server = standin_server(options['port'], self.stdout.write, options['expire_after'], options['latency'])
+        self.stdout.write(f"[Stand-in] Listening on http://127.0.0.1:{options['port']}/v1")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,196 @@
+import os
+import socket
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+from openai_api.models import VerificationJob, VerificationJobPaper
+from openai_api import titles, verification_cache
+from openai_api.views import get_openai_client
+from openai_api.views_verification import run_verification
+
+
+class Command(BaseCommand):
+    help = ('Process queued message verification jobs from the database queue, and generate '
+            'pending conversation titles in a background thread.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Process at most one job and exit')
+        parser.add_argument('--poll-interval', type=float, default=None,
+                            help='Seconds to sleep when the queue is empty (default: VERIFICATION_JOB_POLL_INTERVAL)')
+        parser.add_argument('--worker-id', default=None, help='Identifier recorded on claimed jobs')
+        parser.add_argument('--no-titles', action='store_true', help='Do not generate pending conversation titles')
+
+    def handle(self, *args, **options):
+        poll_interval = options['poll_interval'] or getattr(settings, 'VERIFICATION_JOB_POLL_INTERVAL', 1.0)
+        worker_id = options['worker_id'] or f'{socket.gethostname()}-{os.getpid()}'
+        self.stdout.write(f'[Verification Worker] {worker_id} started')
+
+        # Titles are quick; a thread of their own keeps them from waiting behind long verifications
+        if not options['once'] and not options['no_titles']:
+            threading.Thread(target=self.title_loop, args=(poll_interval,), daemon=True).start()
+
+        try:
+            while True:
+                close_old_connections()
+                self.requeue_stale_jobs()
+                job = self.claim_next_job(worker_id)
+                if job:
+                    self.process_job(job)
+                if options['once']:
+                    if not options['no_titles']:
+                        titles.process_pending()
+                    break
+                if not job:
+                    time.sleep(poll_interval)
+        except KeyboardInterrupt:
+            self.stdout.write(f'[Verification Worker] {worker_id} stopped')
+
+    def title_loop(self, poll_interval):
+        """Generate the pending conversation titles that are due (see openai_api/titles.py)."""
+        while True:
+            close_old_connections()
+            try:
+                processed = titles.process_pending()
+            except Exception as e:
+                self.stdout.write(f'[Verification Worker] Title generation failed: {e}')
+                processed = 0
+            if not processed:
+                time.sleep(poll_interval)
+
+    def claim_next_job(self, worker_id):
+        """
+        Claim the oldest queued job.
+
+        The status-conditional UPDATE acts as compare-and-swap, so several workers can
+        share the queue without row locks (works on SQLite as well).
+        """
+        for job in VerificationJob.objects.filter(status='queued').order_by('created_at')[:5]:
+            now = timezone.now()
+            claimed = VerificationJob.objects.filter(id=job.id, status='queued').update(
+                status='running',
+                worker_id=worker_id,
+                attempts=job.attempts + 1,
+                started_at=now,
+                updated_at=now,
+            )
+            if claimed:
+                return VerificationJob.objects.select_related('message', 'user').get(id=job.id)
+        return None
+
+    def requeue_stale_jobs(self):
+        """Put running jobs whose worker stopped reporting progress back on the queue."""
+        stale_after = getattr(settings, 'VERIFICATION_JOB_STALE_AFTER', 600)
+        max_attempts = getattr(settings, 'VERIFICATION_JOB_MAX_ATTEMPTS', 3)
+        cutoff = timezone.now() - timedelta(seconds=stale_after)
+        stale = VerificationJob.objects.filter(status='running', updated_at__lt=cutoff)
+
+        stale.filter(attempts__gte=max_attempts).update(
+            status='failed',
+            error='Verification worker stopped responding',
+            finished_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
+        requeued = stale.filter(attempts__lt=max_attempts).update(
+            status='queued',
+            stage='queued',
+            worker_id='',
+            updated_at=timezone.now(),
+        )
+        if requeued:
+            self.stdout.write(f'[Verification Worker] Re-queued {requeued} stale job(s)')
+
+    def heartbeat(self, job, done):
+        """
+        Keep updated_at of a running job fresh until done is set, so requeue_stale_jobs does
+        not hand it to another worker during a long stage (the response evaluation can take
+        longer than VERIFICATION_JOB_STALE_AFTER).
+        """
+        interval = getattr(settings, 'VERIFICATION_JOB_HEARTBEAT', 60)
+        try:
+            while not done.wait(interval):
+                if not self.owned(job).update(updated_at=timezone.now()):
+                    return
+        finally:
+            connection.close()
+
+    def owned(self, job):
+        """The job, as long as it is still running under this worker."""
+        return VerificationJob.objects.filter(id=job.id, worker_id=job.worker_id, status='running')
+
+    def process_job(self, job):
+        self.stdout.write(f'[Verification Worker] Processing job {job.id} (message {job.message_id})')
+
+        def on_stage(stage, paper_indexes):
+            self.owned(job).update(stage=stage, updated_at=timezone.now())
+            if paper_indexes:
+                job.papers.filter(paper_index__in=paper_indexes).update(status='verifying', updated_at=timezone.now())
+
+        def on_paper_result(paper_index, paper_result):
+            if paper_result.get('reused'):
+                status = 'reused'
+            elif paper_result.get('evaluation_error'):
+                status = 'failed'
+            else:
+                status = 'done'
+            VerificationJobPaper.objects.update_or_create(
+                job=job,
+                paper_index=paper_index,
+                defaults={'status': status, 'result': paper_result, 'title': paper_result.get('title', '')[:500]},
+            )
+            self.owned(job).update(updated_at=timezone.now())
+
+        done = threading.Event()
+        threading.Thread(target=self.heartbeat, args=(job, done), daemon=True).start()
+        created = None
+        try:
+            existing_verification = job.message.verifications.first()
+            if existing_verification:
+                verification = existing_verification
+            else:
+                client = get_openai_client(job.user)
+                verification = created = run_verification(
+                    job.message,
+                    client,
+                    job.model,
+                    on_stage=on_stage,
+                    on_paper_result=on_paper_result,
+                )
+            # Conditional: the job may have been re-queued and claimed by another worker meanwhile
+            completed = self.owned(job).update(
+                status='completed',
+                stage='done',
+                verification=verification,
+                finished_at=timezone.now(),
+                updated_at=timezone.now(),
+            )
+            if not completed:
+                self.lost(job, created)
+                return
+            self.stdout.write(f'[Verification Worker] Job {job.id} completed (cache: {verification_cache.cache_stats()})')
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            failed = self.owned(job).update(
+                status='failed',
+                error=f'Verification failed: {str(e)}',
+                finished_at=timezone.now(),
+                updated_at=timezone.now(),
+            )
+            if not failed:
+                self.lost(job, created)
+                return
+            self.stdout.write(f'[Verification Worker] Job {job.id} failed: {e}')
+        finally:
+            done.set()
+
+    def lost(self, job, created):
+        """The job was taken over by another worker: drop this worker's result, theirs stands."""
+        if created:
+            created.delete()
+        self.stdout.write(f'[Verification Worker] Job {job.id} was taken over by another worker, result discarded')
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('openai_api', '0011_project_conversation_project_paper_project'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paperverification',
+            name='timings',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('openai_api', '0013_verificationjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaperVerificationCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('identifier', models.CharField(max_length=1000, unique=True)),
+                ('identifier_type', models.CharField(choices=[('doi', 'DOI'), ('arxiv', 'arXiv'), ('url', 'URL')], max_length=10)),
+                ('title', models.CharField(blank=True, default='', max_length=500)),
+                ('link', models.URLField(blank=True, default='', max_length=1000)),
+                ('openalex_metadata', models.JSONField(blank=True, null=True)),
+                ('verified_metadata', models.JSONField(blank=True, null=True)),
+                ('content_fetch', models.JSONField(blank=True, null=True)),
+                ('content_verification', models.JSONField(blank=True, null=True)),
+                ('paper_quality', models.JSONField(blank=True, null=True)),
+                ('summary_evaluation', models.JSONField(blank=True, null=True)),
+                ('overall_assessment', models.TextField(blank=True, default='')),
+                ('credibility_score', models.FloatField(default=5.0)),
+                ('credibility_notes', models.TextField(blank=True, default='')),
+                ('overall_quality', models.FloatField(default=5.0)),
+                ('timings', models.JSONField(blank=True, null=True)),
+                ('hit_count', models.IntegerField(default=0)),
+                ('verified_at', models.DateTimeField()),
+                ('last_used_at', models.DateTimeField(db_index=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-last_used_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='paperverification',
+            name='cache_entry',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='paper_verifications', to='openai_api.paperverificationcache'),
+        ),
+    ]
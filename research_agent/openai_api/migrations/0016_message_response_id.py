@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('openai_api', '0015_conversation_history_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='message',
+            name='response_id',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='response_model',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('openai_api', '0019_project_context_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paper',
+            name='term_vector',
+            field=models.BinaryField(blank=True, default=b''),
+        ),
+    ]
@@ -0,0 +1,108 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:28
+
+import json
+import re
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+
+BATCH_SIZE = 500
+PREVIEW_LENGTH = 200
+
+# Frozen copies of the parsing and preview helpers as of this migration (the application's
+# versions may change; this migration must keep doing what it did)
+
+
+def _parse_answer(content):
+    """The parsed JSON of a stored assistant answer."""
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError:
+        match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', content, re.DOTALL)
+        if match:
+            return json.loads(match.group(1))
+        match = re.search(r'\{[^{}]*"papers"[^{}]*\[.*?\]\s*\}', content, re.DOTALL)
+        if match:
+            return json.loads(match.group(0))
+        return {"papers": [], "error": "Failed to parse response"}
+
+
+def _legacy_text(message):
+    """What a message saved before Message.payload existed says."""
+    if message.role != 'assistant':
+        return message.content or ''
+    try:
+        data = _parse_answer(message.content or '')
+    except (TypeError, ValueError):
+        data = None
+    if not isinstance(data, dict):
+        return message.content or ''
+    text = data.get('text')
+    return text if isinstance(text, str) else ''
+
+
+def _preview(text):
+    return ' '.join(text.split())[:PREVIEW_LENGTH]
+
+
+def backfill_summaries(apps, schema_editor):
+    """Preview, message count and last activity of the existing conversations."""
+    Conversation = apps.get_model('openai_api', 'Conversation')
+    Message = apps.get_model('openai_api', 'Message')
+    latest = Message.objects.filter(conversation=OuterRef('pk')).order_by('-created_at', '-id').values('id')[:1]
+    conversations = Conversation.objects.only('id', 'created_at').annotate(
+        count=Count('messages'), latest_id=Subquery(latest)
+    ).order_by('id')
+
+    def update(batch):
+        messages = Message.objects.only('role', 'content', 'created_at').in_bulk(
+            [conversation.latest_id for conversation in batch if conversation.latest_id]
+        )
+        for conversation in batch:
+            message = messages.get(conversation.latest_id)
+            conversation.message_count = conversation.count
+            conversation.preview = _preview(_legacy_text(message)) if message else ''
+            conversation.last_activity_at = message.created_at if message else conversation.created_at
+        Conversation.objects.bulk_update(batch, ['preview', 'message_count', 'last_activity_at'])
+
+    batch = []
+    for conversation in conversations.iterator(chunk_size=BATCH_SIZE):
+        batch.append(conversation)
+        if len(batch) == BATCH_SIZE:
+            update(batch)
+            batch = []
+    if batch:
+        update(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('openai_api', '0020_paper_term_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='last_activity_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='message_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='preview',
+            field=models.CharField(blank=True, default='', max_length=200),
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['project', '-last_activity_at', '-id'], name='conversation_activity_idx'),
+        ),
+    ]
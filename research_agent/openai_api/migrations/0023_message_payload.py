@@ -0,0 +1,126 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:34
+
+import json
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+# Frozen copies of openai_api.answers as of this migration (the application's versions may
+# change; this migration must keep doing what it did)
+
+
+def _parse_answer(content):
+    """The parsed JSON of a stored assistant answer."""
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError:
+        match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', content, re.DOTALL)
+        if match:
+            return json.loads(match.group(1))
+        match = re.search(r'\{[^{}]*"papers"[^{}]*\[.*?\]\s*\}', content, re.DOTALL)
+        if match:
+            return json.loads(match.group(0))
+        return {"papers": [], "error": "Failed to parse response"}
+
+
+def _payload(content):
+    """{'text', 'papers'[, 'error']} of a stored answer (None if it is not a JSON object)."""
+    try:
+        data = _parse_answer(content or '')
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(data, dict):
+        return None
+    text = data.get('text')
+    papers = data.get('papers')
+    payload = {
+        'text': text if isinstance(text, str) else '',
+        'papers': [paper for paper in papers if isinstance(paper, dict)] if isinstance(papers, list) else [],
+    }
+    if data.get('error'):
+        payload['error'] = str(data['error'])
+    return payload
+
+
+def _field(paper, name, max_length=None):
+    value = paper.get(name)
+    value = '' if value is None else str(value)
+    return value[:max_length] if max_length else value
+
+
+def _paper_rows(payload):
+    """Field values of the MessagePaper rows of a payload, in order."""
+    return [
+        {
+            'position': position,
+            'title': _field(paper, 'title'),
+            'authors': _field(paper, 'authors'),
+            'date': _field(paper, 'date', 50),
+            'paper_type': _field(paper, 'type', 50),
+            'link': _field(paper, 'link', 1000),
+            'summary': _field(paper, 'summary'),
+        }
+        for position, paper in enumerate((payload or {}).get('papers', []))
+    ]
+
+
+def parse_answers(apps, schema_editor):
+    """Payload and recommended paper rows of the existing assistant messages."""
+    Message = apps.get_model('openai_api', 'Message')
+    MessagePaper = apps.get_model('openai_api', 'MessagePaper')
+    messages = Message.objects.filter(role='assistant', payload__isnull=True).only('id', 'content').order_by('id')
+
+    def update(batch):
+        rows = []
+        for message in batch:
+            message.payload = _payload(message.content)
+            rows += [MessagePaper(message_id=message.id, **row) for row in _paper_rows(message.payload)]
+        Message.objects.bulk_update(batch, ['payload'])
+        MessagePaper.objects.bulk_create(rows)
+
+    batch = []
+    for message in messages.iterator(chunk_size=BATCH_SIZE):
+        batch.append(message)
+        if len(batch) == BATCH_SIZE:
+            update(batch)
+            batch = []
+    if batch:
+        update(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('openai_api', '0022_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='message',
+            name='payload',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='MessagePaper',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+                ('title', models.TextField(blank=True, default='')),
+                ('authors', models.TextField(blank=True, default='')),
+                ('date', models.CharField(blank=True, default='', max_length=50)),
+                ('paper_type', models.CharField(blank=True, default='', max_length=50)),
+                ('link', models.CharField(blank=True, default='', max_length=1000)),
+                ('summary', models.TextField(blank=True, default='')),
+                ('message', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommended_papers', to='openai_api.message')),
+            ],
+            options={
+                'ordering': ['message', 'position'],
+                'indexes': [models.Index(fields=['link'], name='message_paper_link_idx')],
+                'unique_together': {('message', 'position')},
+            },
+        ),
+        migrations.RunPython(parse_answers, migrations.RunPython.noop),
+    ]
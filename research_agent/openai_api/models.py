@@ -1,7 +1,11 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
+from django.utils import timezone
+
+from .answers import message_text, paper_rows
 
 
 class UserProfile(models.Model):
@@ -30,6 +34,8 @@ class Project(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='projects')
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True, default='')
+    # Bumped whenever the project's context papers change; keys the cached prompt block (see system_prompts.py)
+    context_version = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -38,14 +44,37 @@ class Project(models.Model):
 
 
 class Conversation(models.Model):
+    TITLE_STATUS_CHOICES = [
+        ('final', 'Final'),
+        # Provisional title until run_verification_worker has generated one (see titles.py)
+        ('pending', 'Pending'),
+        ('failed', 'Failed'),
+    ]
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='conversations')
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='conversations', null=True, blank=True)
     title = models.CharField(max_length=255, default='New Conversation')
+    title_status = models.CharField(max_length=20, choices=TITLE_STATUS_CHOICES, default='final')
+    title_model = models.CharField(max_length=100, blank=True, default='')
+    title_attempts = models.IntegerField(default=0)
+    # Earliest time of the next title generation attempt (also the lease of a claimed attempt)
+    title_retry_at = models.DateTimeField(null=True, blank=True)
+    # Rolling summary of the messages that no longer fit the prompt history window (see history.py)
+    history_summary = models.TextField(blank=True, default='')
+    summarized_through_message_id = models.IntegerField(default=0)
+    # Sidebar summary, maintained by Message.save() (see message_preview)
+    preview = models.CharField(max_length=200, blank=True, default='')
+    message_count = models.PositiveIntegerField(default=0)
+    last_activity_at = models.DateTimeField(default=timezone.now)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-updated_at']
+        indexes = [
+            models.Index(fields=['title_status', 'title_retry_at']),
+            # Sidebar list of a project, most recently active first (paged, see pagination.py)
+            models.Index(fields=['project', '-last_activity_at', '-id'], name='conversation_activity_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} ({self.user.username})"
@@ -59,15 +88,83 @@ class Message(models.Model):
     conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='messages')
     role = models.CharField(max_length=20, choices=ROLE_CHOICES)
     content = models.TextField()
+    # Parsed assistant answer {'text', 'papers'} (None for user messages); content keeps the raw JSON (see answers.py)
+    payload = models.JSONField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     system_prompt = models.TextField(blank=True, default='')
+    # Responses API id of an assistant answer (OPENAI_CONVERSATION_STATE mode) and the model that produced it
+    response_id = models.CharField(max_length=100, blank=True, default='')
+    response_model = models.CharField(max_length=100, blank=True, default='')
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Message pages of a conversation (see pagination.py)
+            models.Index(fields=['conversation', 'created_at', 'id'], name='message_conversation_idx'),
+        ]
 
     def __str__(self):
         return f"{self.role}: {self.content[:50]}..."
 
+    @property
+    def text(self):
+        """The user's message, or the text of an assistant answer."""
+        return message_text(self.role, self.content, self.payload)
+
+    @property
+    def papers(self):
+        """Papers recommended in an assistant answer, as returned by the model."""
+        return (self.payload or {}).get('papers', [])
+
+    def save(self, *args, **kwargs):
+        """
+        Save the message; a new message also gets the rows of its recommended papers and
+        updates its conversation's summary, in the same transaction.
+        """
+        with transaction.atomic(using=kwargs.get('using')):
+            created = self._state.adding
+            super().save(*args, **kwargs)
+            if created:
+                MessagePaper.objects.bulk_create([MessagePaper(message=self, **row) for row in paper_rows(self.payload)])
+                # update(): concurrent writers each add their message, and updated_at is left alone
+                Conversation.objects.filter(pk=self.conversation_id).update(
+                    preview=message_preview(self.text),
+                    message_count=F('message_count') + 1,
+                    last_activity_at=self.created_at,
+                )
+
+
+PREVIEW_LENGTH = 200
+
+
+def message_preview(text):
+    """Sidebar preview of a message's text (see Message.text)."""
+    return ' '.join(text.split())[:PREVIEW_LENGTH]
+
+
+class MessagePaper(models.Model):
+    """A paper recommended in an assistant answer: one row per entry of Message.payload['papers']."""
+    message = models.ForeignKey(Message, on_delete=models.CASCADE, related_name='recommended_papers')
+    # Index in payload['papers'] (the paper_index of verifications)
+    position = models.PositiveIntegerField()
+    title = models.TextField(blank=True, default='')
+    authors = models.TextField(blank=True, default='')
+    date = models.CharField(max_length=50, blank=True, default='')
+    paper_type = models.CharField(max_length=50, blank=True, default='')
+    link = models.CharField(max_length=1000, blank=True, default='')
+    summary = models.TextField(blank=True, default='')
+
+    class Meta:
+        ordering = ['message', 'position']
+        unique_together = ['message', 'position']
+        indexes = [
+            # Answers that recommended a paper
+            models.Index(fields=['link'], name='message_paper_link_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.title[:50]}..."
+
 
 class Paper(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='papers')
@@ -80,15 +177,93 @@ class Paper(models.Model):
     summary = models.TextField()
     bibtex = models.TextField(blank=True, default='')
     in_context = models.BooleanField(default=True)
+    # Hashed term vector for relevance-ranked context selection (see context_index.py)
+    term_vector = models.BinaryField(blank=True, default=b'', editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Part of the bibliography export ETag (see bibliography.export_etag)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Paper pages of a project, newest first (see pagination.py)
+            models.Index(fields=['project', '-created_at', '-id'], name='paper_project_recent_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title[:50]}..."
 
 
+# Paper fields that are not part of the system prompt
+PROMPT_IRRELEVANT_PAPER_FIELDS = {'bibtex', 'term_vector', 'updated_at'}
+
+
+def bump_context_version(project_id):
+    # update(): a changed paper list does not change the project's updated_at
+    Project.objects.filter(pk=project_id).update(context_version=F('context_version') + 1)
+
+
+@receiver(post_save, sender=Paper)
+def paper_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= PROMPT_IRRELEVANT_PAPER_FIELDS:
+        return
+    if instance.project_id:
+        bump_context_version(instance.project_id)
+
+
+@receiver(post_delete, sender=Paper)
+def paper_deleted(sender, instance, origin=None, **kwargs):
+    # Papers deleted along with their project or user need no new version
+    if origin is not None and not (isinstance(origin, Paper) or getattr(origin, 'model', None) is Paper):
+        return
+    if instance.project_id:
+        bump_context_version(instance.project_id)
+
+
+class PaperVerificationCache(models.Model):
+    """
+    Paper-level verification results shared across messages, keyed by canonical identifier
+    (DOI, arXiv id or canonical URL, see identifiers.paper_identifier).
+    """
+    IDENTIFIER_TYPE_CHOICES = [
+        ('doi', 'DOI'),
+        ('arxiv', 'arXiv'),
+        ('url', 'URL'),
+    ]
+    identifier = models.CharField(max_length=1000, unique=True)
+    identifier_type = models.CharField(max_length=10, choices=IDENTIFIER_TYPE_CHOICES)
+    title = models.CharField(max_length=500, blank=True, default='')
+    link = models.URLField(max_length=1000, blank=True, default='')
+
+    openalex_metadata = models.JSONField(null=True, blank=True)
+    verified_metadata = models.JSONField(null=True, blank=True)
+    content_fetch = models.JSONField(null=True, blank=True)
+    content_verification = models.JSONField(null=True, blank=True)
+    paper_quality = models.JSONField(null=True, blank=True)
+    summary_evaluation = models.JSONField(null=True, blank=True)
+    overall_assessment = models.TextField(blank=True, default='')
+    credibility_score = models.FloatField(default=5.0)
+    credibility_notes = models.TextField(blank=True, default='')
+    overall_quality = models.FloatField(default=5.0)
+    timings = models.JSONField(null=True, blank=True)
+
+    hit_count = models.IntegerField(default=0)
+    verified_at = models.DateTimeField()
+    last_used_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-last_used_at']
+
+    def __str__(self):
+        return f"{self.identifier} ({self.hit_count} hits)"
+
+    @property
+    def fetch_failed(self):
+        """True if the content fetch or OpenAlex lookup failed when this entry was verified."""
+        return not (self.content_fetch or {}).get('success') or not (self.openalex_metadata or {}).get('success')
+
+
 class PaperVerification(models.Model):
     """Individual paper verification results."""
     verification = models.ForeignKey('Verification', on_delete=models.CASCADE, related_name='paper_verification_details')
@@ -120,6 +295,12 @@ class PaperVerification(models.Model):
     credibility_notes = models.TextField(blank=True, default='')
     overall_quality = models.FloatField(default=5.0)
     
+    # Duration of each verification step in seconds (content_fetch, openalex, io, llm_evaluation, total)
+    timings = models.JSONField(null=True, blank=True)
+    
+    # Shared paper-level results; when set, the JSON fields above are left empty
+    cache_entry = models.ForeignKey(PaperVerificationCache, on_delete=models.SET_NULL, null=True, blank=True, related_name='paper_verifications')
+    
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -144,23 +325,92 @@ class Verification(models.Model):
     
     def get_paper_verifications(self):
         """Helper method to get paper verifications as list of dicts (for API compatibility)."""
-        return [
-            {
+        details = self.paper_verification_details.all()
+        # Prefetched details (see serializers.verifications_prefetch) come with their cache entries
+        if 'paper_verification_details' not in getattr(self, '_prefetched_objects_cache', {}):
+            details = details.select_related('cache_entry')
+        results = []
+        for pv in details:
+            # Paper-level results live on the shared cache entry when there is one
+            source = pv.cache_entry or pv
+            results.append({
                 'paper_index': pv.paper_index,
                 'title': pv.title,
                 'link': pv.link,
                 'claimed_authors': pv.claimed_authors,
                 'claimed_date': pv.claimed_date,
-                'openalex_metadata': pv.openalex_metadata,
-                'verified_metadata': pv.verified_metadata,
-                'content_fetch': pv.content_fetch,
-                'content_verification': pv.content_verification,
-                'paper_quality': pv.paper_quality,
-                'summary_evaluation': pv.summary_evaluation,
-                'overall_assessment': pv.overall_assessment,
+                'openalex_metadata': source.openalex_metadata,
+                'verified_metadata': source.verified_metadata,
+                'content_fetch': source.content_fetch,
+                'content_verification': source.content_verification,
+                'paper_quality': source.paper_quality,
+                'summary_evaluation': source.summary_evaluation,
+                'overall_assessment': source.overall_assessment,
                 'credibility_score': pv.credibility_score,
-                'credibility_notes': pv.credibility_notes,
+                'credibility_notes': source.credibility_notes,
                 'overall_quality': pv.overall_quality,
-            }
-            for pv in self.paper_verification_details.all()
+                'timings': source.timings,
+            })
+        return results
+
+
+class VerificationJob(models.Model):
+    """Background verification of an assistant message, processed by run_verification_worker."""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    STAGE_CHOICES = [
+        ('queued', 'Queued'),
+        ('verifying_papers', 'Verifying papers'),
+        ('evaluating_response', 'Evaluating response'),
+        ('done', 'Done'),
+    ]
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='verification_jobs')
+    message = models.ForeignKey(Message, on_delete=models.CASCADE, related_name='verification_jobs')
+    model = models.CharField(max_length=100)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    stage = models.CharField(max_length=30, choices=STAGE_CHOICES, default='queued')
+    verification = models.ForeignKey(Verification, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    error = models.TextField(blank=True, default='')
+    worker_id = models.CharField(max_length=100, blank=True, default='')
+    attempts = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
         ]
+
+    def __str__(self):
+        return f"Verification job {self.id} for message {self.message_id} ({self.status})"
+
+
+class VerificationJobPaper(models.Model):
+    """Progress of a single paper within a VerificationJob."""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('verifying', 'Verifying'),
+        ('reused', 'Reused'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    job = models.ForeignKey(VerificationJob, on_delete=models.CASCADE, related_name='papers')
+    paper_index = models.IntegerField()
+    title = models.CharField(max_length=500, blank=True, default='')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    result = models.JSONField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['paper_index']
+        unique_together = ['job', 'paper_index']
+
+    def __str__(self):
+        return f"Job {self.job_id} paper {self.paper_index} ({self.status})"
@@ -0,0 +1,205 @@
+"""
+Process-wide registry of OpenAI clients.
+
+Constructing an OpenAI client per request gave every chat turn a fresh connection pool, so
+each call paid TCP and TLS setup to the API and the pool was thrown away afterwards. Instead:
+
+- all sync clients share one pooled keep-alive HTTP client; async clients share one per
+  event loop (an ASGI server runs one loop per process)
+- the OpenAI client objects themselves are cached per API key, keyed by a SHA-256 hash of
+  the key, in an LRU of at most OPENAI_CLIENT_CACHE_SIZE entries; entries unused for
+  OPENAI_CLIENT_IDLE_TIMEOUT seconds are dropped
+- timeouts and retries come from OPENAI_TIMEOUT, OPENAI_CONNECT_TIMEOUT and OPENAI_MAX_RETRIES
+
+Cached clients are never closed individually (that would close the shared pool); dropping
+them is enough. invalidate() is called when a user saves or deletes their key; other
+processes (the verification worker) let the old entry expire. stats() reports the registry
+counters and the connection pools (see the openai_client_stats endpoint).
+"""
+
+from collections import OrderedDict
+import asyncio
+import hashlib
+import threading
+import time
+import weakref
+
+from django.conf import settings
+import httpx
+import openai
+from openai import AsyncOpenAI, OpenAI
+
+_lock = threading.Lock()
+# (key hash, 'sync' | 'async') -> entry dict, least recently used first
+_clients = OrderedDict()
+_http_client = None
+# Event loop -> pooled async HTTP client of that loop
+_async_http_clients = weakref.WeakKeyDictionary()
+_counters = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0}
+
+
+def setting(name, default):
+    return getattr(settings, name, default)
+
+
+def key_hash(api_key):
+    return hashlib.sha256(api_key.encode('utf-8')).hexdigest()
+
+
+def timeout():
+    return openai.Timeout(setting('OPENAI_TIMEOUT', 600.0), connect=setting('OPENAI_CONNECT_TIMEOUT', 10.0))
+
+
+def http_client_options():
+    return {
+        'timeout': timeout(),
+        'limits': httpx.Limits(
+            max_connections=setting('OPENAI_MAX_CONNECTIONS', 1000),
+            max_keepalive_connections=setting('OPENAI_MAX_KEEPALIVE_CONNECTIONS', 100),
+            keepalive_expiry=setting('OPENAI_KEEPALIVE_EXPIRY', 60.0),
+        ),
+    }
+
+
+def client_options(api_key, http_client):
+    return {
+        'api_key': api_key,
+        # OPENAI_BASE_URL points the client at a compatible (or local stand-in) server
+        'base_url': setting('OPENAI_BASE_URL', None) or None,
+        'http_client': http_client,
+        'timeout': timeout(),
+        'max_retries': setting('OPENAI_MAX_RETRIES', 2),
+    }
+
+
+def shared_http_client():
+    """The process-wide pooled HTTP client of the sync OpenAI clients."""
+    global _http_client
+    with _lock:
+        if _http_client is None or _http_client.is_closed:
+            _http_client = openai.DefaultHttpxClient(**http_client_options())
+        return _http_client
+
+
+def shared_async_http_client():
+    """The pooled HTTP client of the async OpenAI clients on the running event loop."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_http_clients.get(loop)
+        if client is None or client.is_closed:
+            client = _async_http_clients[loop] = openai.DefaultAsyncHttpxClient(**http_client_options())
+        return client
+
+
+def expire_idle(now):
+    """Drop entries unused for OPENAI_CLIENT_IDLE_TIMEOUT seconds (caller holds _lock)."""
+    idle_timeout = setting('OPENAI_CLIENT_IDLE_TIMEOUT', 600)
+    while _clients:
+        key, entry = next(iter(_clients.items()))
+        if now - entry['last_used'] < idle_timeout:
+            break
+        del _clients[key]
+        _counters['expirations'] += 1
+
+
+def lookup(api_key, flavour, client_class, http_client):
+    options = client_options(api_key, http_client)
+    key = (key_hash(api_key), flavour)
+    with _lock:
+        now = time.monotonic()
+        expire_idle(now)
+        entry = _clients.get(key)
+        # A changed base URL or a new HTTP client (closed pool, other event loop) needs a new client
+        if entry and entry['http_client'] is http_client and entry['base_url'] == options['base_url']:
+            _clients.move_to_end(key)
+            entry['last_used'] = now
+            entry['uses'] += 1
+            _counters['hits'] += 1
+            return entry['client']
+
+        _counters['misses'] += 1
+        _clients[key] = {
+            'client': client_class(**options),
+            'http_client': http_client,
+            'base_url': options['base_url'],
+            'created': now,
+            'last_used': now,
+            'uses': 1,
+        }
+        _clients.move_to_end(key)
+        while len(_clients) > setting('OPENAI_CLIENT_CACHE_SIZE', 256):
+            _clients.popitem(last=False)
+            _counters['evictions'] += 1
+        return _clients[key]['client']
+
+
+def get_client(api_key):
+    """Cached OpenAI client for an API key. Raises ValueError if there is no key."""
+    if not api_key:
+        raise ValueError("Please set your OpenAI API key in settings")
+    return lookup(api_key, 'sync', OpenAI, shared_http_client())
+
+
+def get_async_client(api_key):
+    """Cached AsyncOpenAI client for an API key (call from the event loop). Raises ValueError if there is no key."""
+    if not api_key:
+        raise ValueError("Please set your OpenAI API key in settings")
+    return lookup(api_key, 'async', AsyncOpenAI, shared_async_http_client())
+
+
+def invalidate(api_key):
+    """Forget the cached clients of an API key (after the user changed or deleted it)."""
+    if not api_key:
+        return 0
+    digest = key_hash(api_key)
+    with _lock:
+        keys = [key for key in _clients if key[0] == digest]
+        for key in keys:
+            del _clients[key]
+        _counters['invalidations'] += len(keys)
+    if keys:
+        print(f"[OpenAI Clients] Invalidated {len(keys)} cached client(s) for key {digest[:8]}")
+    return len(keys)
+
+
+def clear():
+    """Drop all cached clients and close the shared sync connection pool."""
+    global _http_client
+    with _lock:
+        _clients.clear()
+        if _http_client is not None:
+            _http_client.close()
+            _http_client = None
+
+
+def pool_stats(http_client):
+    """Connection counts of a pooled HTTP client (None if the transport is not a connection pool)."""
+    pool = getattr(getattr(http_client, '_transport', None), '_pool', None)
+    connections = getattr(pool, 'connections', None)
+    if connections is None:
+        return None
+    return {
+        'connections': len(connections),
+        'idle': sum(1 for connection in connections if connection.is_idle()),
+        'waiting_requests': len(getattr(pool, '_requests', [])),
+        'max_connections': getattr(pool, '_max_connections', None),
+        'max_keepalive_connections': getattr(pool, '_max_keepalive_connections', None),
+    }
+
+
+def stats():
+    """Registry counters and connection pool usage of this process."""
+    with _lock:
+        expire_idle(time.monotonic())
+        requests = _counters['hits'] + _counters['misses']
+        return {
+            'clients': len(_clients),
+            'sync_clients': sum(1 for key in _clients if key[1] == 'sync'),
+            'async_clients': sum(1 for key in _clients if key[1] == 'async'),
+            'max_clients': setting('OPENAI_CLIENT_CACHE_SIZE', 256),
+            'idle_timeout': setting('OPENAI_CLIENT_IDLE_TIMEOUT', 600),
+            **_counters,
+            'hit_ratio': round(_counters['hits'] / requests, 3) if requests else None,
+            'sync_pool': pool_stats(_http_client) if _http_client is not None and not _http_client.is_closed else None,
+            'async_pools': [pool_stats(client) for client in list(_async_http_clients.values()) if not client.is_closed],
+        }
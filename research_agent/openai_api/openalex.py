@@ -0,0 +1,194 @@
+"""
+OpenAlex API client.
+
+All requests share one pooled httpx.Client (HTTP/2 when the h2 package is installed,
+keep-alive otherwise), so verifications running in different threads reuse the same
+connection instead of paying a TLS handshake per paper. Papers with a DOI are resolved
+together in a single `filter=doi:a|b|c` request; the remaining papers are searched by
+title in parallel over the same connection. Only the fields we use are requested via
+`select=`.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import importlib.util
+import threading
+
+from django.conf import settings
+import httpx
+
+from .identifiers import extract_doi, normalize_doi
+
+BASE_URL = "https://api.openalex.org"
+
+# Fields needed by extract_work_metadata
+SELECT_FIELDS = ','.join([
+    'id',
+    'doi',
+    'title',
+    'publication_year',
+    'publication_date',
+    'cited_by_count',
+    'authorships',
+    'primary_location',
+    'open_access',
+    'referenced_works_count',
+])
+
+# OpenAlex accepts up to 100 values in an OR filter; stay well below the URL length limit
+MAX_DOIS_PER_REQUEST = 50
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return the process-wide pooled OpenAlex client, creating it on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            params = {}
+            mailto = getattr(settings, 'OPENALEX_MAILTO', '')
+            if mailto:
+                # Identifies us for OpenAlex's faster "polite pool"
+                params['mailto'] = mailto
+            _client = httpx.Client(
+                base_url=BASE_URL,
+                params=params,
+                http2=importlib.util.find_spec('h2') is not None,
+                timeout=getattr(settings, 'OPENALEX_TIMEOUT', 10.0),
+                limits=httpx.Limits(
+                    max_connections=getattr(settings, 'OPENALEX_MAX_CONNECTIONS', 10),
+                    max_keepalive_connections=getattr(settings, 'OPENALEX_MAX_CONNECTIONS', 10),
+                    keepalive_expiry=60.0,
+                ),
+            )
+        return _client
+
+
+def close_client():
+    """Close the pooled client (it is recreated on the next request)."""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+def extract_work_metadata(work):
+    """Extract relevant metadata from an OpenAlex work (filtered but raw for LLM evaluation)."""
+    primary_location = work.get('primary_location') or {}
+    source = primary_location.get('source') or {}
+
+    return {
+        'success': True,
+        'title': work.get('title'),
+        'doi': work.get('doi'),
+        'publication_year': work.get('publication_year'),
+        'publication_date': work.get('publication_date'),
+        'cited_by_count': work.get('cited_by_count', 0),
+        'authors': [
+            {
+                'name': author.get('author', {}).get('display_name'),
+                'orcid': author.get('author', {}).get('orcid'),
+                'works_count': author.get('author', {}).get('works_count', 0),
+                'cited_by_count': author.get('author', {}).get('cited_by_count', 0),
+                'h_index': author.get('author', {}).get('summary_stats', {}).get('h_index', 0)
+            }
+            for author in work.get('authorships', [])
+        ],
+        'venue': {
+            'name': source.get('display_name'),
+            'type': source.get('type'),
+            'issn': source.get('issn_l'),
+        } if source else None,
+        'open_access': (work.get('open_access') or {}).get('is_oa', False),
+        'pdf_url': primary_location.get('pdf_url'),
+        'referenced_works_count': work.get('referenced_works_count', 0),
+    }
+
+
+def request_works(params):
+    """GET /works with the shared client. Returns (results, error)."""
+    try:
+        response = get_client().get('/works', params={**params, 'select': SELECT_FIELDS})
+        if response.status_code != 200:
+            return None, f'OpenAlex API error: {response.status_code}'
+        return response.json().get('results', []), None
+    except httpx.TimeoutException:
+        return None, 'OpenAlex request timeout'
+    except Exception as e:
+        return None, f'OpenAlex query failed: {str(e)[:100]}'
+
+
+def resolve_dois(dois):
+    """
+    Resolve DOIs in batched `filter=doi:a|b|c` requests.
+
+    Returns dict doi -> metadata result (or error result).
+    """
+    results = {}
+    unique_dois = list(dict.fromkeys(dois))
+    for start in range(0, len(unique_dois), MAX_DOIS_PER_REQUEST):
+        chunk = unique_dois[start:start + MAX_DOIS_PER_REQUEST]
+        works, error = request_works({
+            'filter': 'doi:' + '|'.join(chunk),
+            'per-page': len(chunk),
+        })
+        if error:
+            for doi in chunk:
+                results[doi] = {'error': error, 'success': False}
+            continue
+        for work in works:
+            doi = normalize_doi(work.get('doi'))
+            if doi:
+                results[doi] = extract_work_metadata(work)
+        for doi in chunk:
+            results.setdefault(doi, {'error': 'Paper not found in OpenAlex', 'success': False})
+    return results
+
+
+def search_title(title):
+    """Find the best OpenAlex match for a title."""
+    if not title:
+        return {'error': 'No title or DOI provided', 'success': False}
+    # Commas separate filters in OpenAlex, so they can't appear in the search value
+    works, error = request_works({
+        'filter': f"title.search:{title.replace(',', ' ')}",
+        'per-page': 1,
+    })
+    if error:
+        return {'error': error, 'success': False}
+    if not works:
+        return {'error': 'Paper not found in OpenAlex', 'success': False}
+    return extract_work_metadata(works[0])
+
+
+def resolve_papers(papers):
+    """
+    Resolve OpenAlex metadata for several papers at once.
+
+    papers is a list of paper dicts (with 'link' and 'title'). DOIs found in the links
+    are resolved with one batched request; the other papers are searched by title,
+    in parallel over the pooled connection.
+
+    Returns a list of metadata results in the same order as papers.
+    """
+    dois = [extract_doi(paper.get('link', ''), allow_arxiv=True) for paper in papers]
+    doi_results = resolve_dois([doi for doi in dois if doi])
+
+    results = [doi_results.get(doi) if doi else None for doi in dois]
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        max_workers = min(len(missing), getattr(settings, 'OPENALEX_MAX_CONNECTIONS', 10))
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='openalex') as executor:
+            for i, result in zip(missing, executor.map(lambda i: search_title(papers[i].get('title', '')), missing)):
+                results[i] = result
+    return results
+
+
+def query_openalex(paper_info):
+    """
+    Query OpenAlex API for paper metadata using DOI or search by title.
+    Returns dict with verified paper information including citations, authors, venue.
+    """
+    return resolve_papers([paper_info])[0]
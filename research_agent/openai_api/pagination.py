@@ -0,0 +1,70 @@
+"""
+Keyset (cursor) pagination of the conversation, message and paper lists.
+
+The list endpoints used to return every row in one response, megabytes for users with
+thousands of conversations or papers. They now return one page and an opaque cursor:
+
+- a page is ordered by (timestamp, id), the id breaking ties between equal timestamps
+- the cursor encodes the (timestamp, id) of the last row of the page; the next page is
+  the rows strictly beyond it, so a page costs one indexed range scan whatever its depth
+  (no OFFSET) and rows added in the meantime neither shift nor repeat later pages
+- limit+1 rows are read to know whether there is a further page
+
+Each ordering is backed by a composite index starting with the parent key (see the Meta
+indexes of Conversation, Message and Paper).
+"""
+
+import base64
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+
+
+def setting(name, default):
+    return getattr(settings, name, default)
+
+
+def encode_cursor(timestamp, pk):
+    return base64.urlsafe_b64encode(f'{timestamp.isoformat()}|{pk}'.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(timestamp, id) of a cursor. Raises ValueError for malformed cursors."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8')
+        timestamp, pk = raw.rsplit('|', 1)
+        return datetime.fromisoformat(timestamp), int(pk)
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError('Invalid cursor') from e
+
+
+def page_limit(value, default):
+    """Page size from a query parameter, within 1..PAGINATION_MAX_LIMIT."""
+    if value in (None, ''):
+        return default
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError('Invalid limit')
+    return max(1, min(limit, setting('PAGINATION_MAX_LIMIT', 200)))
+
+
+def keyset_page(queryset, field, cursor=None, limit=50, descending=True):
+    """
+    One page of queryset ordered by (field, id), and the cursor of the next page (None on the last page).
+
+    descending=True pages from the newest rows to the oldest.
+    """
+    if cursor:
+        timestamp, pk = decode_cursor(cursor)
+        if descending:
+            queryset = queryset.filter(Q(**{f'{field}__lt': timestamp}) | Q(**{field: timestamp, 'id__lt': pk}))
+        else:
+            queryset = queryset.filter(Q(**{f'{field}__gt': timestamp}) | Q(**{field: timestamp, 'id__gt': pk}))
+    ordering = [f'-{field}', '-id'] if descending else [field, 'id']
+    rows = list(queryset.order_by(*ordering)[:limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(getattr(rows[-1], field), rows[-1].id)
@@ -0,0 +1,145 @@
+"""
+Incremental parser for the assistant's {"text": ..., "papers": [...]} answers.
+
+The model streams its answer as JSON. PapersStreamParser is fed the raw deltas and reports,
+as early as possible:
+- ('text', delta): newly decoded characters of the top-level "text" string
+- ('paper', {'index': i, 'paper': {...}}): each entry of the top-level "papers" array once
+  its closing brace has arrived
+
+Anything before the first "{" (e.g. a ```json fence) and after the closing "}" is ignored.
+The final answer is still parsed with parse_papers_response(), which stays authoritative.
+"""
+
+import json
+
+
+def escape_complete(escape):
+    """True once a backslash escape inside a string is complete (surrogate pairs are kept together)."""
+    if len(escape) < 2:
+        return False
+    if escape[1] != 'u':
+        return True
+    if len(escape) < 6:
+        return False
+    try:
+        high_surrogate = 0xD800 <= int(escape[2:6], 16) <= 0xDBFF
+    except ValueError:
+        return True
+    if not high_surrogate or len(escape) == 12:
+        return True
+    # Wait for the \uXXXX of the low surrogate, unless something else follows
+    return (len(escape) > 6 and escape[6] != '\\') or (len(escape) > 7 and escape[7] != 'u')
+
+
+class PapersStreamParser:
+    def __init__(self):
+        self.buffer = ''
+        self.pos = 0
+        self.started = False
+        self.finished = False
+        self.stack = []          # open containers: '{' or '['
+        self.expect_key = False  # next string in the current object is a key
+        self.key = None          # last key read in the top-level object
+        self.in_string = False
+        self.string_start = 0
+        self.streaming_text = False
+        self.escape = None       # pending escape sequence inside the text string
+        self.papers_depth = None
+        self.paper_start = None
+        self.paper_count = 0
+
+    def feed(self, chunk):
+        """Consume a chunk of the answer. Returns the list of events it completed."""
+        self.buffer += chunk
+        events = []
+        text = []
+
+        while self.pos < len(self.buffer) and not self.finished:
+            char = self.buffer[self.pos]
+
+            if not self.started:
+                if char == '{':
+                    self.started = True
+                    self.stack.append('{')
+                    self.expect_key = True
+                self.pos += 1
+                continue
+
+            if self.in_string:
+                if self.streaming_text:
+                    if self.escape is not None:
+                        self.escape += char
+                        if escape_complete(self.escape):
+                            try:
+                                text.append(json.loads(f'"{self.escape}"'))
+                            except ValueError:
+                                pass
+                            self.escape = None
+                    elif char == '\\':
+                        self.escape = char
+                    elif char == '"':
+                        self.end_string()
+                    else:
+                        text.append(char)
+                elif char == '\\':
+                    # Skip the escaped character; \uXXXX digits need no special handling here
+                    self.pos += 1
+                elif char == '"':
+                    self.end_string()
+                self.pos += 1
+                continue
+
+            if char == '"':
+                self.in_string = True
+                self.string_start = self.pos
+                if len(self.stack) == 1 and not self.expect_key and self.key == 'text':
+                    self.streaming_text = True
+            elif char in '{[':
+                if char == '{' and self.papers_depth is not None and len(self.stack) == self.papers_depth:
+                    self.paper_start = self.pos
+                self.stack.append(char)
+                if char == '[' and len(self.stack) == 2 and self.key == 'papers':
+                    self.papers_depth = len(self.stack)
+                self.expect_key = char == '{'
+            elif char in '}]':
+                self.stack.pop()
+                if char == '}' and self.paper_start is not None and len(self.stack) == self.papers_depth:
+                    paper = self.complete_paper(self.buffer[self.paper_start:self.pos + 1])
+                    if paper:
+                        events.append(('paper', paper))
+                    self.paper_start = None
+                if char == ']' and len(self.stack) + 1 == self.papers_depth:
+                    self.papers_depth = None
+                if not self.stack:
+                    self.finished = True
+                self.expect_key = False
+            elif char == ',':
+                self.expect_key = self.stack[-1] == '{'
+            self.pos += 1
+
+        if text:
+            events.insert(0, ('text', ''.join(text)))
+        return events
+
+    def end_string(self):
+        """Close the current string; remember it if it was a top-level key."""
+        self.in_string = False
+        if self.streaming_text:
+            self.streaming_text = False
+        elif len(self.stack) == 1 and self.expect_key:
+            try:
+                self.key = json.loads(self.buffer[self.string_start:self.pos + 1])
+            except ValueError:
+                self.key = None
+            self.expect_key = False
+
+    def complete_paper(self, raw):
+        """Event payload for a closed papers entry (None if it is not a valid object)."""
+        index = self.paper_count
+        self.paper_count += 1
+        try:
+            paper = json.loads(raw)
+        except ValueError:
+            return None
+        return {'index': index, 'paper': paper} if isinstance(paper, dict) else None
@@ -0,0 +1,232 @@
+"""
+Token-budgeted prompt assembly for the comprehensive response evaluation.
+
+The evaluation prompt used to embed the full system prompt, the full conversation and
+json.dumps(indent=2) of every verification result (fetched page text, complete OpenAlex
+author lists, fields repeated from the claimed paper). build_evaluation_context() instead
+fits everything into VERIFICATION_PROMPT_TOKEN_BUDGET tokens:
+
+- verified papers are reduced to a bounded-size digest (clipped fields, first authors only)
+- the papers provided by the assistant keep their claim, with summaries clipped
+- the assistant response and the system prompt are clipped to a share of the budget
+- the conversation history gets the rest, newest messages first; older messages are
+  condensed to one clipped line each, and dropped when even that does not fit
+
+Token counts are estimated locally (no tokenizer download, no API call) and are slightly
+pessimistic for English text.
+"""
+
+import json
+import math
+import re
+
+from django.conf import settings
+
+# Instructions and output format of the evaluation prompt (not part of the budgeted sections)
+INSTRUCTION_TOKENS = 1000
+
+# Shares of the budget for sections that would otherwise crowd out the history
+RESPONSE_SHARE = 0.3
+SYSTEM_PROMPT_SHARE = 0.2
+
+# Characters kept per condensed history message
+CONDENSED_MESSAGE_CHARS = 160
+
+_token_pattern = re.compile(r'\w+|[^\w\s]', re.UNICODE)
+
+
+def estimate_tokens(text):
+    """
+    Estimate the number of tokens of text.
+
+    Words count as one token per 4 characters (rounded up), every punctuation or symbol
+    character as one token, which slightly overestimates BPE tokenizers for English.
+    """
+    if not text:
+        return 0
+    return sum(
+        math.ceil(len(token) / 4) if token[0].isalnum() or token[0] == '_' else 1
+        for token in _token_pattern.findall(text)
+    )
+
+
+def truncate_to_tokens(text, max_tokens, marker='\n[... truncated]'):
+    """Keep the beginning of text within max_tokens (estimated)."""
+    if not text or estimate_tokens(text) <= max_tokens:
+        return text or ''
+    if max_tokens <= 0:
+        return ''
+    # Start from the character ratio of the whole text, then shrink until it fits
+    keep = int(len(text) * max_tokens / estimate_tokens(text))
+    while keep > 0 and estimate_tokens(text[:keep]) + estimate_tokens(marker) > max_tokens:
+        keep = int(keep * 0.9)
+    return text[:keep].rstrip() + marker
+
+
+def clip(value, max_chars):
+    if not isinstance(value, str) or len(value) <= max_chars:
+        return value
+    return value[:max_chars].rstrip() + '...'
+
+
+def compact_json(data):
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+def paper_digest(verified_paper):
+    """
+    Fixed-size digest of a paper verification result.
+
+    Drops the fetched page text, the claim fields (already in the papers section) and all but
+    the first authors from OpenAlex; clips free-text notes and issue lists.
+    """
+    content = verified_paper.get('content_fetch') or {}
+    openalex = verified_paper.get('openalex_metadata') or {}
+    match = verified_paper.get('content_verification') or {}
+    quality = verified_paper.get('paper_quality') or {}
+    summary = verified_paper.get('summary_evaluation') or {}
+
+    digest = {
+        'paper_index': verified_paper.get('paper_index'),
+        'title': clip(verified_paper.get('title'), 150),
+    }
+
+    if content.get('success'):
+        digest['fetched'] = {
+            'title': clip(content.get('title'), 150),
+            'authors': clip(content.get('authors'), 100),
+            'date': content.get('date'),
+        }
+    else:
+        digest['fetched'] = {'error': clip(content.get('error'), 80)}
+
+    if openalex.get('success'):
+        authors = openalex.get('authors') or []
+        digest['openalex'] = {
+            'title': clip(openalex.get('title'), 150),
+            'year': openalex.get('publication_year'),
+            'cited_by': openalex.get('cited_by_count'),
+            'venue': clip((openalex.get('venue') or {}).get('name'), 80),
+            'authors': [clip(a.get('name'), 40) for a in authors[:3]] + ([f'+{len(authors) - 3} more'] if len(authors) > 3 else []),
+            'max_author_h_index': max((a.get('h_index') or 0 for a in authors), default=None),
+        }
+    else:
+        digest['openalex'] = {'error': clip(openalex.get('error'), 80)}
+
+    digest['content_match'] = {
+        'matches': match.get('matches'),
+        'confidence': match.get('confidence'),
+        'title/author/date': [match.get('title_match'), match.get('author_match'), match.get('date_match')],
+        'issues': [clip(issue, 100) for issue in (match.get('issues') or [])[:3]],
+    }
+    digest['credibility_score'] = verified_paper.get('credibility_score', quality.get('credibility_score'))
+    digest['quality_score'] = verified_paper.get('overall_quality', quality.get('quality_score'))
+    digest['summary_evaluation'] = {
+        'accurate': summary.get('accurate'),
+        'score': summary.get('score'),
+        'issues': [clip(issue, 100) for issue in (summary.get('issues') or [])[:3]],
+    }
+    digest['assessment'] = clip(verified_paper.get('overall_assessment'), 300)
+    if verified_paper.get('evaluation_error'):
+        digest['evaluation_error'] = clip(verified_paper['evaluation_error'], 80)
+    return digest
+
+
+def claimed_papers(papers_data):
+    """The papers as provided by the assistant, with long summaries clipped."""
+    return [
+        {
+            'paper_index': i,
+            'title': clip(paper.get('title'), 200),
+            'authors': clip(paper.get('authors'), 150),
+            'date': paper.get('date'),
+            'link': paper.get('link'),
+            'summary': clip(paper.get('summary'), 600),
+        }
+        for i, paper in enumerate(papers_data)
+    ]
+
+
+def fit_history(conversation_history, max_tokens):
+    """
+    Render the conversation newest-first into max_tokens.
+
+    Recent messages are kept in full; once they no longer fit, older messages are condensed
+    to one clipped line and finally omitted. Returns (text, stats).
+    """
+    lines = []
+    used = 0
+    full = condensed = 0
+    for i, msg in enumerate(reversed(conversation_history)):
+        line = f"{msg['role'].upper()}: {msg['content']}"
+        tokens = estimate_tokens(line)
+        if condensed == 0 and used + tokens <= max_tokens:
+            full += 1
+        else:
+            line = f"{msg['role'].upper()} (condensed): {clip(' '.join(msg['content'].split()), CONDENSED_MESSAGE_CHARS)}"
+            tokens = estimate_tokens(line)
+            if used + tokens > max_tokens:
+                break
+            condensed += 1
+        lines.append(line)
+        used += tokens
+
+    omitted = len(conversation_history) - full - condensed
+    if omitted:
+        lines.append(f"[{omitted} earlier message(s) omitted]")
+    lines.reverse()
+    return "\n".join(lines), {'full': full, 'condensed': condensed, 'omitted': omitted}
+
+
+def build_evaluation_context(conversation_history, system_prompt, assistant_response,
+                             papers_data, verified_papers, budget=None):
+    """
+    Assemble the budgeted sections of the comprehensive evaluation prompt.
+
+    conversation_history is a list of {'role', 'content'} dicts in chronological order;
+    a trailing assistant message equal to assistant_response is dropped (it is shown on its own).
+
+    Returns dict with the rendered sections (system_prompt, history, assistant_response,
+    papers, verified_papers) and token_counts (estimated tokens per section, total, budget and
+    history message counts).
+    """
+    if budget is None:
+        budget = getattr(settings, 'VERIFICATION_PROMPT_TOKEN_BUDGET', 12000)
+
+    history = list(conversation_history)
+    if history and history[-1]['role'] == 'assistant' and history[-1]['content'] == assistant_response:
+        history.pop()
+
+    verified = "\n".join(compact_json(paper_digest(paper)) for paper in verified_papers)
+    papers = "\n".join(compact_json(paper) for paper in claimed_papers(papers_data))
+    response = truncate_to_tokens(assistant_response, int(budget * RESPONSE_SHARE))
+    system = truncate_to_tokens(system_prompt, int(budget * SYSTEM_PROMPT_SHARE))
+
+    counts = {
+        'instructions': INSTRUCTION_TOKENS,
+        'verified_papers': estimate_tokens(verified),
+        'papers': estimate_tokens(papers),
+        'assistant_response': estimate_tokens(response),
+        'system_prompt': estimate_tokens(system),
+    }
+    remaining = budget - sum(counts.values())
+    if remaining < 0:
+        # Papers are what is being evaluated; shrink the system prompt before the history vanishes
+        system = truncate_to_tokens(system, max(0, counts['system_prompt'] + remaining))
+        counts['system_prompt'] = estimate_tokens(system)
+        remaining = budget - sum(counts.values())
+
+    history_text, history_stats = fit_history(history, max(0, remaining))
+    counts['history'] = estimate_tokens(history_text)
+    counts['total'] = sum(counts.values())
+    counts['budget'] = budget
+    counts['history_messages'] = history_stats
+
+    return {
+        'system_prompt': system,
+        'history': history_text,
+        'assistant_response': response,
+        'papers': papers,
+        'verified_papers': verified,
+        'token_counts': counts,
+    }
@@ -0,0 +1,127 @@
+"""
+Response payloads of the conversation endpoints, built from prefetched querysets.
+
+conversation_detail used to run m.verifications.first() and then the paper verifications
+query for every message, and conversation_list loaded the last message of every
+conversation, so the number of queries grew with the length of the history and the number
+of conversations. The querysets here fetch everything a payload needs up front, with a
+fixed number of queries:
+
+- conversation_list: one query on the conversations, whose preview, message count and last
+  activity are maintained when messages are saved (see Message.save), along the
+  (project, last activity) index
+- conversation_detail: a page of messages, then their verifications, then the paper
+  verifications with their shared cache entries (select_related)
+
+The serialize_* functions only read relations through .all(), so they use the prefetched
+rows; on objects fetched without these querysets they still work, one query per relation.
+benchmark_conversation_queries checks the query counts on a large seeded database. Lists
+are paged with keyset cursors (see pagination.py).
+"""
+
+from django.db.models import Prefetch
+
+from .models import PaperVerification, Verification
+from .pagination import keyset_page
+
+
+# ============ QUERYSETS ============
+
+def verifications_prefetch():
+    """Verifications of messages (newest first) with their paper verifications and cache entries."""
+    return Prefetch(
+        'verifications',
+        queryset=Verification.objects.prefetch_related(
+            Prefetch('paper_verification_details', queryset=PaperVerification.objects.select_related('cache_entry'))
+        ),
+    )
+
+
+def conversation_messages(conversation):
+    """Messages of a conversation with everything serialize_message reads (ordered by the caller)."""
+    return conversation.messages.prefetch_related(verifications_prefetch())
+
+
+def project_conversations(project):
+    """Conversations of a project with the fields of the sidebar (paged by last_activity_at)."""
+    return project.conversations.only(
+        'id', 'project', 'title', 'preview', 'message_count', 'last_activity_at', 'updated_at'
+    )
+
+
+# ============ SERIALIZERS ============
+
+def serialize_verification(verification):
+    """Serialize a Verification for API responses."""
+    return {
+        'id': verification.id,
+        'message_id': verification.message_id,
+        'confidence_score': verification.confidence_score,
+        'textual_verification': verification.textual_verification,
+        'paper_verifications': verification.get_paper_verifications(),
+        'summary': verification.summary,
+        'created_at': verification.created_at.isoformat()
+    }
+
+
+def serialize_message(message):
+    """
+    A message of the conversation history, with its latest verification if there is one.
+    Assistant answers are returned parsed (Message.payload), like in the chat responses.
+    """
+    data = {
+        'id': message.id,
+        'role': message.role,
+        'content': message.content if message.payload is None else message.payload,
+        'created_at': message.created_at.isoformat()
+    }
+    # Verifications are ordered newest first; indexing the prefetched list adds no query
+    verifications = list(message.verifications.all())
+    if verifications:
+        data['verification'] = serialize_verification(verifications[0])
+    return data
+
+
+def serialize_conversation_summary(conversation):
+    """A conversation in the sidebar list (see project_conversations)."""
+    return {
+        'id': conversation.id,
+        'title': conversation.title,
+        'updated_at': conversation.updated_at.isoformat(),
+        'preview': conversation.preview,
+        'message_count': conversation.message_count,
+        'last_activity_at': conversation.last_activity_at.isoformat()
+    }
+
+
+def serialize_conversation(conversation, before=None, limit=50):
+    """
+    A conversation with its most recent `limit` messages (oldest first) before the cursor
+    `before`; messages_cursor pages further back (None once the first message is included).
+    """
+    messages, cursor = keyset_page(conversation_messages(conversation), 'created_at', before, limit)
+    return {
+        'id': conversation.id,
+        'title': conversation.title,
+        'title_status': conversation.title_status,
+        'updated_at': conversation.updated_at.isoformat(),
+        'message_count': conversation.message_count,
+        'messages': [serialize_message(message) for message in reversed(messages)],
+        'messages_cursor': cursor
+    }
+
+
+def serialize_paper(paper):
+    """A saved paper of a project."""
+    return {
+        'id': paper.id,
+        'title': paper.title,
+        'authors': paper.authors,
+        'date': paper.date,
+        'type': paper.paper_type,
+        'link': paper.link,
+        'summary': paper.summary,
+        'bibtex': paper.bibtex,
+        'inContext': paper.in_context,
+        'created_at': paper.created_at.isoformat()
+    }
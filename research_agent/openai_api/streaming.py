@@ -0,0 +1,98 @@
+"""
+Server-Sent Events helpers shared by the streaming endpoints.
+
+The streaming views are synchronous generators. Served by an ASGI server, Django would
+consume such a generator with sync_to_async(list) and send the whole body at once, so
+ThreadedStreamingHttpResponse runs the generator in a thread of its own instead and
+hands each part to the event loop as soon as it is produced.
+"""
+
+import asyncio
+import json
+import threading
+
+from django.db import connections
+from django.http import StreamingHttpResponse
+
+# Parts buffered between the generator thread and the event loop (backpressure beyond that)
+STREAM_QUEUE_SIZE = 16
+
+
+class ThreadedStreamingHttpResponse(StreamingHttpResponse):
+    """
+    StreamingHttpResponse that serves a synchronous iterator part by part under ASGI.
+
+    The iterator runs in a dedicated thread (blocking reads and ORM queries stay on one
+    thread, whose database connections are closed at the end) and stops at its next part
+    once the client has gone away. Under WSGI the response behaves like its parent.
+    """
+
+    async def __aiter__(self):
+        if self.is_async:
+            async for part in super().__aiter__():
+                yield part
+            return
+
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+        finished = loop.create_future()
+        stop = threading.Event()
+
+        def hand_over(item):
+            """Queue an item, waiting while the queue is full. False once the client has gone away."""
+            future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+            while not stop.is_set():
+                try:
+                    future.result(timeout=0.5)
+                    return True
+                except TimeoutError:
+                    continue
+            future.cancel()
+            return False
+
+        def produce():
+            try:
+                for part in self.streaming_content:
+                    if not hand_over((part, None)):
+                        break
+                else:
+                    hand_over((None, None))
+            except Exception as e:
+                hand_over((None, e))
+            finally:
+                # Close the generator here: it must not be closed while this thread runs it
+                close = getattr(self._iterator, 'close', None)
+                if close:
+                    close()
+                connections.close_all()
+                try:
+                    loop.call_soon_threadsafe(finished.set_result, None)
+                except RuntimeError:
+                    pass  # event loop already closed
+
+        threading.Thread(target=produce, name='streaming-response', daemon=True).start()
+        try:
+            while True:
+                part, error = await queue.get()
+                if error is not None:
+                    raise error
+                if part is None:
+                    return
+                yield part
+        finally:
+            stop.set()
+            await asyncio.shield(finished)
+
+
+def sse_event(event, data):
+    """Format a single Server-Sent Event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def sse_response(events):
+    """Wrap an iterator of formatted events in a non-buffered streaming response."""
+    response = ThreadedStreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Disable proxy buffering (nginx) so events reach the client immediately
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,278 @@
+"""
+System prompt assembly with a cached context-papers block.
+
+build_system_prompt() used to concatenate every in-context paper of the project on every
+turn, and inserted the search constraints and persona lines before the papers list, so the
+prompt changed near its start whenever a filter or option changed and the provider's prompt
+cache (which matches on the longest identical prefix) was of little use. Instead:
+
+- sections are ordered from most to least stable: the static instructions (or the custom
+  prompt), then the project's context papers, then the per-request response preferences
+  (verbosity, thinking level, persona) and search constraints
+- context papers are listed oldest first, so adding a paper only appends to the block
+- the rendered papers block is memoized per project in an in-process LRU of at most
+  SYSTEM_PROMPT_CACHE_SIZE entries, keyed by (project id, Project.context_version,
+  PROMPT_LAYOUT_VERSION)
+- papers beyond CONTEXT_PAPERS_TOKEN_BUDGET tokens are not all listed: the cached entry then
+  holds a ContextIndex (see context_index.py) and each turn lists the (at most
+  CONTEXT_PAPERS_TOP_K) papers most relevant to the user's message within the budget; that
+  block differs between turns, so the stable prefix ends before it
+
+Project.context_version is bumped by the Paper signal handlers in models.py whenever a paper
+of the project is created, edited, toggled in or out of context, or deleted (saves that only
+touch bibtex/updated_at are ignored), so a stale block is never looked up again and simply
+ages out of the LRU; every process sees the same version through the database. Budget
+settings changed in a running process apply to projects cached after clear().
+"""
+
+from collections import OrderedDict
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .context_index import ContextIndex, paper_vectors
+from .prompt_budget import estimate_tokens
+
+# Bump when the rendering below changes, so blocks cached in the old layout are not reused
+PROMPT_LAYOUT_VERSION = 1
+
+RESEARCH_SYSTEM_PROMPT = """You are a research assistant that helps users find and understand high-quality academic papers.
+
+You must respond with valid JSON in this exact format:
+{
+    "text": "Your conversational response here. Explain, analyze, or discuss as needed.",
+    "papers": [
+        {
+            "title": "Full paper title",
+            "authors": "Author1, Author2, et al.",
+            "date": "YYYY",
+            "type": "PDF",
+            "link": "https://arxiv.org/abs/... or DOI link",
+            "summary": "Brief abstract/summary (2-3 sentences)"
+        }
+    ]
+}
+
+Guidelines:
+- The "text" field is for your conversational response - use it to explain, provide context, or answer questions
+- The "papers" array contains relevant academic papers (include 3-5 when recommending papers)
+- Papers array can be empty [] if no papers are relevant to the response
+- Only include peer-reviewed, high-quality papers from reputable sources (arXiv, IEEE, ACM, Nature, Science, PubMed, etc.)
+- Always include a direct link to the paper (arXiv, DOI, or publisher URL)
+- Ensure all paper fields are filled accurately
+"""
+
+_lock = threading.Lock()
+# (project id, context version, layout version) -> ProjectContext, least recently used first
+_contexts = OrderedDict()
+_counters = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+CONTEXT_HEADER = "\n\n## Reference Papers (User's Saved Sources)\n"
+FULL_CONTEXT_INTRO = "The user has the following papers in their research context (CURRENT PROJECT ONLY). Reference these when relevant:\n\n"
+SELECTED_CONTEXT_INTRO = (
+    "The user has {total} papers in their research context (CURRENT PROJECT ONLY); listed below are the {count} "
+    "most relevant to the current message. Reference these when relevant:\n\n"
+)
+
+
+def setting(name, default):
+    return getattr(settings, name, default)
+
+
+# ============ CONTEXT PAPERS ============
+
+def context_papers(project):
+    """In-context papers of a project, oldest first (new papers are appended to the block)."""
+    return project.papers.filter(in_context=True).only(
+        'id', 'project', 'title', 'authors', 'date', 'link', 'summary', 'term_vector'
+    ).order_by('created_at', 'id')
+
+
+def render_paper(paper):
+    """A paper's entry in the context block (without its number)."""
+    entry = f"**{paper.title}**\n   - Authors: {paper.authors}\n   - Date: {paper.date}\n"
+    if paper.link:
+        entry += f"   - Link: {paper.link}\n"
+    return entry + f"   - Summary: {paper.summary}\n\n"
+
+
+def render_context_block(entries, intro=FULL_CONTEXT_INTRO):
+    """The '## Reference Papers' prompt section for a list of paper entries ('' without entries)."""
+    if not entries:
+        return ''
+    return CONTEXT_HEADER + intro + ''.join(f"{i}. {entry}" for i, entry in enumerate(entries, 1))
+
+
+class ProjectContext:
+    """
+    Rendered context papers of one version of a project.
+
+    Papers within CONTEXT_PAPERS_TOKEN_BUDGET are all listed, in one block rendered once.
+    Beyond the budget, a ContextIndex picks the papers for each message (see block()).
+    """
+
+    def __init__(self, papers):
+        budget = setting('CONTEXT_PAPERS_TOKEN_BUDGET', 6000)
+        self.entries = [render_paper(paper) for paper in papers]
+        self.tokens = [estimate_tokens(entry) for entry in self.entries]
+        self.total_tokens = sum(self.tokens)
+        if self.total_tokens <= budget:
+            self.full_block, self.index = render_context_block(self.entries), None
+        else:
+            self.full_block, self.index = None, ContextIndex(paper_vectors(papers))
+
+    def select(self, query):
+        """Positions of the papers most relevant to query within the token budget, oldest first."""
+        budget = setting('CONTEXT_PAPERS_TOKEN_BUDGET', 6000) - estimate_tokens(CONTEXT_HEADER + SELECTED_CONTEXT_INTRO)
+        top_k = setting('CONTEXT_PAPERS_TOP_K', 30)
+        selected, used = [], 0
+        for position in self.index.rank(query):
+            if used + self.tokens[position] <= budget:
+                selected.append(position)
+                used += self.tokens[position]
+                if len(selected) == top_k:
+                    break
+        return sorted(selected)
+
+    def block(self, query=''):
+        """The context block for a message: all papers, or those relevant to query if they exceed the budget."""
+        if self.index is None:
+            return self.full_block
+        selected = self.select(query)
+        intro = SELECTED_CONTEXT_INTRO.format(total=len(self.entries), count=len(selected))
+        return render_context_block([self.entries[position] for position in selected], intro)
+
+
+def cache_key(project):
+    return (project.id, project.context_version, PROMPT_LAYOUT_VERSION)
+
+
+def cached_context(key):
+    with _lock:
+        context = _contexts.get(key)
+        if context is None:
+            _counters['misses'] += 1
+            return None
+        _contexts.move_to_end(key)
+        _counters['hits'] += 1
+        return context
+
+
+def store_context(key, context):
+    with _lock:
+        _contexts[key] = context
+        _contexts.move_to_end(key)
+        while len(_contexts) > setting('SYSTEM_PROMPT_CACHE_SIZE', 256):
+            _contexts.popitem(last=False)
+            _counters['evictions'] += 1
+
+
+def load_context(project, key):
+    context = ProjectContext(list(context_papers(project)))
+    store_context(key, context)
+    return context
+
+
+def project_context(project):
+    """The cached ProjectContext of the project's current version (rendered on a miss)."""
+    key = cache_key(project)
+    return cached_context(key) or load_context(project, key)
+
+
+def context_block(project, query=''):
+    """Context-papers block of a project for the user message query ('' for no project)."""
+    if project is None:
+        return ''
+    return project_context(project).block(query)
+
+
+async def acontext_block(project, query=''):
+    """Async variant of context_block (renders on a miss in a worker thread)."""
+    if project is None:
+        return ''
+    key = cache_key(project)
+    context = cached_context(key) or await sync_to_async(load_context)(project, key)
+    return context.block(query)
+
+
+def clear():
+    """Drop all cached project contexts."""
+    with _lock:
+        _contexts.clear()
+
+
+def stats():
+    """Cache counters of this process."""
+    with _lock:
+        lookups = _counters['hits'] + _counters['misses']
+        return {
+            'projects': len(_contexts),
+            'max_projects': setting('SYSTEM_PROMPT_CACHE_SIZE', 256),
+            **_counters,
+            'hit_ratio': round(_counters['hits'] / lookups, 3) if lookups else None,
+        }
+
+
+# ============ PROMPT ============
+
+def response_preferences(verbosity, thinking_level, user_role=None, user_knowledge=None):
+    """Guideline lines for the per-request options of the default prompt."""
+    lines = []
+    # Adjust based on verbosity
+    if verbosity == "minimal":
+        lines.append("- Keep summaries very brief (1 sentence max)")
+    elif verbosity == "detailed":
+        lines.append("- Provide detailed summaries (3-4 sentences)")
+
+    # Adjust based on thinking level
+    if thinking_level == "high":
+        lines.append("- Include seminal/foundational papers in the field")
+        lines.append("- Consider interdisciplinary connections")
+    elif thinking_level == "low":
+        lines.append("- Focus only on the most directly relevant papers")
+
+    # Adjust based on user persona
+    if user_role:
+        lines.append(f"- Adopt the perspective of assisting a {user_role}.")
+    if user_knowledge:
+        lines.append(f"- Target explanations for someone with the following knowledge: {user_knowledge}.")
+    return lines
+
+
+def search_constraints(filters):
+    """Constraint lines for the search filters of a request."""
+    if not filters:
+        return []
+    constraints = []
+    if filters.get('yearStart'):
+        constraints.append(f"Published after {filters['yearStart']}")
+    if filters.get('yearEnd'):
+        constraints.append(f"Published before {filters['yearEnd']}")
+    if filters.get('authors'):
+        constraints.append(f"Authored by: {filters['authors']}")
+    if filters.get('domain'):
+        constraints.append(f"Specific Domain/Topic: {filters['domain']}")
+    return constraints
+
+
+def build_system_prompt(verbosity, thinking_level, user_role=None, user_knowledge=None, custom_prompt=None, papers_block='', filters=None):
+    """
+    Build the system prompt: static instructions (or custom_prompt), the context papers
+    block (see context_block), then response preferences and search constraints.
+    """
+    prompt = custom_prompt or RESEARCH_SYSTEM_PROMPT
+    prompt += papers_block or ''
+
+    # The options only refine the default prompt; a custom prompt is used as is
+    preferences = [] if custom_prompt else response_preferences(verbosity, thinking_level, user_role, user_knowledge)
+    if preferences:
+        prompt += "\n\n## Response Preferences\n" + ''.join(f"{line}\n" for line in preferences)
+
+    # Add Search Filters / Constraints
+    constraints = search_constraints(filters)
+    if constraints:
+        prompt += "\n\n## Search Constraints\nThe user has specified the following strict constraints for the papers you find. You MUST respect these filters:\n"
+        prompt += ''.join(f"- {c}\n" for c in constraints)
+
+    return prompt
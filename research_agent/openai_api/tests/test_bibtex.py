@@ -0,0 +1,49 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from openai_api import bibtex_builder
+from openai_api.models import Paper, Project
+
+EXISTING = '@article{vaswani2017,\n  title = {Attention Is All You Need}\n}'
+
+
+class ProjectGenerateBibtexTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('bibtex')
+        self.project = Project.objects.create(user=self.user, name='BibTeX')
+        self.with_bibtex = self.paper('Attention Is All You Need', EXISTING)
+        self.without = [self.paper(f'Paper {i}') for i in range(3)]
+        self.client.force_login(self.user)
+
+    def paper(self, title, bibtex=''):
+        return Paper.objects.create(
+            user=self.user, project=self.project, title=title, authors='Doe, J.', date='2024', summary='', bibtex=bibtex
+        )
+
+    def generate(self, overwrite):
+        def build_entries(papers, taken_keys):
+            self.taken_keys = set(taken_keys.keys)
+            return {paper.id: f'@misc{{paper{paper.id}}}' for paper in papers}
+
+        with mock.patch.object(bibtex_builder, 'build_entries', side_effect=build_entries) as build:
+            response = self.client.post(
+                f'/api/projects/{self.project.id}/generate-bibtex/', {'overwrite': overwrite}, content_type='application/json'
+            )
+        self.assertEqual(response.status_code, 200, response.content)
+        return {p.id for p in build.call_args.args[0]}, response.json()
+
+    def test_papers_with_bibtex_are_kept(self):
+        targets, data = self.generate(overwrite=False)
+        self.assertEqual(targets, {p.id for p in self.without})
+        self.assertEqual(self.taken_keys, {'vaswani2017'})
+        self.assertEqual(data['generated'], 3)
+        self.with_bibtex.refresh_from_db()
+        self.assertEqual(self.with_bibtex.bibtex, EXISTING)
+
+    def test_overwrite_regenerates_all_papers(self):
+        targets, data = self.generate(overwrite=True)
+        self.assertEqual(targets, {p.id for p in [self.with_bibtex, *self.without]})
+        self.assertEqual(self.taken_keys, set())
+        self.assertEqual(data['generated'], 4)
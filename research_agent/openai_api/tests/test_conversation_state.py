@@ -0,0 +1,154 @@
+import threading
+from types import ModuleType
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import path
+import httpx
+import openai
+
+from openai_api import openai_clients, views, views_async
+from openai_api.management.commands.openai_standin_server import standin_server
+from openai_api.models import Conversation
+
+
+def sync_urls():
+    """A URLconf routing conversation_chat to the synchronous view."""
+    conf = ModuleType('sync_conversation_chat_urls')
+    conf.urlpatterns = [path('api/conversations/<int:pk>/chat/', views.conversation_chat)]
+    return conf
+
+
+class ConversationStateTests(TestCase):
+    """
+    conversation_chat (async view, as routed by default) against the local OpenAI stand-in,
+    with and without OPENAI_CONVERSATION_STATE.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = standin_server(0)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f'http://127.0.0.1:{cls.server.server_address[1]}/v1'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        openai_clients.clear()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = User.objects.create_user('state')
+        self.user.profile.openai_api_key = 'sk-standin'
+        self.user.profile.save()
+        self.conversation = Conversation.objects.create(user=self.user, title='State')
+        self.client.force_login(self.user)
+        self.server.received.clear()
+
+    def reject_chains(self, error):
+        """(module, name, replacement) making chained calls of the stateful API call raise error."""
+        original = views_async.acall_openai_stateful
+
+        async def call(client, model, web_search, instructions, input_messages, previous_response_id=None):
+            if previous_response_id:
+                raise error
+            return await original(client, model, web_search, instructions, input_messages)
+        return views_async, 'acall_openai_stateful', call
+
+    def send(self, message):
+        response = self.client.post(
+            f'/api/conversations/{self.conversation.id}/chat/',
+            {'message': message, 'web_search': False}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def responses_requests(self):
+        return [request for path, request in self.server.received if path.endswith('/responses')]
+
+    def test_second_turn_sends_only_the_new_input(self):
+        with override_settings(OPENAI_BASE_URL=self.base_url, OPENAI_CONVERSATION_STATE=True):
+            self.send('Find papers on retrieval-augmented generation')
+            self.send('Which of them use a dense index?')
+
+        first, second = self.responses_requests()
+        self.assertNotIn('previous_response_id', first)
+        self.assertEqual(second['previous_response_id'], self.conversation.messages.filter(role='assistant').first().response_id)
+        self.assertEqual(second['input'], [{'role': 'user', 'content': 'Which of them use a dense index?'}])
+
+    def test_rejected_chain_replays_the_history(self):
+        # The stand-in forgets stored responses at once: the chained request gets a 400
+        server = standin_server(0, expire_after=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        base_url = f'http://127.0.0.1:{server.server_address[1]}/v1'
+        with override_settings(OPENAI_BASE_URL=base_url, OPENAI_CONVERSATION_STATE=True, OPENAI_MAX_RETRIES=0):
+            self.send('Find papers on retrieval-augmented generation')
+            self.send('Which of them use a dense index?')
+
+        requests = [request for path, request in server.received if path.endswith('/responses')]
+        self.assertEqual(len(requests), 3)
+        chained, replayed = requests[1], requests[2]
+        self.assertIn('previous_response_id', chained)
+        self.assertNotIn('previous_response_id', replayed)
+        self.assertEqual([item['role'] for item in replayed['input']], ['user', 'assistant', 'user'])
+
+    def test_missing_response_replays_the_history(self):
+        not_found = openai.NotFoundError(
+            'Response not found', body=None,
+            response=httpx.Response(404, request=httpx.Request('POST', f'{self.base_url}/responses')),
+        )
+        with override_settings(OPENAI_BASE_URL=self.base_url, OPENAI_CONVERSATION_STATE=True), \
+                mock.patch.object(*self.reject_chains(not_found)):
+            self.send('Find papers on retrieval-augmented generation')
+            self.send('Which of them use a dense index?')
+
+        first, replayed = self.responses_requests()
+        self.assertNotIn('previous_response_id', replayed)
+        self.assertEqual([item['role'] for item in replayed['input']], ['user', 'assistant', 'user'])
+
+    def test_unrelated_bad_request_is_not_replayed(self):
+        too_long = openai.BadRequestError(
+            'Input exceeds the context window', body={'code': 'context_length_exceeded', 'param': 'input'},
+            response=httpx.Response(400, request=httpx.Request('POST', f'{self.base_url}/responses')),
+        )
+        with override_settings(OPENAI_BASE_URL=self.base_url, OPENAI_CONVERSATION_STATE=True), \
+                mock.patch.object(*self.reject_chains(too_long)):
+            self.send('Find papers on retrieval-augmented generation')
+            response = self.client.post(
+                f'/api/conversations/{self.conversation.id}/chat/',
+                {'message': 'Which of them use a dense index?', 'web_search': False}, content_type='application/json'
+            )
+
+        self.assertEqual(response.status_code, 500)
+        self.assertIn('context window', response.json()['error'])
+        # Only the first turn reached the API: the failed chained call was not replayed
+        self.assertEqual(len(self.responses_requests()), 1)
+
+    def test_opt_out_replays_the_history_with_chat_completions(self):
+        with override_settings(OPENAI_BASE_URL=self.base_url, OPENAI_CONVERSATION_STATE=False):
+            self.send('Find papers on retrieval-augmented generation')
+            self.send('Which of them use a dense index?')
+
+        self.assertEqual(self.responses_requests(), [])
+        first, second = [request for path, request in self.server.received if path.endswith('/chat/completions')]
+        self.assertEqual([m['role'] for m in second['messages']], ['system', 'user', 'assistant', 'user'])
+        self.assertFalse(self.conversation.messages.exclude(response_id='').exists())
+
+
+@override_settings(ROOT_URLCONF=sync_urls())
+class SyncConversationStateTests(ConversationStateTests):
+    """The same cases with the synchronous view (ASYNC_LLM_VIEWS = False)."""
+
+    def reject_chains(self, error):
+        original = views.call_openai_stateful
+
+        def call(client, model, web_search, instructions, input_messages, previous_response_id=None):
+            if previous_response_id:
+                raise error
+            return original(client, model, web_search, instructions, input_messages)
+        return views, 'call_openai_stateful', call
@@ -0,0 +1,113 @@
+import threading
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from openai_api import history, openai_clients
+from openai_api.management.commands.openai_standin_server import standin_server
+from openai_api.models import Conversation, Message
+from .test_conversation_state import sync_urls
+
+ANSWER = {'text': 'Here are some papers.', 'papers': [{'title': 'Stand-in Paper'}]}
+
+
+@override_settings(CHAT_HISTORY_RECENT_TURNS=4, CHAT_HISTORY_COMPACT_TURNS=8, CHAT_HISTORY_SUMMARY_BATCH=4)
+class RollingSummaryTests(TestCase):
+    """The rolling summary is folded after the answer, never while the history is built."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = standin_server(0)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f'http://127.0.0.1:{cls.server.server_address[1]}/v1'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        openai_clients.clear()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = User.objects.create_user('history')
+        self.user.profile.openai_api_key = 'sk-standin'
+        self.user.profile.save()
+        self.conversation = Conversation.objects.create(user=self.user, title='History')
+        self.client.force_login(self.user)
+        self.server.received.clear()
+
+    def add_turns(self, count):
+        for i in range(count):
+            Message.objects.create(conversation=self.conversation, role='user', content=f'Question {i}')
+            Message.objects.create(conversation=self.conversation, role='assistant', content='{}', payload=ANSWER)
+
+    def history_roles(self):
+        return [item['role'] for item in history.build_history(self.conversation, 'System prompt')]
+
+    def test_build_history_sends_unsummarized_turns_without_the_llm(self):
+        self.add_turns(20)
+        roles = self.history_roles()
+        self.assertEqual(self.server.received, [])
+        self.assertEqual(roles.count('user'), 20)
+        self.conversation.refresh_from_db()
+        self.assertEqual(self.conversation.summarized_through_message_id, 0)
+
+    def test_fold_summary_folds_the_overflow(self):
+        self.add_turns(20)
+        with override_settings(OPENAI_BASE_URL=self.base_url):
+            self.assertEqual(history.fold_summary(self.conversation.id, 'gpt-5.2'), 8)
+
+        self.conversation.refresh_from_db()
+        eighth_answer = self.conversation.messages.filter(role='assistant').order_by('id')[7]
+        self.assertEqual(self.conversation.summarized_through_message_id, eighth_answer.id)
+        self.assertTrue(self.conversation.history_summary)
+        roles = self.history_roles()
+        self.assertEqual(roles[:2], ['system', 'system'])
+        self.assertEqual(roles.count('user'), 12)
+
+    def test_fold_summary_keeps_a_concurrent_fold(self):
+        self.add_turns(20)
+        # Another request folded the same turns while the summary call was running
+        summarize = history.summarize_turns
+
+        def fold_elsewhere(*args):
+            Conversation.objects.filter(pk=self.conversation.pk).update(
+                history_summary='Folded elsewhere', summarized_through_message_id=1
+            )
+            return summarize(*args)
+
+        with override_settings(OPENAI_BASE_URL=self.base_url), \
+                mock.patch.object(history, 'summarize_turns', fold_elsewhere):
+            self.assertEqual(history.fold_summary(self.conversation.id, 'gpt-5.2'), 0)
+        self.conversation.refresh_from_db()
+        self.assertEqual(self.conversation.history_summary, 'Folded elsewhere')
+
+    def chat(self):
+        response = self.client.post(
+            f'/api/conversations/{self.conversation.id}/chat/',
+            {'message': 'Which of them use a dense index?', 'web_search': False},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+
+    def test_chat_starts_the_summary_once_turns_are_due(self):
+        self.add_turns(15)
+        with override_settings(OPENAI_BASE_URL=self.base_url), \
+                mock.patch('openai_api.views_async.start_summary') as start_summary:
+            self.chat()
+        # Only the chat request itself went to the API
+        self.assertEqual(len(self.server.received), 1)
+        start_summary.assert_called_once_with(self.conversation.id, 'gpt-5.2')
+
+    def test_sync_chat_starts_the_summary_after_commit(self):
+        self.add_turns(14)
+        with override_settings(OPENAI_BASE_URL=self.base_url, ROOT_URLCONF=sync_urls()), \
+                mock.patch('openai_api.views.start_summary') as start_summary:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.chat()
+            start_summary.assert_not_called()
+            with self.captureOnCommitCallbacks(execute=True):
+                self.chat()
+        start_summary.assert_called_once_with(self.conversation.id, 'gpt-5.2')
@@ -0,0 +1,68 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from openai_api import http_cache
+
+HEADERS = {'cache-control': 'max-age=3600'}
+
+
+def result(size=100):
+    return {'success': True, 'text': 'x' * size}
+
+
+class HttpCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(HTTP_CACHE_DIR=directory.name, HTTP_CACHE_HIT_FLUSH=3)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.addCleanup(http_cache.clear)
+        http_cache.clear()
+
+    def test_hit_touches_the_entry_without_rewriting_it(self):
+        url = 'https://example.org/paper'
+        http_cache.store(url, 200, HEADERS, result())
+        path = http_cache.entry_path(url)
+        os.utime(path, (0, 0))
+        inode = os.stat(path).st_ino
+
+        cached, _ = http_cache.lookup(url)
+        self.assertEqual(cached, result())
+        self.assertEqual(os.stat(path).st_ino, inode)
+        self.assertGreater(os.stat(path).st_mtime, 0)
+
+    def test_hits_are_counted(self):
+        url = 'https://example.org/paper'
+        http_cache.store(url, 200, HEADERS, result())
+        for _ in range(4):
+            http_cache.lookup(url)
+        # 3 written to the entry, 1 still tallied in memory
+        self.assertEqual(http_cache.read_entry(http_cache.entry_path(url))['hits'], 3)
+        self.assertEqual(http_cache.stats()['hits'], 4)
+
+    def test_store_scans_only_once_under_the_limit(self):
+        with mock.patch.object(http_cache, 'scan', wraps=http_cache.scan) as scan:
+            for i in range(5):
+                http_cache.store(f'https://example.org/paper/{i}', 200, HEADERS, result())
+        self.assertEqual(scan.call_count, 1)
+
+    def test_store_evicts_least_recently_used_over_the_limit(self):
+        urls = [f'https://example.org/paper/{i}' for i in range(3)]
+        for i, url in enumerate(urls):
+            http_cache.store(url, 200, HEADERS, result(1000))
+            os.utime(http_cache.entry_path(url), (i, i))
+        http_cache.lookup(urls[0])  # now the most recently used
+
+        # Room for three entries (their sizes differ by a few bytes of timestamps)
+        entry_size = os.path.getsize(http_cache.entry_path(urls[0]))
+        with override_settings(HTTP_CACHE_MAX_BYTES=3 * entry_size + 100):
+            http_cache.store('https://example.org/paper/3', 200, HEADERS, result(1000))
+
+        self.assertTrue(os.path.exists(http_cache.entry_path(urls[0])))
+        self.assertFalse(os.path.exists(http_cache.entry_path(urls[1])))
+        self.assertTrue(os.path.exists(http_cache.entry_path(urls[2])))
+        self.assertEqual(http_cache.stats()['entries'], 3)
@@ -0,0 +1,43 @@
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from openai_api import views_verification
+
+METADATA = {'success': True, 'title': 'Attention Is All You Need'}
+
+
+def slow_fetch(link):
+    time.sleep(0.5)
+    return {'success': True, 'content': 'Late'}
+
+
+def failing_fetch(link):
+    raise ConnectionError('Connection reset')
+
+
+@override_settings(VERIFICATION_FETCH_DEADLINE=0.1, VERIFICATION_OPENALEX_DEADLINE=1)
+class FetchContentAndMetadataTests(SimpleTestCase):
+    def fetch(self, fetch_paper_content):
+        timings = {}
+        with mock.patch.object(views_verification, 'fetch_paper_content', fetch_paper_content):
+            content, metadata = views_verification.fetch_content_and_metadata(
+                'https://arxiv.org/abs/1706.03762', {}, timings, lambda: METADATA
+            )
+        self.assertEqual(metadata, METADATA)
+        return content, timings
+
+    def test_fetch_past_its_deadline_keeps_the_deadline_timing(self):
+        content, timings = self.fetch(slow_fetch)
+        self.assertFalse(content['success'])
+        self.assertEqual(timings['content_fetch'], 0.1)
+        # The fetch finishing in the background does not touch the recorded timings
+        time.sleep(0.6)
+        self.assertEqual(timings['content_fetch'], 0.1)
+
+    def test_failed_fetch_reports_the_error_and_its_duration(self):
+        content, timings = self.fetch(failing_fetch)
+        self.assertEqual(content, {'error': 'Fetch failed: Connection reset', 'success': False})
+        self.assertLess(timings['content_fetch'], 0.1)
+        self.assertIn('openalex', timings)
@@ -0,0 +1,74 @@
+import json
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from openai_api.models import (
+    Conversation, Message, PaperVerification, PaperVerificationCache, Project, Verification,
+)
+
+# Queries of a request, session and user lookups included (see benchmark_conversation_queries)
+LIST_QUERIES = 4
+DETAIL_QUERIES = 6
+
+
+class ConversationQueryCountTests(TestCase):
+    """conversation_list and conversation_detail take the same number of queries whatever the size."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('queries')
+        cls.cache_entry = PaperVerificationCache.objects.create(
+            identifier='https://example.org/paper', identifier_type='url',
+            verified_at=timezone.now(), last_used_at=timezone.now(),
+            openalex_metadata={'success': True}, content_fetch={'success': True},
+        )
+        cls.small_project, cls.small_conversation = cls.seed(conversation_count=1, message_count=2)
+        cls.large_project, cls.large_conversation = cls.seed(conversation_count=60, message_count=40)
+
+    @classmethod
+    def seed(cls, conversation_count, message_count, paper_count=3):
+        """A project whose first conversation has message_count verified messages (the others 2)."""
+        project = Project.objects.create(user=cls.user, name='Queries')
+        payload = {'text': 'Here are some papers.', 'papers': [{'title': f'Paper {i}'} for i in range(paper_count)]}
+        conversations = []
+        for i in range(conversation_count):
+            conversation = Conversation.objects.create(user=cls.user, project=project, title=f'Conversation {i}')
+            for j in range(message_count if i == 0 else 2):
+                if j % 2 == 0:
+                    Message.objects.create(conversation=conversation, role='user', content='Find papers')
+                    continue
+                message = Message.objects.create(
+                    conversation=conversation, role='assistant', content=json.dumps(payload), payload=payload
+                )
+                verification = Verification.objects.create(
+                    message=message, confidence_score=80.0, textual_verification={}, summary='Verified.'
+                )
+                PaperVerification.objects.bulk_create([
+                    PaperVerification(verification=verification, paper_index=k, title=f'Paper {k}',
+                                      cache_entry=cls.cache_entry if k % 2 else None)
+                    for k in range(paper_count)
+                ])
+            conversations.append(conversation)
+        return project, conversations[0]
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_conversation_list_query_count(self):
+        for project, count in ((self.small_project, 1), (self.large_project, 50)):
+            with self.subTest(conversations=count), self.assertNumQueries(LIST_QUERIES):
+                response = self.client.get(f'/api/conversations/?project_id={project.id}')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.json()['conversations']), count)
+
+    def test_conversation_detail_query_count(self):
+        for conversation, count in ((self.small_conversation, 2), (self.large_conversation, 40)):
+            with self.subTest(messages=count), self.assertNumQueries(DETAIL_QUERIES):
+                response = self.client.get(f'/api/conversations/{conversation.id}/')
+            self.assertEqual(response.status_code, 200)
+            messages = response.json()['messages']
+            self.assertEqual(len(messages), count)
+            verification = messages[1]['verification']
+            self.assertEqual(len(verification['paper_verifications']), 3)
@@ -0,0 +1,69 @@
+import asyncio
+import time
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from openai_api.models import Conversation, Message, Verification, VerificationJob, VerificationJobPaper
+
+
+async def read_stream(response):
+    """The body of an async streaming response."""
+    return b''.join([chunk async for chunk in response.streaming_content]).decode()
+
+
+def stream_body(response):
+    """read_stream for synchronous tests."""
+    return async_to_sync(read_stream)(response)
+
+
+class VerificationJobEventsTests(TestCase):
+    """verification_job_events as routed by default (async generator)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('streams')
+        conversation = Conversation.objects.create(user=cls.user, title='Streams')
+        cls.message = Message.objects.create(conversation=conversation, role='assistant', content='{}')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.async_client.force_login(self.user)
+
+    def test_completed_job_streams_its_papers_and_result(self):
+        verification = Verification.objects.create(
+            message=self.message, confidence_score=80.0, textual_verification={}, summary='Verified.'
+        )
+        job = VerificationJob.objects.create(
+            user=self.user, message=self.message, model='gpt-5.2',
+            status='completed', stage='done', verification=verification,
+        )
+        VerificationJobPaper.objects.create(job=job, paper_index=0, title='Paper 0', status='done', result={})
+        VerificationJobPaper.objects.create(job=job, paper_index=1, title='Paper 1', status='pending')
+
+        response = self.client.get(f'/api/verification-jobs/{job.id}/events/')
+        body = stream_body(response)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertIn('event: stage', body)
+        self.assertEqual(body.count('event: paper'), 1)
+        self.assertIn('event: complete', body)
+
+    @override_settings(VERIFICATION_JOB_POLL_INTERVAL=0.1, VERIFICATION_JOB_STREAM_TIMEOUT=0.5)
+    async def test_open_streams_do_not_hold_threads(self):
+        job = await VerificationJob.objects.acreate(user=self.user, message=self.message, model='gpt-5.2')
+        responses = [
+            await self.async_client.get(f'/api/verification-jobs/{job.id}/events/') for _ in range(5)
+        ]
+        # Five streams polling concurrently time out together, not one after the other
+        started = time.monotonic()
+        bodies = await asyncio.gather(*(read_stream(response) for response in responses))
+        self.assertLess(time.monotonic() - started, 2.0)
+        for body in bodies:
+            self.assertIn('event: timeout', body)
+
+    def test_other_users_job_is_not_found(self):
+        other = User.objects.create_user('other')
+        job = VerificationJob.objects.create(user=other, message=self.message, model='gpt-5.2')
+        response = self.client.get(f'/api/verification-jobs/{job.id}/events/')
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,106 @@
+from datetime import timedelta
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+
+from openai_api import openai_clients, titles
+from openai_api.management.commands.openai_standin_server import standin_server
+from openai_api.models import Conversation, Message
+from .test_conversation_state import sync_urls
+from .test_streams import stream_body
+
+
+class TitleGenerationTests(TransactionTestCase):
+    """
+    Titles are generated by the serving process, without run_verification_worker
+    (TransactionTestCase: the generation thread has to see the committed rows).
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = standin_server(0)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.settings = override_settings(OPENAI_BASE_URL=f'http://127.0.0.1:{cls.server.server_address[1]}/v1')
+        cls.settings.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings.disable()
+        cls.server.shutdown()
+        cls.server.server_close()
+        openai_clients.clear()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = User.objects.create_user('titles')
+        self.user.profile.openai_api_key = 'sk-standin'
+        self.user.profile.save()
+        self.conversation = Conversation.objects.create(user=self.user)
+        self.client.force_login(self.user)
+
+    def wait_for_title(self, timeout=10):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            self.conversation.refresh_from_db()
+            if self.conversation.title_status != 'pending':
+                return
+            time.sleep(0.05)
+
+    def first_turn(self):
+        response = self.client.post(
+            f'/api/conversations/{self.conversation.id}/chat/',
+            {'message': 'Find papers on retrieval-augmented generation', 'web_search': False},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['title_status'], 'pending')
+
+    def test_async_view_generates_the_title(self):
+        self.first_turn()
+        self.wait_for_title()
+        self.assertEqual(self.conversation.title_status, 'final')
+        self.assertEqual(self.conversation.title_attempts, 1)
+
+    def test_sync_view_generates_the_title(self):
+        with override_settings(ROOT_URLCONF=sync_urls()):
+            self.first_turn()
+        self.wait_for_title()
+        self.assertEqual(self.conversation.title_status, 'final')
+
+    def test_later_turns_do_not_rename_the_conversation(self):
+        for urls in (None, sync_urls()):
+            with self.subTest(sync=urls is not None), override_settings(ROOT_URLCONF=urls or 'research_agent.urls'):
+                # Still untitled after earlier turns (e.g. created before titles were generated)
+                Conversation.objects.filter(pk=self.conversation.pk).update(title='New Conversation', title_status='final')
+                Message.objects.create(conversation=self.conversation, role='user', content='Earlier question')
+                Message.objects.create(conversation=self.conversation, role='assistant', content='{}')
+                response = self.client.post(
+                    f'/api/conversations/{self.conversation.id}/chat/',
+                    {'message': 'Which of them use a dense index?', 'web_search': False},
+                    content_type='application/json'
+                )
+                self.assertEqual(response.status_code, 200, response.content)
+                self.assertEqual(response.json()['title_status'], 'final')
+
+    @override_settings(CONVERSATION_TITLE_IN_PROCESS=False)
+    def test_title_stream_stops_when_nothing_generates_the_title(self):
+        self.first_turn()
+        # Nobody claimed the title and its attempt is long overdue
+        Conversation.objects.filter(pk=self.conversation.pk).update(title_retry_at=timezone.now() - timedelta(minutes=5))
+        response = self.client.get(f'/api/conversations/{self.conversation.id}/title/events/')
+        body = stream_body(response)
+        self.assertIn('event: stalled', body)
+
+    def test_title_stream_restarts_a_stalled_title(self):
+        titles.defer_title(self.conversation, 'Find papers on retrieval-augmented generation', 'gpt-5.2')
+        self.conversation.title_retry_at = timezone.now() - timedelta(minutes=5)
+        self.conversation.save()
+        response = self.client.get(f'/api/conversations/{self.conversation.id}/title/events/')
+        body = stream_body(response)
+        self.assertIn('event: title', body)
+        self.conversation.refresh_from_db()
+        self.assertEqual(self.conversation.title_status, 'final')
@@ -0,0 +1,35 @@
+from unittest import mock
+
+from django.db import transaction
+from django.test import TestCase
+
+from openai_api import verification_cache
+from openai_api.models import PaperVerificationCache
+
+LINK = 'https://arxiv.org/abs/1706.03762'
+
+
+def paper_result(title, score):
+    return {'title': title, 'link': LINK, 'credibility_score': score, 'overall_quality': score}
+
+
+class StoreTests(TestCase):
+    def test_store_inserts_then_refreshes(self):
+        first = verification_cache.store(LINK, paper_result('Attention', 6.0))
+        second = verification_cache.store(LINK, paper_result('Attention Is All You Need', 9.0))
+        self.assertEqual(first.pk, second.pk)
+        entry = PaperVerificationCache.objects.get()
+        self.assertEqual(entry.title, 'Attention Is All You Need')
+        self.assertEqual(entry.credibility_score, 9.0)
+
+    def test_concurrent_insert_refreshes_the_winners_entry(self):
+        # Another worker inserted the paper between the lookup and the insert
+        winner = verification_cache.store(LINK, paper_result('Attention', 6.0))
+        with transaction.atomic():
+            with mock.patch('django.db.models.query.QuerySet.first', return_value=None):
+                entry = verification_cache.store(LINK, paper_result('Attention Is All You Need', 9.0))
+            # The surrounding transaction is still usable after the failed insert
+            self.assertEqual(PaperVerificationCache.objects.count(), 1)
+        self.assertEqual(entry.pk, winner.pk)
+        entry.refresh_from_db()
+        self.assertEqual(entry.credibility_score, 9.0)
@@ -0,0 +1,86 @@
+import io
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from openai_api.management.commands import run_verification_worker
+from openai_api.models import Conversation, Message, Verification, VerificationJob
+
+
+class WorkerTestMixin:
+    def create_job(self):
+        self.user = User.objects.create_user('worker')
+        conversation = Conversation.objects.create(user=self.user, title='Worker')
+        self.message = Message.objects.create(conversation=conversation, role='assistant', content='{}')
+        VerificationJob.objects.create(user=self.user, message=self.message, model='gpt-5.2')
+        self.command = run_verification_worker.Command(stdout=io.StringIO())
+        return self.command.claim_next_job('worker-a')
+
+    def verification(self):
+        return Verification.objects.create(
+            message=self.message, confidence_score=80.0, textual_verification={}, summary='Verified.'
+        )
+
+
+class ProcessJobTests(WorkerTestMixin, TestCase):
+    def setUp(self):
+        self.job = self.create_job()
+
+    def process(self, run_verification):
+        with mock.patch.object(run_verification_worker, 'get_openai_client'), \
+                mock.patch.object(run_verification_worker, 'run_verification', run_verification):
+            self.command.process_job(self.job)
+
+    def take_over(self):
+        """Re-queue the job as stale and let another worker claim it."""
+        VerificationJob.objects.filter(pk=self.job.pk).update(status='queued', worker_id='')
+        self.command.claim_next_job('worker-b')
+
+    def test_completes_its_job(self):
+        self.process(lambda *args, **kwargs: self.verification())
+        job = VerificationJob.objects.get(pk=self.job.pk)
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual(job.verification, Verification.objects.get())
+
+    def test_discards_its_result_when_the_job_was_taken_over(self):
+        def run_verification(*args, **kwargs):
+            self.take_over()
+            return self.verification()
+
+        self.process(run_verification)
+        job = VerificationJob.objects.get(pk=self.job.pk)
+        self.assertEqual((job.status, job.worker_id), ('running', 'worker-b'))
+        self.assertFalse(Verification.objects.exists())
+
+    def test_does_not_fail_a_job_taken_over(self):
+        def run_verification(*args, **kwargs):
+            self.take_over()
+            raise RuntimeError('Evaluation timed out')
+
+        self.process(run_verification)
+        job = VerificationJob.objects.get(pk=self.job.pk)
+        self.assertEqual((job.status, job.error), ('running', ''))
+
+
+class HeartbeatTests(WorkerTestMixin, TransactionTestCase):
+    """The heartbeat thread has to see the committed job."""
+
+    @override_settings(VERIFICATION_JOB_HEARTBEAT=0.05)
+    def test_long_stage_keeps_the_job_fresh(self):
+        job = self.create_job()
+        claimed_at = VerificationJob.objects.get(pk=job.pk).updated_at
+        seen = []
+
+        def run_verification(*args, **kwargs):
+            # A long evaluation that reports no progress
+            time.sleep(0.3)
+            seen.append(VerificationJob.objects.get(pk=job.pk).updated_at)
+            return self.verification()
+
+        with mock.patch.object(run_verification_worker, 'get_openai_client'), \
+                mock.patch.object(run_verification_worker, 'run_verification', run_verification):
+            self.command.process_job(job)
+        self.assertGreater(seen[0], claimed_at)
+        self.assertEqual(VerificationJob.objects.get(pk=job.pk).status, 'completed')
@@ -0,0 +1,219 @@
+"""
+Deferred conversation titles.
+
+Naming a conversation used to be a second LLM round trip inside the first chat request. Now
+the first answer is returned right away with a provisional title cut from the user's first
+message (title_status 'pending'), and the real title is generated in the background:
+
+- by the serving process itself, in a thread started once the first answer is saved
+  (start_generation, CONVERSATION_TITLE_IN_PROCESS), so no other process is required
+- by run_verification_worker, which also picks up titles whose process stopped (server
+  restarted mid-attempt) once their lease has expired
+- pending conversations whose title_retry_at has passed are claimed with a conditional
+  UPDATE that moves title_retry_at forward by CONVERSATION_TITLE_LEASE seconds, so the
+  serving processes and workers never generate the same title twice, and a crashed attempt
+  is picked up again after the lease
+- a failed attempt is retried after CONVERSATION_TITLE_RETRY_DELAY seconds, doubling each
+  time, up to CONVERSATION_TITLE_MAX_ATTEMPTS attempts; then the provisional title is kept
+  (title_status 'failed')
+- the generated title is only written while the status is still 'pending', so a title the
+  user set in the meantime wins
+
+Clients follow the status via the conversation_title / conversation_title_events endpoints;
+the stream stops once nothing is working on a pending title any more (see stalled()).
+"""
+
+from datetime import timedelta
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Conversation
+from . import openai_clients
+
+PROVISIONAL_TITLE_CHARS = 60
+
+
+def setting(name, default):
+    return getattr(settings, name, default)
+
+
+def title_request(model, user_message, assistant_response):
+    """Keyword arguments of the chat completion that names a conversation."""
+    prompt = f"""Based on this conversation, generate a short, descriptive conversation title (3-6 words max).
+Return ONLY the title text, nothing else.
+
+User: {user_message}
+
+Assistant response summary: {assistant_response[:500] if len(assistant_response) > 500 else assistant_response}"""
+
+    return {
+        'model': model,
+        'messages': [
+            {'role': 'system', 'content': 'You generate short, descriptive conversation titles. Return only the title, no quotes or extra text.'},
+            {'role': 'user', 'content': prompt}
+        ],
+        'max_completion_tokens': 50,
+    }
+
+
+def clean_title(response):
+    title = response.choices[0].message.content.strip()
+    # Remove quotes if present
+    title = title.strip('"\'')
+    # Limit length
+    if len(title) > 100:
+        title = title[:100]
+    return title
+
+
+def generate_title(client, model, user_message, assistant_response):
+    """Generate a short title for a conversation based on first exchange."""
+    return clean_title(client.chat.completions.create(**title_request(model, user_message, assistant_response)))
+
+
+def provisional_title(message):
+    """A title cut from the first user message at a word boundary, shown until the real one exists."""
+    text = ' '.join(message.split())
+    if len(text) <= PROVISIONAL_TITLE_CHARS:
+        return text or 'New Conversation'
+    cut = text[:PROVISIONAL_TITLE_CHARS].rsplit(' ', 1)[0] or text[:PROVISIONAL_TITLE_CHARS]
+    return cut.rstrip(' ,.;:-') + '...'
+
+
+def defer_title(conversation, user_message, model):
+    """Give a conversation its provisional title and queue the generation (caller saves)."""
+    conversation.title = provisional_title(user_message)
+    conversation.title_status = 'pending'
+    conversation.title_model = model
+    conversation.title_attempts = 0
+    conversation.title_retry_at = timezone.now()
+
+
+def claim(conversation_id):
+    """Claim a conversation whose title is due for generation (None if not due or claimed elsewhere)."""
+    now = timezone.now()
+    lease_until = now + timedelta(seconds=setting('CONVERSATION_TITLE_LEASE', 60))
+    if Conversation.objects.filter(
+        pk=conversation_id, title_status='pending', title_retry_at__lte=now
+    ).update(title_retry_at=lease_until, title_attempts=F('title_attempts') + 1):
+        return Conversation.objects.select_related('user__profile').get(pk=conversation_id)
+    return None
+
+
+def claim_pending(limit=5):
+    """Claim conversations whose title is due for generation."""
+    due = Conversation.objects.filter(
+        title_status='pending', title_retry_at__lte=timezone.now()
+    ).order_by('title_retry_at').values_list('pk', flat=True)
+    claimed = [claim(pk) for pk in due[:limit]]
+    return [conversation for conversation in claimed if conversation]
+
+
+def first_exchange(conversation):
+    """(user message, assistant text) of the first turn."""
+    user_text, assistant_text = '', ''
+    for msg in conversation.messages.order_by('created_at', 'id')[:2]:
+        if msg.role == 'user':
+            user_text = msg.content
+        else:
+            assistant_text = msg.text
+    return user_text, assistant_text
+
+
+def generate_pending_title(conversation):
+    """Generate the title of a claimed conversation, scheduling a retry if it fails."""
+    try:
+        user_text, assistant_text = first_exchange(conversation)
+        client = openai_clients.get_client(conversation.user.profile.openai_api_key)
+        title = generate_title(client, conversation.title_model, user_text, assistant_text)
+        if not title:
+            raise ValueError('Empty title')
+    except Exception as e:
+        max_attempts = setting('CONVERSATION_TITLE_MAX_ATTEMPTS', 3)
+        pending = Conversation.objects.filter(pk=conversation.pk, title_status='pending')
+        if conversation.title_attempts >= max_attempts:
+            pending.update(title_status='failed', title_retry_at=None)
+            print(f"[Title Generation] Giving up on conversation {conversation.id} after {conversation.title_attempts} attempts: {e}")
+        else:
+            delay = setting('CONVERSATION_TITLE_RETRY_DELAY', 5) * 2 ** (conversation.title_attempts - 1)
+            pending.update(title_retry_at=timezone.now() + timedelta(seconds=delay))
+            print(f"[Title Generation] Error for conversation {conversation.id}, retrying in {delay}s: {e}")
+        return None
+
+    # update(): naming the conversation is not activity, so updated_at is left alone
+    if Conversation.objects.filter(pk=conversation.pk, title_status='pending').update(
+        title=title, title_status='final', title_retry_at=None
+    ):
+        print(f"[Title Generation] Generated title: {title}")
+    return title
+
+
+def next_attempt_in(conversation_id):
+    """Seconds until the next attempt at a pending title (None once it is no longer pending)."""
+    retry_at = Conversation.objects.filter(
+        pk=conversation_id, title_status='pending'
+    ).values_list('title_retry_at', flat=True).first()
+    if retry_at is None:
+        return None
+    return max(0.0, (retry_at - timezone.now()).total_seconds())
+
+
+def generate_now(conversation_id, claimed=None):
+    """
+    Generate a conversation's pending title in this process, with the retries of failed
+    attempts (claimed: the conversation if the caller has already claimed it).
+    """
+    try:
+        while True:
+            conversation, claimed = claimed or claim(conversation_id), None
+            if conversation is None or generate_pending_title(conversation):
+                return
+            wait = next_attempt_in(conversation_id)
+            if wait is None:
+                return
+            time.sleep(wait)
+    except Exception as e:
+        # The lease expires and a worker (or the next title stream) picks the title up again
+        print(f"[Title Generation] Background generation of conversation {conversation_id} failed: {e}")
+    finally:
+        connection.close()
+
+
+def start_generation(conversation_id, claimed=None):
+    """Generate a pending title in a background thread of the serving process (see generate_now)."""
+    if setting('CONVERSATION_TITLE_IN_PROCESS', True):
+        threading.Thread(target=generate_now, args=(conversation_id, claimed), daemon=True).start()
+
+
+def restart_stalled(conversation):
+    """Generate a stalled title in this process. Returns True if it was claimed here."""
+    if not (setting('CONVERSATION_TITLE_IN_PROCESS', True) and stalled(conversation)):
+        return False
+    claimed = claim(conversation.id)
+    if claimed:
+        start_generation(conversation.id, claimed)
+    return claimed is not None
+
+
+def stalled(conversation):
+    """
+    True if nothing is working on a pending title: its next attempt (or the lease of the
+    current one) is overdue by CONVERSATION_TITLE_STALL_AFTER seconds.
+    """
+    if conversation.title_status != 'pending' or conversation.title_retry_at is None:
+        return False
+    overdue = timezone.now() - conversation.title_retry_at
+    return overdue > timedelta(seconds=setting('CONVERSATION_TITLE_STALL_AFTER', 10))
+
+
+def process_pending(limit=5):
+    """Generate the titles that are due. Returns the number of conversations processed."""
+    conversations = claim_pending(limit)
+    for conversation in conversations:
+        generate_pending_title(conversation)
+    return len(conversations)
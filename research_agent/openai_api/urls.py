@@ -1,7 +1,29 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 from . import auth_views
 from . import views_verification
+from . import views_async
+
+# LLM-bound endpoints and progress streams: async views (AsyncOpenAI, async ORM) unless disabled
+if getattr(settings, 'ASYNC_LLM_VIEWS', True):
+    llm_views = {
+        'chat': views_async.chat,
+        'conversation_chat': views_async.conversation_chat,
+        'paper_generate_bibtex': views_async.paper_generate_bibtex,
+        'verify_message': views_async.verify_message,
+        'verification_job_events': views_async.verification_job_events,
+        'conversation_title_events': views_async.conversation_title_events,
+    }
+else:
+    llm_views = {
+        'chat': views.chat,
+        'conversation_chat': views.conversation_chat,
+        'paper_generate_bibtex': views.paper_generate_bibtex,
+        'verify_message': views_verification.verify_message,
+        'verification_job_events': views_verification.verification_job_events,
+        'conversation_title_events': views.conversation_title_events,
+    }
 
 urlpatterns = [
     # Auth endpoints
@@ -14,23 +36,33 @@ urlpatterns = [
     path('auth/api-key/delete/', auth_views.delete_api_key, name='delete_api_key'),
 
     # Chat endpoint (legacy, kept for backwards compatibility)
-    path('chat/', views.chat, name='chat'),
+    path('chat/', llm_views['chat'], name='chat'),
 
     # Project endpoints
     path('projects/', views.project_list, name='project_list'),
     path('projects/<int:pk>/', views.project_detail, name='project_detail'),
+    path('projects/<int:pk>/generate-bibtex/', views.project_generate_bibtex, name='project_generate_bibtex'),
+    path('projects/<int:pk>/export/<str:export_format>/', views.project_export, name='project_export'),
 
     # Conversation endpoints
     path('conversations/', views.conversation_list, name='conversation_list'),
     path('conversations/<int:pk>/', views.conversation_detail, name='conversation_detail'),
-    path('conversations/<int:pk>/chat/', views.conversation_chat, name='conversation_chat'),
+    path('conversations/<int:pk>/title/', views.conversation_title, name='conversation_title'),
+    path('conversations/<int:pk>/title/events/', llm_views['conversation_title_events'], name='conversation_title_events'),
+    path('conversations/<int:pk>/chat/', llm_views['conversation_chat'], name='conversation_chat'),
+    path('conversations/<int:pk>/chat/stream/', views.conversation_chat_stream, name='conversation_chat_stream'),
 
     # Paper endpoints
     path('papers/', views.paper_list, name='paper_list'),
     path('papers/<int:pk>/', views.paper_detail, name='paper_detail'),
-    path('papers/<int:pk>/generate-bibtex/', views.paper_generate_bibtex, name='paper_generate_bibtex'),
+    path('papers/<int:pk>/generate-bibtex/', llm_views['paper_generate_bibtex'], name='paper_generate_bibtex'),
     path('papers/<int:pk>/copy/', views.copy_paper_to_project, name='copy_paper_to_project'),
 
     # Verification endpoints
-    path('messages/<int:message_id>/verify/', views_verification.verify_message, name='verify_message'),
+    path('messages/<int:message_id>/verify/', llm_views['verify_message'], name='verify_message'),
+    path('verification-jobs/<int:job_id>/', views_verification.verification_job_detail, name='verification_job_detail'),
+    path('verification-jobs/<int:job_id>/events/', llm_views['verification_job_events'], name='verification_job_events'),
+
+    # Monitoring
+    path('monitoring/openai-clients/', views.openai_client_stats, name='openai_client_stats'),
 ]
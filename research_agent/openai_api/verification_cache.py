@@ -0,0 +1,169 @@
+"""
+Shared cache of paper-level verification results.
+
+Entries are keyed by canonical paper identifier (see identifiers.paper_identifier) so that
+different links to the same paper reuse one verification. Entries expire after
+VERIFICATION_CACHE_TTL seconds (VERIFICATION_CACHE_FAILURE_TTL if the content fetch or
+OpenAlex lookup failed) and the least recently used entries are evicted once the cache
+holds more than VERIFICATION_CACHE_MAX_ENTRIES.
+
+PaperVerification rows reference cache entries instead of copying the JSON results.
+Before an entry is refreshed or evicted, its results are copied back onto the rows
+that reference it, so stored verifications never change retroactively.
+"""
+
+from datetime import timedelta
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .identifiers import paper_identifier
+from .models import PaperVerification, PaperVerificationCache
+
+# Paper-level result fields stored on cache entries
+CACHED_FIELDS = [
+    'openalex_metadata',
+    'verified_metadata',
+    'content_fetch',
+    'content_verification',
+    'paper_quality',
+    'summary_evaluation',
+    'overall_assessment',
+    'credibility_score',
+    'credibility_notes',
+    'overall_quality',
+    'timings',
+]
+
+# Per-process counters (see cache_stats)
+_stats = {'hits': 0, 'misses': 0, 'stale': 0, 'stores': 0, 'evictions': 0}
+_stats_lock = threading.Lock()
+
+
+def _count(key, amount=1):
+    with _stats_lock:
+        _stats[key] += amount
+
+
+def cache_stats():
+    """Hit/miss counters of this process plus the current size of the cache table."""
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats['hits'] + stats['misses'] + stats['stale']
+    stats['hit_ratio'] = round(stats['hits'] / lookups, 3) if lookups else None
+    stats['entries'] = PaperVerificationCache.objects.count()
+    return stats
+
+
+def is_stale(entry):
+    """An entry is stale once it is older than its TTL (shorter for failed lookups)."""
+    if entry.fetch_failed:
+        ttl = getattr(settings, 'VERIFICATION_CACHE_FAILURE_TTL', 60 * 60 * 24)
+    else:
+        ttl = getattr(settings, 'VERIFICATION_CACHE_TTL', 60 * 60 * 24 * 30)
+    return entry.verified_at + timedelta(seconds=ttl) < timezone.now()
+
+
+def lookup(link):
+    """
+    Find a fresh cache entry for a paper link.
+
+    Returns the PaperVerificationCache entry or None on a miss or stale entry.
+    """
+    _, identifier = paper_identifier(link)
+    if not identifier:
+        return None
+
+    entry = PaperVerificationCache.objects.filter(identifier=identifier).first()
+    if not entry:
+        _count('misses')
+        return None
+    if is_stale(entry):
+        _count('stale')
+        return None
+
+    _count('hits')
+    PaperVerificationCache.objects.filter(pk=entry.pk).update(hit_count=F('hit_count') + 1, last_used_at=timezone.now())
+    return entry
+
+
+def entry_result(entry):
+    """Paper-level result fields of a cache entry as a dict."""
+    return {field: getattr(entry, field) for field in CACHED_FIELDS}
+
+
+def result_fields(paper_result):
+    """Paper-level result fields of a verify_single_paper result, with model defaults filled in."""
+    values = {field: paper_result.get(field) for field in CACHED_FIELDS}
+    values['overall_assessment'] = values['overall_assessment'] or ''
+    values['credibility_notes'] = values['credibility_notes'] or ''
+    for field in ('credibility_score', 'overall_quality'):
+        if values[field] is None:
+            values[field] = 5.0
+    return values
+
+
+def detach_references(entry):
+    """Copy an entry's results onto the PaperVerification rows that reference it."""
+    PaperVerification.objects.filter(cache_entry=entry).update(cache_entry=None, **entry_result(entry))
+
+
+def store(link, paper_result):
+    """
+    Insert or refresh the cache entry for a verified paper.
+
+    Workers verifying the same paper concurrently may both try to insert it: the insert
+    runs in a savepoint and the loser refreshes the winner's entry instead.
+
+    Returns the entry, or None if the link has no usable identifier.
+    """
+    identifier_type, identifier = paper_identifier(link)
+    if not identifier:
+        return None
+
+    now = timezone.now()
+    values = result_fields(paper_result)
+    fields = {
+        'title': paper_result.get('title', '')[:500],
+        'link': link,
+        'verified_at': now,
+        'last_used_at': now,
+        **values
+    }
+
+    entry = PaperVerificationCache.objects.filter(identifier=identifier).first()
+    if entry is None:
+        try:
+            with transaction.atomic():
+                entry = PaperVerificationCache.objects.create(identifier=identifier, identifier_type=identifier_type, **fields)
+        except IntegrityError:
+            entry = PaperVerificationCache.objects.get(identifier=identifier)
+        else:
+            evict()
+            _count('stores')
+            return entry
+
+    detach_references(entry)
+    for field, value in fields.items():
+        setattr(entry, field, value)
+    entry.save()
+
+    _count('stores')
+    return entry
+
+
+def evict():
+    """Remove least recently used entries beyond VERIFICATION_CACHE_MAX_ENTRIES."""
+    max_entries = getattr(settings, 'VERIFICATION_CACHE_MAX_ENTRIES', 10000)
+    overflow = PaperVerificationCache.objects.order_by('-last_used_at')[max_entries:]
+    evicted = 0
+    for entry in overflow:
+        detach_references(entry)
+        entry.delete()
+        evicted += 1
+    if evicted:
+        _count('evictions', evicted)
+        print(f"[Verification Cache] Evicted {evicted} entries")
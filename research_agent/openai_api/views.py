@@ -1,40 +1,34 @@
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
-from openai import OpenAI
+import openai
+from django.conf import settings
+from django.db import transaction
+from django.http import JsonResponse
+from django.utils import timezone
+from django.utils.text import slugify
+from django.views.decorators.http import condition, require_GET
+from .answers import answer_payload, parse_papers_response
 from .models import Conversation, Message, Paper, Project
+from .history import build_history, pending_turns, start_summary, summary_due, verification_note
+from .papers_stream import PapersStreamParser
+from .pagination import keyset_page, page_limit
+from .serializers import project_conversations, serialize_conversation, serialize_conversation_summary, serialize_paper
+from .streaming import ThreadedStreamingHttpResponse, sse_event, sse_response
+from .system_prompts import build_system_prompt, context_block
+from . import bibliography, bibtex_builder, titles
+from . import openai_clients
+from concurrent.futures import ThreadPoolExecutor
 import json
 import re
+import time
 from curl_cffi import requests
 from urllib.parse import urlparse
 
 # ============ CONFIGURATION ============
 
-RESEARCH_SYSTEM_PROMPT = """You are a research assistant that helps users find and understand high-quality academic papers.
-
-You must respond with valid JSON in this exact format:
-{
-    "text": "Your conversational response here. Explain, analyze, or discuss as needed.",
-    "papers": [
-        {
-            "title": "Full paper title",
-            "authors": "Author1, Author2, et al.",
-            "date": "YYYY",
-            "type": "PDF",
-            "link": "https://arxiv.org/abs/... or DOI link",
-            "summary": "Brief abstract/summary (2-3 sentences)"
-        }
-    ]
-}
-
-Guidelines:
-- The "text" field is for your conversational response - use it to explain, provide context, or answer questions
-- The "papers" array contains relevant academic papers (include 3-5 when recommending papers)
-- Papers array can be empty [] if no papers are relevant to the response
-- Only include peer-reviewed, high-quality papers from reputable sources (arXiv, IEEE, ACM, Nature, Science, PubMed, etc.)
-- Always include a direct link to the paper (arXiv, DOI, or publisher URL)
-- Ensure all paper fields are filled accurately
-"""
+# Conversation fields written when a provisional title is set (see titles.defer_title)
+TITLE_FIELDS = ['title', 'title_status', 'title_model', 'title_attempts', 'title_retry_at']
 
 DEFAULTS = {
     "model": "gpt-5.2",
@@ -49,76 +43,8 @@ DEFAULTS = {
 # ============ HELPERS ============
 
 def get_openai_client(user):
-    """Get OpenAI client with user's API key."""
-    api_key = user.profile.openai_api_key
-    if not api_key:
-        raise ValueError("Please set your OpenAI API key in settings")
-    return OpenAI(api_key=api_key)
-
-
-def build_system_prompt(verbosity, thinking_level, user_role=None, user_knowledge=None, custom_prompt=None, context_papers=None, filters=None):
-    """Build system prompt based on verbosity, thinking level, user persona, context papers, and filters."""
-    if custom_prompt:
-        base = custom_prompt
-    else:
-        base = RESEARCH_SYSTEM_PROMPT
-
-        # Adjust based on verbosity
-        if verbosity == "minimal":
-            base += "\n- Keep summaries very brief (1 sentence max)"
-        elif verbosity == "detailed":
-            base += "\n- Provide detailed summaries (3-4 sentences)"
-
-        # Adjust based on thinking level
-        if thinking_level == "high":
-            base += "\n- Include seminal/foundational papers in the field"
-            base += "\n- Consider interdisciplinary connections"
-        elif thinking_level == "low":
-            base += "\n- Focus only on the most directly relevant papers"
-            
-        # Adjust based on user persona
-        if user_role:
-             base += f"\n- Adopt the perspective of assisting a {user_role}."
-        if user_knowledge:
-             base += f"\n- Target explanations for someone with the following knowledge: {user_knowledge}."
-
-    # Add Search Filters / Constraints
-    if filters:
-        constraints = []
-        if filters.get('yearStart'):
-            constraints.append(f"Published after {filters['yearStart']}")
-        if filters.get('yearEnd'):
-            constraints.append(f"Published before {filters['yearEnd']}")
-        if filters.get('authors'):
-            constraints.append(f"Authored by: {filters['authors']}")
-        if filters.get('domain'):
-            constraints.append(f"Specific Domain/Topic: {filters['domain']}")
-        
-        if constraints:
-            base += "\n\n## Search Constraints\nThe user has specified the following strict constraints for the papers you find. You MUST respect these filters:\n"
-            for c in constraints:
-                base += f"- {c}\n"
-
-    # Add context papers if available
-    if context_papers and len(context_papers) > 0:
-        base += "\n\n## Reference Papers (User's Saved Sources)\n"
-        base += "The user has the following papers in their research context (CURRENT PROJECT ONLY). Reference these when relevant:\n\n"
-        for i, paper in enumerate(context_papers, 1):
-            base += f"{i}. **{paper.title}**\n"
-            base += f"   - Authors: {paper.authors}\n"
-            base += f"   - Date: {paper.date}\n"
-            if paper.link:
-                base += f"   - Link: {paper.link}\n"
-            base += f"   - Summary: {paper.summary}\n\n"
-
-    return base
-
-
-def get_context_papers(user, project=None):
-    """Get user's papers that are marked as in_context, strictly filtered by project."""
-    if project:
-        return Paper.objects.filter(user=user, project=project, in_context=True)
-    return Paper.objects.none()
+    """Get the cached OpenAI client for the user's API key."""
+    return openai_clients.get_client(user.profile.openai_api_key)
 
 
 def call_openai(client, messages, model, web_search):
@@ -141,52 +67,166 @@ def call_openai(client, messages, model, web_search):
         return response.choices[0].message.content
 
 
-def parse_papers_response(content):
-    """Extract papers JSON from response content."""
-    try:
-        # Try direct JSON parse first
-        return json.loads(content)
-    except json.JSONDecodeError:
-        # Try to extract JSON from markdown code blocks
-        match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', content, re.DOTALL)
-        if match:
-            return json.loads(match.group(1))
-        # Try to find raw JSON object
-        match = re.search(r'\{[^{}]*"papers"[^{}]*\[.*?\]\s*\}', content, re.DOTALL)
-        if match:
-            return json.loads(match.group(0))
-        # Return empty papers array if parsing fails
-        return {"papers": [], "error": "Failed to parse response"}
-
-
-def generate_title(client, model, user_message, assistant_response):
-    """Generate a short title for a conversation based on first exchange."""
-    prompt = f"""Based on this conversation, generate a short, descriptive conversation title (3-6 words max).
-Return ONLY the title text, nothing else.
-
-User: {user_message}
-
-Assistant response summary: {assistant_response[:500] if len(assistant_response) > 500 else assistant_response}"""
-
-    response = client.chat.completions.create(
+def call_openai_stateful(client, model, web_search, instructions, input_messages, previous_response_id=None):
+    """
+    Call the Responses API with server-side conversation state.
+
+    instructions (the system prompt) are not inherited from previous responses, so they
+    are sent every turn. Returns tuple (content, response_id).
+    """
+    kwargs = {}
+    if web_search:
+        kwargs['tools'] = [{"type": "web_search"}]
+    if previous_response_id:
+        kwargs['previous_response_id'] = previous_response_id
+    response = client.responses.create(
         model=model,
-        messages=[
-            {'role': 'system', 'content': 'You generate short, descriptive conversation titles. Return only the title, no quotes or extra text.'},
-            {'role': 'user', 'content': prompt}
-        ],
-        max_completion_tokens=50
+        instructions=instructions,
+        input=input_messages,
+        store=True,
+        **kwargs
     )
-    title = response.choices[0].message.content.strip()
-    # Remove quotes if present
-    title = title.strip('"\'')
-    # Limit length
-    if len(title) > 100:
-        title = title[:100]
-    return title
+    return response.output_text, response.id
 
 
-def generate_bibtex(client, model, paper_data):
-    """Generate BibTeX citation for a paper."""
+def chain_rejected(error):
+    """
+    True if an API error means the previous_response_id chain cannot be continued (the
+    stored response expired, was deleted or is invalid), so replaying the history can help.
+
+    Other 400s (context length, invalid parameters, content policy) would fail again.
+    """
+    if isinstance(error, openai.NotFoundError):
+        return True
+    return isinstance(error, openai.BadRequestError) and (
+        getattr(error, 'param', None) == 'previous_response_id'
+        or getattr(error, 'code', None) == 'previous_response_not_found'
+    )
+
+
+def chained_turn_input(conversation, user_message, model):
+    """
+    Input for continuing the server-side conversation state (OPENAI_CONVERSATION_STATE mode).
+
+    If the previous message is an assistant answer with a stored response id from the same
+    model, returns (previous_response_id, input_messages) with only the new user message (and
+    the verification note of that answer). Otherwise - first turn, model switch, missing
+    answer - returns (None, None) and the history has to be replayed.
+    """
+    previous = conversation.messages.exclude(pk=user_message.pk).order_by('-created_at', '-id').first()
+    if not (previous and previous.role == 'assistant' and previous.response_id and previous.response_model == model):
+        return None, None
+    input_messages = []
+    note = verification_note(previous.verifications.first())
+    if note:
+        input_messages.append({'role': 'system', 'content': note})
+    input_messages.append({'role': 'user', 'content': user_message.content})
+    return previous.response_id, input_messages
+
+
+def chat_with_conversation_state(client, model, web_search, conversation, user_message, system_prompt):
+    """
+    Send a conversation turn using previous_response_id (OPENAI_CONVERSATION_STATE mode).
+
+    Falls back to replaying the history when there is no chain to continue (see
+    chained_turn_input) or the API rejects it (expired or deleted response).
+
+    Returns tuple (content, response_id).
+    """
+    previous_response_id, input_messages = chained_turn_input(conversation, user_message, model)
+    if previous_response_id:
+        try:
+            return call_openai_stateful(client, model, web_search, system_prompt, input_messages, previous_response_id)
+        except (openai.NotFoundError, openai.BadRequestError) as e:
+            if not chain_rejected(e):
+                raise
+            print(f"[Conversation State] Chain from {previous_response_id} rejected, replaying history: {e}")
+
+    messages = build_history(conversation, system_prompt)
+    return call_openai_stateful(client, model, web_search, system_prompt, messages[1:])
+
+
+def responses_stream_events(stream):
+    """Translate a Responses API event stream to ('delta', text) and ('response_id', id) tuples."""
+    for event in stream:
+        if event.type == 'response.output_text.delta':
+            yield 'delta', event.delta
+        elif event.type == 'response.completed':
+            yield 'response_id', event.response.id
+        elif event.type in ('response.failed', 'error'):
+            raise RuntimeError(f'Response stream failed: {event.type}')
+
+
+def chat_stream_events(stream):
+    """Translate a chat completions chunk stream to ('delta', text) tuples."""
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield 'delta', chunk.choices[0].delta.content
+
+
+def stream_openai(client, messages, model, web_search):
+    """
+    Streaming variant of call_openai.
+
+    The request is sent before this returns (so API errors are raised here); returns an
+    iterator of ('delta', text) tuples.
+    """
+    if web_search:
+        stream = client.responses.create(
+            model=model,
+            tools=[{"type": "web_search"}],
+            input=messages,
+            stream=True,
+        )
+        # Stateless mode: the response id is not used for chaining
+        return (item for item in responses_stream_events(stream) if item[0] == 'delta')
+    stream = client.chat.completions.create(
+        model=model,
+        messages=messages,
+        stream=True,
+    )
+    return chat_stream_events(stream)
+
+
+def stream_openai_stateful(client, model, web_search, instructions, input_messages, previous_response_id=None):
+    """
+    Streaming variant of call_openai_stateful.
+
+    Returns an iterator of ('delta', text) tuples ending with ('response_id', id).
+    """
+    kwargs = {}
+    if web_search:
+        kwargs['tools'] = [{"type": "web_search"}]
+    if previous_response_id:
+        kwargs['previous_response_id'] = previous_response_id
+    stream = client.responses.create(
+        model=model,
+        instructions=instructions,
+        input=input_messages,
+        store=True,
+        stream=True,
+        **kwargs
+    )
+    return responses_stream_events(stream)
+
+
+def stream_with_conversation_state(client, model, web_search, conversation, user_message, system_prompt):
+    """Streaming variant of chat_with_conversation_state."""
+    previous_response_id, input_messages = chained_turn_input(conversation, user_message, model)
+    if previous_response_id:
+        try:
+            return stream_openai_stateful(client, model, web_search, system_prompt, input_messages, previous_response_id)
+        except (openai.NotFoundError, openai.BadRequestError) as e:
+            if not chain_rejected(e):
+                raise
+            print(f"[Conversation State] Chain from {previous_response_id} rejected, replaying history: {e}")
+
+    messages = build_history(conversation, system_prompt)
+    return stream_openai_stateful(client, model, web_search, system_prompt, messages[1:])
+
+
+def bibtex_request(model, paper_data):
+    """Keyword arguments of the chat completion that writes a paper's BibTeX entry."""
     prompt = f"""Generate a proper BibTeX citation for this paper. Return ONLY the BibTeX entry, nothing else.
 
 Title: {paper_data.get('title', '')}
@@ -199,14 +239,17 @@ Use @article for journal papers, @inproceedings for conference papers, @misc for
 Generate a citation key from the first author's last name and year (e.g., smith2024).
 Include all available fields."""
 
-    response = client.chat.completions.create(
-        model=model,
-        messages=[
+    return {
+        'model': model,
+        'messages': [
             {'role': 'system', 'content': 'You generate accurate BibTeX citations. Return only the BibTeX entry, no explanations.'},
             {'role': 'user', 'content': prompt}
         ],
-        max_completion_tokens=500
-    )
+        'max_completion_tokens': 500,
+    }
+
+
+def clean_bibtex(response):
     bibtex = response.choices[0].message.content.strip()
     # Clean up markdown code blocks if present
     if bibtex.startswith('```'):
@@ -215,6 +258,41 @@ Include all available fields."""
     return bibtex
 
 
+def generate_bibtex(client, model, paper_data):
+    """Generate BibTeX citation for a paper."""
+    return clean_bibtex(client.chat.completions.create(**bibtex_request(model, paper_data)))
+
+
+def paper_bibtex_data(paper):
+    return {
+        'title': paper.title,
+        'authors': paper.authors,
+        'date': paper.date,
+        'type': paper.paper_type,
+        'link': paper.link
+    }
+
+
+def turn_payload(user_message, assistant_message, papers_data, conversation):
+    """The chat response payload of a conversation turn."""
+    return {
+        'user_message': {
+            'id': user_message.id,
+            'role': 'user',
+            'content': user_message.content,
+            'created_at': user_message.created_at.isoformat()
+        },
+        'assistant_message': {
+            'id': assistant_message.id,
+            'role': 'assistant',
+            'content': papers_data,
+            'created_at': assistant_message.created_at.isoformat()
+        },
+        'conversation_title': conversation.title,
+        'title_status': conversation.title_status
+    }
+
+
 # ============ ENDPOINTS ============
 
 @api_view(['POST'])
@@ -240,8 +318,7 @@ def chat(request):
 
         # Chat doesn't have project context unless passed, assuming no context papers for one-off chat strictly from project
         # Or we could accept project_id here too? For simplicity, one-off chat is just general chat.
-        context_papers = [] 
-        system_prompt = build_system_prompt(verbosity, thinking_level, user_role, user_knowledge, custom_prompt, context_papers, filters)
+        system_prompt = build_system_prompt(verbosity, thinking_level, user_role, user_knowledge, custom_prompt, '', filters)
 
         messages = [
             {'role': 'system', 'content': system_prompt},
@@ -346,28 +423,22 @@ def conversation_list(request):
          return Response({'error': 'Invalid project'}, status=404)
 
     if request.method == 'GET':
-        conversations = project.conversations.all()
+        try:
+            conversations, cursor = keyset_page(
+                project_conversations(project), 'last_activity_at', request.query_params.get('cursor'),
+                page_limit(request.query_params.get('limit'), getattr(settings, 'CONVERSATIONS_PAGE_SIZE', 50))
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
         return Response({
-            'conversations': [
-                {
-                    'id': c.id,
-                    'title': c.title,
-                    'updated_at': c.updated_at.isoformat(),
-                    'preview': c.messages.last().content[:50] if c.messages.exists() else ''
-                }
-                for c in conversations
-            ]
+            'conversations': [serialize_conversation_summary(c) for c in conversations],
+            'next_cursor': cursor
         })
 
     # POST - create new conversation
     title = request.data.get('title', 'New Conversation')
     conversation = Conversation.objects.create(user=request.user, project=project, title=title)
-    return Response({
-        'id': conversation.id,
-        'title': conversation.title,
-        'updated_at': conversation.updated_at.isoformat(),
-        'messages': []
-    }, status=201)
+    return Response({**serialize_conversation_summary(conversation), 'messages': []}, status=201)
 
 
 @api_view(['GET', 'PATCH', 'DELETE'])
@@ -380,38 +451,24 @@ def conversation_detail(request, pk):
         return Response({'error': 'Conversation not found'}, status=404)
 
     if request.method == 'GET':
-        messages_data = []
-        for m in conversation.messages.all():
-            m_data = {
-                'id': m.id, 
-                'role': m.role, 
-                'content': m.content, 
-                'created_at': m.created_at.isoformat()
-            }
-            verification = m.verifications.first()
-            if verification:
-                m_data['verification'] = {
-                     'id': verification.id,
-                     'confidence_score': verification.confidence_score,
-                     'textual_verification': verification.textual_verification,
-                     'summary': verification.summary,
-                     'paper_verifications': verification.get_paper_verifications(),
-                     'created_at': verification.created_at.isoformat()
-                }
-            messages_data.append(m_data)
-
-        return Response({
-            'id': conversation.id,
-            'title': conversation.title,
-            'updated_at': conversation.updated_at.isoformat(),
-            'messages': messages_data
-        })
+        # Most recent messages first; older pages via ?before=<messages_cursor>
+        try:
+            return Response(serialize_conversation(
+                conversation, request.query_params.get('before'),
+                page_limit(request.query_params.get('limit'), getattr(settings, 'MESSAGES_PAGE_SIZE', 50))
+            ))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
 
     if request.method == 'PATCH':
         title = request.data.get('title')
         if title:
             conversation.title = title
-            conversation.save()
+            # A title set by the user replaces a pending generated one
+            conversation.title_status = 'final'
+            conversation.title_retry_at = None
+            # Only the title: the summary fields are maintained by Message.save()
+            conversation.save(update_fields=['title', 'title_status', 'title_retry_at', 'updated_at'])
         return Response({
             'id': conversation.id,
             'title': conversation.title,
@@ -423,6 +480,106 @@ def conversation_detail(request, pk):
     return Response(status=204)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def conversation_title(request, pk):
+    """Get the title of a conversation and whether it is still being generated (title_status)."""
+    try:
+        conversation = request.user.conversations.get(pk=pk)
+    except Conversation.DoesNotExist:
+        return Response({'error': 'Conversation not found'}, status=404)
+
+    return Response({
+        'id': conversation.id,
+        'title': conversation.title,
+        'title_status': conversation.title_status
+    })
+
+
+def conversation_title_events(request, pk):
+    """
+    Stream the title of a conversation as Server-Sent Events once it is generated.
+
+    Events:
+    - title: {id, title, title_status} when the title is no longer pending
+    - stalled: {id, title, title_status} when nothing is generating the pending title any more
+      (a stalled title is restarted in this process once, when the stream opens)
+    - timeout: {id, title_status} after CONVERSATION_TITLE_STREAM_TIMEOUT seconds
+
+    Plain Django view: DRF content negotiation would reject the text/event-stream Accept header.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    conversation = request.user.conversations.only('title_status', 'title_retry_at').filter(pk=pk).first()
+    if conversation is None:
+        return JsonResponse({'error': 'Conversation not found'}, status=404)
+    # Its process stopped and no worker picked it up: generate it here
+    titles.restart_stalled(conversation)
+
+    poll_interval = getattr(settings, 'VERIFICATION_JOB_POLL_INTERVAL', 1.0)
+    max_duration = getattr(settings, 'CONVERSATION_TITLE_STREAM_TIMEOUT', 60)
+
+    def events():
+        started = time.monotonic()
+        while True:
+            current = Conversation.objects.only('title', 'title_status', 'title_retry_at').get(pk=pk)
+            if current.title_status != 'pending':
+                yield sse_event('title', {'id': current.id, 'title': current.title, 'title_status': current.title_status})
+                return
+            if titles.stalled(current):
+                yield sse_event('stalled', {'id': current.id, 'title': current.title, 'title_status': current.title_status})
+                return
+            if time.monotonic() - started > max_duration:
+                yield sse_event('timeout', {'id': current.id, 'title_status': current.title_status})
+                return
+            time.sleep(poll_interval)
+
+    return sse_response(events())
+
+
+def save_assistant_turn(model, conversation, user_message, content, response_id=''):
+    """
+    Persist the assistant answer of a conversation turn and name new conversations.
+
+    New conversations get a provisional title right away; the real one is generated in the
+    background (see titles.py), as is the rolling summary once turns leave the history window
+    (see history.py). Returns the chat response payload (user_message, assistant_message,
+    conversation_title, title_status).
+    """
+    papers_data = parse_papers_response(content)
+
+    # Save assistant message (the raw JSON string and its parsed payload, see answers.py)
+    assistant_message = Message.objects.create(
+        conversation=conversation,
+        role='assistant',
+        content=json.dumps(papers_data),
+        payload=answer_payload(papers_data),
+        response_id=response_id or '',
+        response_model=model if response_id else ''
+    )
+
+    # Update conversation timestamp (update_fields: the worker may be writing the title)
+    update_fields = ['updated_at']
+    # Name the conversation after the first exchange (2 messages: 1 user + 1 assistant)
+    deferred = False
+    if conversation.title == 'New Conversation':
+        # message_count is maintained by Message.save() with an F() update: reload it
+        conversation.refresh_from_db(fields=['message_count'])
+        deferred = conversation.message_count == 2
+    if deferred:
+        titles.defer_title(conversation, user_message.content, model)
+        update_fields += TITLE_FIELDS
+    conversation.save(update_fields=update_fields)
+    conversation_id = conversation.id
+    if deferred:
+        transaction.on_commit(lambda: titles.start_generation(conversation_id))
+    # Fold turns that left the compact window into the summary, after the response
+    if summary_due(pending_turns(conversation).count()):
+        transaction.on_commit(lambda: start_summary(conversation_id, model))
+
+    return turn_payload(user_message, assistant_message, papers_data, conversation)
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def conversation_chat(request, pk):
@@ -449,9 +606,9 @@ def conversation_chat(request, pk):
     try:
         client = get_openai_client(request.user)
 
-        # Get context papers (scoped to this conversation's project)
-        context_papers = get_context_papers(request.user, project=conversation.project)
-        system_prompt = build_system_prompt(verbosity, thinking_level, user_role, user_knowledge, custom_prompt, context_papers, filters)
+        # Context papers block (scoped to this conversation's project, ranked by relevance to the message if large)
+        papers_block = context_block(conversation.project, message_content)
+        system_prompt = build_system_prompt(verbosity, thinking_level, user_role, user_knowledge, custom_prompt, papers_block, filters)
 
         # Save user message
         user_message = Message.objects.create(
@@ -461,70 +618,111 @@ def conversation_chat(request, pk):
             system_prompt=system_prompt
         )
 
-        # Build conversation history
-        messages = [{'role': 'system', 'content': system_prompt}]
-        for msg in conversation.messages.all():
-            messages.append({'role': msg.role, 'content': msg.content})
-            
-            # If this message has verification, inject it as context for the next turn
-            if msg.role == 'assistant':
-                verification = msg.verifications.first()
-                if verification and verification.textual_verification:
-                    summary = verification.summary or ''
-                    suggestion = verification.textual_verification.get('next_step_suggestion', '')
-                    if summary or suggestion:
-                        verification_context = f"[VERIFICATION OF PREVIOUS RESPONSE: {summary}]"
-                        if suggestion:
-                            verification_context += f"\n[SUGGESTED NEXT STEP: {suggestion}]"
-                        messages.append({'role': 'system', 'content': verification_context})
-
-        # Call OpenAI
-        content = call_openai(client, messages, model, web_search)
-        papers_data = parse_papers_response(content)
+        response_id = ''
+        if getattr(settings, 'OPENAI_CONVERSATION_STATE', False):
+            # Server-side state: only the new message is sent when the chain is intact
+            content, response_id = chat_with_conversation_state(client, model, web_search, conversation, user_message, system_prompt)
+        else:
+            # Build conversation history (recent turns verbatim, older turns compacted/summarized)
+            messages = build_history(conversation, system_prompt)
 
-        # Save assistant message (store the raw JSON string)
-        assistant_message = Message.objects.create(
-            conversation=conversation,
-            role='assistant',
-            content=json.dumps(papers_data)
-        )
+            # Call OpenAI
+            content = call_openai(client, messages, model, web_search)
 
-        # Generate title after first exchange (2 messages: 1 user + 1 assistant)
-        generated_title = None
-        if conversation.messages.count() == 2 and conversation.title == 'New Conversation':
-            try:
-                assistant_text = papers_data.get('text', str(papers_data))
-                generated_title = generate_title(client, model, message_content, assistant_text)
-                conversation.title = generated_title
-                print(f"[Title Generation] Generated title: {generated_title}")
-            except Exception as e:
-                print(f"[Title Generation] Error: {e}")
-                pass  # Keep default title if generation fails
+        return Response(save_assistant_turn(model, conversation, user_message, content, response_id))
 
-        # Update conversation timestamp
-        conversation.save()
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
+    except Exception as e:
+        return Response({'error': f'OpenAI API error: {str(e)}'}, status=500)
 
-        return Response({
-            'user_message': {
-                'id': user_message.id,
-                'role': 'user',
-                'content': message_content,
-                'created_at': user_message.created_at.isoformat()
-            },
-            'assistant_message': {
-                'id': assistant_message.id,
-                'role': 'assistant',
-                'content': papers_data,
-                'created_at': assistant_message.created_at.isoformat()
-            },
-            'conversation_title': conversation.title
-        })
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def conversation_chat_stream(request, pk):
+    """
+    Send message in conversation - streams the answer as Server-Sent Events.
+
+    Events:
+    - user_message: the saved user message
+    - text: {delta} as the answer's text arrives
+    - paper: {index, paper} as soon as each paper entry is complete
+    - done: same payload as conversation_chat, once the assistant message is saved
+    - error: {error} if the stream fails midway
+    """
+    try:
+        conversation = request.user.conversations.get(pk=pk)
+    except Conversation.DoesNotExist:
+        return Response({'error': 'Conversation not found'}, status=404)
+
+    message_content = request.data.get('message', '')
+    if not message_content:
+        return Response({'error': 'Message is required'}, status=400)
+
+    # Get config from request or use defaults
+    model = request.data.get('model', DEFAULTS['model'])
+    verbosity = request.data.get('verbosity', DEFAULTS['verbosity'])
+    thinking_level = request.data.get('thinking_level', DEFAULTS['thinking_level'])
+    user_role = request.data.get('user_role', DEFAULTS['user_role'])
+    user_knowledge = request.data.get('user_knowledge', DEFAULTS['user_knowledge'])
+    web_search = request.data.get('web_search', DEFAULTS['web_search'])
+    custom_prompt = request.data.get('system_prompt')
+    filters = request.data.get('filters')
+
+    try:
+        client = get_openai_client(request.user)
+
+        # Context papers block (scoped to this conversation's project, ranked by relevance to the message if large)
+        papers_block = context_block(conversation.project, message_content)
+        system_prompt = build_system_prompt(verbosity, thinking_level, user_role, user_knowledge, custom_prompt, papers_block, filters)
+
+        # Save user message
+        user_message = Message.objects.create(
+            conversation=conversation,
+            role='user',
+            content=message_content,
+            system_prompt=system_prompt
+        )
+
+        # Start the upstream request before responding, so request errors still get a status code
+        if getattr(settings, 'OPENAI_CONVERSATION_STATE', False):
+            stream = stream_with_conversation_state(client, model, web_search, conversation, user_message, system_prompt)
+        else:
+            messages = build_history(conversation, system_prompt)
+            stream = stream_openai(client, messages, model, web_search)
 
     except ValueError as e:
         return Response({'error': str(e)}, status=400)
     except Exception as e:
         return Response({'error': f'OpenAI API error: {str(e)}'}, status=500)
 
+    def events():
+        yield sse_event('user_message', {
+            'id': user_message.id,
+            'role': 'user',
+            'content': message_content,
+            'created_at': user_message.created_at.isoformat()
+        })
+        parser = PapersStreamParser()
+        parts = []
+        response_id = ''
+        try:
+            for kind, value in stream:
+                if kind == 'response_id':
+                    response_id = value
+                    continue
+                parts.append(value)
+                for event, data in parser.feed(value):
+                    yield sse_event(event, {'delta': data} if event == 'text' else data)
+
+            # Persist once the answer is complete
+            yield sse_event('done', save_assistant_turn(model, conversation, user_message, ''.join(parts), response_id))
+        except Exception as e:
+            print(f"[Chat Stream] Error: {e}")
+            yield sse_event('error', {'error': f'OpenAI API error: {str(e)}'})
+
+    return sse_response(events())
+
 
 # ============ PAPER ENDPOINTS ============
 
@@ -542,23 +740,16 @@ def paper_list(request):
          return Response({'error': 'Invalid project'}, status=404)
 
     if request.method == 'GET':
-        papers = project.papers.all()
+        try:
+            papers, cursor = keyset_page(
+                project.papers.all(), 'created_at', request.query_params.get('cursor'),
+                page_limit(request.query_params.get('limit'), getattr(settings, 'PAPERS_PAGE_SIZE', 100))
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
         return Response({
-            'papers': [
-                {
-                    'id': p.id,
-                    'title': p.title,
-                    'authors': p.authors,
-                    'date': p.date,
-                    'type': p.paper_type,
-                    'link': p.link,
-                    'summary': p.summary,
-                    'bibtex': p.bibtex,
-                    'inContext': p.in_context,
-                    'created_at': p.created_at.isoformat()
-                }
-                for p in papers
-            ]
+            'papers': [serialize_paper(p) for p in papers],
+            'next_cursor': cursor
         })
 
     # POST - create new paper
@@ -576,18 +767,7 @@ def paper_list(request):
     )
 
     # Return paper immediately without BibTeX - it will be generated via separate endpoint
-    return Response({
-        'id': paper.id,
-        'title': paper.title,
-        'authors': paper.authors,
-        'date': paper.date,
-        'type': paper.paper_type,
-        'link': paper.link,
-        'summary': paper.summary,
-        'bibtex': paper.bibtex,
-        'inContext': paper.in_context,
-        'created_at': paper.created_at.isoformat()
-    }, status=201)
+    return Response(serialize_paper(paper), status=201)
 
 
 @api_view(['PATCH', 'DELETE'])
@@ -623,34 +803,146 @@ def paper_detail(request, pk):
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def paper_generate_bibtex(request, pk):
-    """Generate BibTeX citation for a paper."""
+    """
+    Generate BibTeX citation for a paper.
+
+    Rendered from resolved metadata (see bibtex_builder.py); the LLM only writes entries of
+    papers whose metadata can't be resolved. 'source' is 'metadata' or 'llm'.
+    """
     try:
-        paper = request.user.papers.get(pk=pk)
+        paper = request.user.papers.select_related('project').get(pk=pk)
     except Paper.DoesNotExist:
         return Response({'error': 'Paper not found'}, status=404)
 
     try:
-        client = get_openai_client(request.user)
-        model = DEFAULTS['model']
-        bibtex = generate_bibtex(client, model, {
-            'title': paper.title,
-            'authors': paper.authors,
-            'date': paper.date,
-            'type': paper.paper_type,
-            'link': paper.link
-        })
+        source = 'metadata'
+        bibtex = bibtex_builder.build_entry(paper)
+        if not bibtex:
+            source = 'llm'
+            client = get_openai_client(request.user)
+            bibtex = generate_bibtex(client, DEFAULTS['model'], paper_bibtex_data(paper))
         paper.bibtex = bibtex
-        paper.save()
-        print(f"[BibTeX Generation] Generated for paper: {paper.title[:30]}")
+        paper.save(update_fields=['bibtex', 'updated_at'])
+        print(f"[BibTeX Generation] Generated from {source} for paper: {paper.title[:30]}")
         return Response({
             'id': paper.id,
-            'bibtex': paper.bibtex
+            'bibtex': paper.bibtex,
+            'source': source
         })
     except Exception as e:
         print(f"[BibTeX Generation] Error: {e}")
         return Response({'error': f'Failed to generate BibTeX: {str(e)}'}, status=500)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def project_generate_bibtex(request, pk):
+    """
+    Generate BibTeX citations for all papers of a project in one request.
+
+    Papers that already have BibTeX are kept unless 'overwrite' is true. Metadata is resolved
+    for all papers at once; the LLM writes the remaining entries, BIBTEX_LLM_WORKERS at a time.
+    """
+    try:
+        project = request.user.projects.get(pk=pk)
+    except Project.DoesNotExist:
+        return Response({'error': 'Project not found'}, status=404)
+
+    papers = list(project.papers.all())
+    overwrite = bool(request.data.get('overwrite', False))
+    # Papers to (re)generate, and those whose entries stay (their keys are taken)
+    targets, kept = [], []
+    for p in papers:
+        (targets if overwrite or not p.bibtex else kept).append(p)
+
+    try:
+        entries = bibtex_builder.build_entries(targets, bibtex_builder.existing_keys(p.bibtex for p in kept))
+    except Exception as e:
+        print(f"[BibTeX Generation] Metadata resolution failed: {e}")
+        entries = {p.id: None for p in targets}
+    sources = {paper_id: 'metadata' for paper_id, entry in entries.items() if entry}
+
+    failed = []
+    unresolved = [p for p in targets if not entries[p.id]]
+    if unresolved:
+        try:
+            client = get_openai_client(request.user)
+        except ValueError as e:
+            client = None
+            failed = [{'id': p.id, 'error': str(e)} for p in unresolved]
+
+        def llm_entry(paper):
+            try:
+                return generate_bibtex(client, DEFAULTS['model'], paper_bibtex_data(paper)), None
+            except Exception as e:
+                return None, str(e)
+
+        if client:
+            max_workers = min(len(unresolved), getattr(settings, 'BIBTEX_LLM_WORKERS', 4))
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='bibtex') as executor:
+                for paper, (entry, error) in zip(unresolved, executor.map(llm_entry, unresolved)):
+                    if entry:
+                        entries[paper.id] = entry
+                        sources[paper.id] = 'llm'
+                    else:
+                        failed.append({'id': paper.id, 'error': error})
+
+    updated = []
+    now = timezone.now()
+    for paper in targets:
+        if entries[paper.id]:
+            paper.bibtex = entries[paper.id]
+            # bulk_update() skips auto_now; updated_at feeds the export ETag
+            paper.updated_at = now
+            updated.append(paper)
+    Paper.objects.bulk_update(updated, ['bibtex', 'updated_at'])
+    llm_count = sum(1 for source in sources.values() if source == 'llm')
+    print(f"[BibTeX Generation] Project {project.id}: {len(updated) - llm_count} from metadata, "
+          f"{llm_count} from LLM, {len(failed)} failed, {len(kept)} kept")
+
+    return Response({
+        'papers': [
+            {'id': p.id, 'bibtex': p.bibtex, 'source': sources.get(p.id, 'existing')}
+            for p in papers if p.bibtex
+        ],
+        'generated': len(updated),
+        'failed': failed
+    })
+
+
+def project_export_etag(request, pk, export_format):
+    if not request.user.is_authenticated or export_format not in bibliography.EXPORT_FORMATS:
+        return None
+    project = request.user.projects.filter(pk=pk).first()
+    return bibliography.export_etag(project, export_format) if project else None
+
+
+@require_GET
+@condition(etag_func=project_export_etag)
+def project_export(request, pk, export_format):
+    """
+    Stream the bibliography of a project as 'bib', 'csl-json' or 'ris' (see bibliography.py).
+
+    Responses carry an ETag; requests with a matching If-None-Match get 304 Not Modified.
+    Plain Django view: DRF content negotiation would reject the Accept headers of these file types.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    if export_format not in bibliography.EXPORT_FORMATS:
+        return JsonResponse({'error': f"Unknown format, use one of: {', '.join(bibliography.EXPORT_FORMATS)}"}, status=400)
+    try:
+        project = request.user.projects.get(pk=pk)
+    except Project.DoesNotExist:
+        return JsonResponse({'error': 'Project not found'}, status=404)
+
+    content_type, extension = bibliography.EXPORT_FORMATS[export_format]
+    response = ThreadedStreamingHttpResponse(bibliography.export_stream(project, export_format), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{slugify(project.name) or "references"}.{extension}"'
+    # Revalidate with the ETag on every download
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def copy_paper_to_project(request, pk):
@@ -683,4 +975,13 @@ def copy_paper_to_project(request, pk):
     return Response({
         'id': new_paper.id,
         'title': new_paper.title
-    }, status=201)
\ No newline at end of file
+    }, status=201)
+
+
+# ============ MONITORING ============
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def openai_client_stats(request):
+    """Cached OpenAI clients and connection pool usage of this process (staff only)."""
+    return Response(openai_clients.stats())
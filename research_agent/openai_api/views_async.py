@@ -0,0 +1,420 @@
+"""
+Async implementations of the LLM-bound endpoints (chat, conversation_chat, paper_generate_bibtex,
+verify_message) and of the progress streams (verification_job_events, conversation_title_events).
+
+The synchronous DRF views hold a worker thread for the whole OpenAI round trip, so a WSGI
+server can only have as many requests in flight as it has threads. These views await
+AsyncOpenAI and the async ORM instead; served by an ASGI server (uvicorn research_agent.asgi)
+a single process keeps hundreds of LLM calls in flight. Likewise the progress streams are async
+generators that poll with the async ORM and asyncio.sleep, so an open stream holds no thread
+between polls (the synchronous ones pin a thread for up to VERIFICATION_JOB_STREAM_TIMEOUT).
+
+Plain async Django views: DRF's api_view does not support coroutines. They return the same
+payloads and status codes as their counterparts in views.py / views_verification.py;
+authentication is the session (CSRF is checked by CsrfViewMiddleware). They are routed instead
+of the synchronous views when ASYNC_LLM_VIEWS is enabled.
+"""
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views.decorators.http import require_POST
+import openai
+from django.conf import settings
+from .models import Conversation, Message, Paper, UserProfile, Verification, VerificationJob
+from .answers import answer_payload, parse_papers_response
+from .history import abuild_history, pending_turns, start_summary, summary_due, verification_note
+from .serializers import serialize_verification
+from .streaming import sse_event, sse_response
+from .system_prompts import acontext_block, build_system_prompt
+from . import bibtex_builder, openai_clients, titles
+from .views import (
+    DEFAULTS, TITLE_FIELDS, bibtex_request, chain_rejected, clean_bibtex, paper_bibtex_data, turn_payload,
+)
+from .views_verification import create_verification_job, queued_job_response, verifiable_answer
+import asyncio
+import json
+import time
+
+
+# ============ HELPERS ============
+
+async def authenticated_user(request):
+    """The session user, or None for anonymous requests."""
+    user = await request.auser()
+    return user if user.is_authenticated else None
+
+
+def authentication_required():
+    return JsonResponse({'error': 'Authentication required'}, status=401)
+
+
+def request_data(request):
+    """JSON request body as a dict (what request.data is for the DRF views)."""
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        raise ValueError('Invalid JSON body')
+    if not isinstance(data, dict):
+        raise ValueError('Invalid JSON body')
+    return data
+
+
+def chat_options(data):
+    """Chat configuration from request data, with DEFAULTS for missing values."""
+    return {
+        'model': data.get('model', DEFAULTS['model']),
+        'verbosity': data.get('verbosity', DEFAULTS['verbosity']),
+        'thinking_level': data.get('thinking_level', DEFAULTS['thinking_level']),
+        'user_role': data.get('user_role', DEFAULTS['user_role']),
+        'user_knowledge': data.get('user_knowledge', DEFAULTS['user_knowledge']),
+        'web_search': data.get('web_search', DEFAULTS['web_search']),
+        'custom_prompt': data.get('system_prompt'),
+        'filters': data.get('filters'),
+    }
+
+
+async def aget_openai_client(user):
+    """Get the cached AsyncOpenAI client for the user's API key."""
+    profile = await UserProfile.objects.filter(user_id=user.id).afirst()
+    return openai_clients.get_async_client(profile.openai_api_key if profile else None)
+
+
+async def acall_openai(client, messages, model, web_search):
+    """Async variant of views.call_openai."""
+    if web_search:
+        response = await client.responses.create(
+            model=model,
+            tools=[{"type": "web_search"}],
+            input=messages,
+        )
+        return response.output_text
+    response = await client.chat.completions.create(
+        model=model,
+        messages=messages,
+    )
+    return response.choices[0].message.content
+
+
+async def acall_openai_stateful(client, model, web_search, instructions, input_messages, previous_response_id=None):
+    """Async variant of views.call_openai_stateful. Returns tuple (content, response_id)."""
+    kwargs = {}
+    if web_search:
+        kwargs['tools'] = [{"type": "web_search"}]
+    if previous_response_id:
+        kwargs['previous_response_id'] = previous_response_id
+    response = await client.responses.create(
+        model=model,
+        instructions=instructions,
+        input=input_messages,
+        store=True,
+        **kwargs
+    )
+    return response.output_text, response.id
+
+
+async def achained_turn_input(conversation, user_message, model):
+    """Async variant of views.chained_turn_input."""
+    previous = await conversation.messages.exclude(pk=user_message.pk).order_by('-created_at', '-id').afirst()
+    if not (previous and previous.role == 'assistant' and previous.response_id and previous.response_model == model):
+        return None, None
+    input_messages = []
+    note = verification_note(await previous.verifications.afirst())
+    if note:
+        input_messages.append({'role': 'system', 'content': note})
+    input_messages.append({'role': 'user', 'content': user_message.content})
+    return previous.response_id, input_messages
+
+
+async def achat_with_conversation_state(client, model, web_search, conversation, user_message, system_prompt):
+    """Async variant of views.chat_with_conversation_state."""
+    previous_response_id, input_messages = await achained_turn_input(conversation, user_message, model)
+    if previous_response_id:
+        try:
+            return await acall_openai_stateful(client, model, web_search, system_prompt, input_messages, previous_response_id)
+        except (openai.NotFoundError, openai.BadRequestError) as e:
+            if not chain_rejected(e):
+                raise
+            print(f"[Conversation State] Chain from {previous_response_id} rejected, replaying history: {e}")
+
+    messages = await abuild_history(conversation, system_prompt)
+    return await acall_openai_stateful(client, model, web_search, system_prompt, messages[1:])
+
+
+async def asave_assistant_turn(model, conversation, user_message, content, response_id=''):
+    """Async variant of views.save_assistant_turn."""
+    papers_data = parse_papers_response(content)
+
+    assistant_message = await Message.objects.acreate(
+        conversation=conversation,
+        role='assistant',
+        content=json.dumps(papers_data),
+        payload=answer_payload(papers_data),
+        response_id=response_id or '',
+        response_model=model if response_id else ''
+    )
+
+    update_fields = ['updated_at']
+    deferred = False
+    if conversation.title == 'New Conversation':
+        await conversation.arefresh_from_db(fields=['message_count'])
+        deferred = conversation.message_count == 2
+    if deferred:
+        titles.defer_title(conversation, user_message.content, model)
+        update_fields += TITLE_FIELDS
+    await conversation.asave(update_fields=update_fields)
+    if deferred:
+        titles.start_generation(conversation.id)
+    if summary_due(await pending_turns(conversation).acount()):
+        start_summary(conversation.id, model)
+
+    return turn_payload(user_message, assistant_message, papers_data, conversation)
+
+
+# ============ ENDPOINTS ============
+
+@require_POST
+async def chat(request):
+    """Simple one-off chat - returns papers JSON."""
+    user = await authenticated_user(request)
+    if not user:
+        return authentication_required()
+    try:
+        data = request_data(request)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    message = data.get('message', '')
+    if not message:
+        return JsonResponse({'error': 'Message is required'}, status=400)
+    options = chat_options(data)
+
+    try:
+        client = await aget_openai_client(user)
+        system_prompt = build_system_prompt(
+            options['verbosity'], options['thinking_level'], options['user_role'], options['user_knowledge'],
+            options['custom_prompt'], '', options['filters']
+        )
+        messages = [
+            {'role': 'system', 'content': system_prompt},
+            {'role': 'user', 'content': message}
+        ]
+        content = await acall_openai(client, messages, options['model'], options['web_search'])
+        return JsonResponse(parse_papers_response(content))
+
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except Exception as e:
+        return JsonResponse({'error': f'OpenAI API error: {str(e)}'}, status=500)
+
+
+@require_POST
+async def conversation_chat(request, pk):
+    """Send message in conversation - returns papers JSON."""
+    user = await authenticated_user(request)
+    if not user:
+        return authentication_required()
+    try:
+        conversation = await Conversation.objects.select_related('project').aget(pk=pk, user=user)
+    except Conversation.DoesNotExist:
+        return JsonResponse({'error': 'Conversation not found'}, status=404)
+    try:
+        data = request_data(request)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    message_content = data.get('message', '')
+    if not message_content:
+        return JsonResponse({'error': 'Message is required'}, status=400)
+    options = chat_options(data)
+    model = options['model']
+
+    try:
+        client = await aget_openai_client(user)
+        # Context papers block (scoped to this conversation's project, ranked by relevance to the message if large)
+        papers_block = await acontext_block(conversation.project, message_content)
+        system_prompt = build_system_prompt(
+            options['verbosity'], options['thinking_level'], options['user_role'], options['user_knowledge'],
+            options['custom_prompt'], papers_block, options['filters']
+        )
+
+        user_message = await Message.objects.acreate(
+            conversation=conversation,
+            role='user',
+            content=message_content,
+            system_prompt=system_prompt
+        )
+
+        response_id = ''
+        if getattr(settings, 'OPENAI_CONVERSATION_STATE', False):
+            content, response_id = await achat_with_conversation_state(
+                client, model, options['web_search'], conversation, user_message, system_prompt
+            )
+        else:
+            messages = await abuild_history(conversation, system_prompt)
+            content = await acall_openai(client, messages, model, options['web_search'])
+
+        return JsonResponse(await asave_assistant_turn(model, conversation, user_message, content, response_id))
+
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except Exception as e:
+        return JsonResponse({'error': f'OpenAI API error: {str(e)}'}, status=500)
+
+
+@require_POST
+async def paper_generate_bibtex(request, pk):
+    """Generate BibTeX citation for a paper (from metadata, LLM fallback; see views.paper_generate_bibtex)."""
+    user = await authenticated_user(request)
+    if not user:
+        return authentication_required()
+    try:
+        paper = await Paper.objects.select_related('project').aget(pk=pk, user=user)
+    except Paper.DoesNotExist:
+        return JsonResponse({'error': 'Paper not found'}, status=404)
+
+    try:
+        source = 'metadata'
+        # Blocking OpenAlex I/O: run in the thread pool, not the single thread-sensitive executor
+        # that would serialize concurrent BibTeX requests
+        bibtex = await sync_to_async(bibtex_builder.build_entry, thread_sensitive=False)(paper)
+        if not bibtex:
+            source = 'llm'
+            client = await aget_openai_client(user)
+            response = await client.chat.completions.create(**bibtex_request(DEFAULTS['model'], paper_bibtex_data(paper)))
+            bibtex = clean_bibtex(response)
+        paper.bibtex = bibtex
+        await paper.asave(update_fields=['bibtex', 'updated_at'])
+        print(f"[BibTeX Generation] Generated from {source} for paper: {paper.title[:30]}")
+        return JsonResponse({
+            'id': paper.id,
+            'bibtex': paper.bibtex,
+            'source': source
+        })
+    except Exception as e:
+        print(f"[BibTeX Generation] Error: {e}")
+        return JsonResponse({'error': f'Failed to generate BibTeX: {str(e)}'}, status=500)
+
+
+@require_POST
+async def verify_message(request, message_id):
+    """
+    Queue verification of an assistant message (see views_verification.verify_message).
+
+    Returns the existing verification (200) or the queued verification job (202).
+    """
+    user = await authenticated_user(request)
+    if not user:
+        return authentication_required()
+    try:
+        message = await Message.objects.select_related('conversation').aget(id=message_id)
+        if message.conversation.user_id != user.id:
+            return JsonResponse({'error': 'Message not found'}, status=404)
+
+        if message.role != 'assistant':
+            return JsonResponse({'error': 'Can only verify assistant messages'}, status=400)
+
+        existing_verification = await message.verifications.afirst()
+        if existing_verification:
+            return JsonResponse(await sync_to_async(serialize_verification)(existing_verification))
+
+        job = await message.verification_jobs.filter(status__in=['queued', 'running']).afirst()
+        if not job:
+            parsed_content = verifiable_answer(message)
+            if not parsed_content:
+                return JsonResponse({'error': 'Invalid message format'}, status=400)
+
+            # Fail fast if the user has no API key instead of failing in the worker
+            await aget_openai_client(user)
+
+            model = request_data(request).get('model', DEFAULTS['model'])
+            job = await sync_to_async(create_verification_job)(user, message, model, parsed_content)
+
+        return JsonResponse(await sync_to_async(queued_job_response)(job), status=202)
+
+    except Message.DoesNotExist:
+        return JsonResponse({'error': 'Message not found'}, status=404)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except Exception as e:
+        print(f"[Verification] Error: {e}")
+        return JsonResponse({'error': f'Verification failed: {str(e)}'}, status=500)
+
+
+async def verification_job_events(request, job_id):
+    """Async variant of views_verification.verification_job_events (same events)."""
+    user = await authenticated_user(request)
+    if not user:
+        return authentication_required()
+    try:
+        job = await VerificationJob.objects.aget(pk=job_id, user=user)
+    except VerificationJob.DoesNotExist:
+        return JsonResponse({'error': 'Verification job not found'}, status=404)
+
+    poll_interval = getattr(settings, 'VERIFICATION_JOB_POLL_INTERVAL', 1.0)
+    max_duration = getattr(settings, 'VERIFICATION_JOB_STREAM_TIMEOUT', 600)
+
+    async def events():
+        sent_papers = set()
+        last_stage = None
+        started = time.monotonic()
+        while True:
+            current = await VerificationJob.objects.aget(pk=job.pk)
+            if (current.status, current.stage) != last_stage:
+                last_stage = (current.status, current.stage)
+                yield sse_event('stage', {'status': current.status, 'stage': current.stage})
+
+            finished = current.papers.filter(status__in=['reused', 'done', 'failed']).exclude(paper_index__in=sent_papers)
+            async for paper in finished:
+                sent_papers.add(paper.paper_index)
+                yield sse_event('paper', {
+                    'paper_index': paper.paper_index,
+                    'title': paper.title,
+                    'status': paper.status,
+                    'result': paper.result,
+                })
+
+            if current.status == 'completed':
+                verification = await Verification.objects.aget(pk=current.verification_id)
+                yield sse_event('complete', await sync_to_async(serialize_verification)(verification))
+                return
+            if current.status == 'failed':
+                yield sse_event('error', {'error': current.error or 'Verification failed'})
+                return
+            if time.monotonic() - started > max_duration:
+                yield sse_event('timeout', {'job_id': current.id, 'status': current.status})
+                return
+            await asyncio.sleep(poll_interval)
+
+    return sse_response(events())
+
+
+async def conversation_title_events(request, pk):
+    """Async variant of views.conversation_title_events (same events)."""
+    user = await authenticated_user(request)
+    if not user:
+        return authentication_required()
+    conversation = await Conversation.objects.only('title_status', 'title_retry_at').filter(pk=pk, user=user).afirst()
+    if conversation is None:
+        return JsonResponse({'error': 'Conversation not found'}, status=404)
+    # Its process stopped and no worker picked it up: generate it here
+    await sync_to_async(titles.restart_stalled)(conversation)
+
+    poll_interval = getattr(settings, 'VERIFICATION_JOB_POLL_INTERVAL', 1.0)
+    max_duration = getattr(settings, 'CONVERSATION_TITLE_STREAM_TIMEOUT', 60)
+
+    async def events():
+        started = time.monotonic()
+        while True:
+            current = await Conversation.objects.only('title', 'title_status', 'title_retry_at').aget(pk=pk)
+            if current.title_status != 'pending':
+                yield sse_event('title', {'id': current.id, 'title': current.title, 'title_status': current.title_status})
+                return
+            if titles.stalled(current):
+                yield sse_event('stalled', {'id': current.id, 'title': current.title, 'title_status': current.title_status})
+                return
+            if time.monotonic() - started > max_duration:
+                yield sse_event('timeout', {'id': current.id, 'title_status': current.title_status})
+                return
+            await asyncio.sleep(poll_interval)
+
+    return sse_response(events())
@@ -5,20 +5,27 @@ This module provides a two-step verification process:
 1. Paper Verification - Verifies papers using trafilatura and OpenAlex API (only if not already in DB)
 2. Comprehensive Response Evaluation - Uses verified paper data to evaluate the assistant's textual response
 
-Paper verifications are stored permanently in the database and reused across verifications.
+Paper-level verification results are stored in a shared cache keyed by canonical paper
+identifier (DOI, arXiv id or URL) and reused across verifications until they expire.
 """
 
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from openai import OpenAI
-from .models import Message, Verification, PaperVerification
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.http import JsonResponse
+from .models import Message, Verification, PaperVerification, VerificationJob, VerificationJobPaper
+from .serializers import serialize_verification
+from .streaming import sse_event, sse_response
+from . import evaluation_schema, extraction, fetcher, http_cache, prompt_budget, verification_cache
+from .openalex import query_openalex, resolve_papers
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 import json
 import re
-import trafilatura
-from curl_cffi import requests
+import time
 from .views import DEFAULTS, get_openai_client
-import httpx
 
 
 # def get_openai_client(user):
@@ -28,165 +35,133 @@ import httpx
 #     return OpenAI(api_key=api_key)
 
 
-def parse_papers_response(content):
-    """Parse JSON response containing text and papers."""
-    try:
-        data = json.loads(content)
-        if 'text' in data and 'papers' in data:
-            return data
-    except:
-        pass
-    return None
+def verifiable_answer(message):
+    """Parsed answer of an assistant message (Message.payload), or None if it could not be parsed."""
+    payload = message.payload
+    if not payload or payload.get('error'):
+        return None
+    return payload
 
 
 def fetch_paper_content(url):
     """
-    Fetch paper content from URL using trafilatura.
+    Fetch paper content from URL (HTML page or PDF).
     Returns dict with title, authors, date, and full text.
-    Single HTTP request for efficiency.
+    Single streamed HTTP request through the shared fetcher session pool that stops after a per-type
+    byte budget; results are kept in the on-disk HTTP cache and revalidated with ETag/Last-Modified
+    once they expire.
     """
     if not url:
         return {'error': 'No URL provided', 'success': False}
     
+    cached_result, cached_entry = http_cache.lookup(url)
+    if cached_result is not None:
+        return cached_result
+    
     try:
-        # Fetch HTML content with timeout
-        response = requests.get(url, impersonate="chrome", timeout=15)
+        # Fetch content with timeout (conditional request if we hold an expired copy)
+        response, kind, content, truncated = fetcher.fetch_limited(
+            url, headers=http_cache.conditional_headers(cached_entry)
+        )
+        if response.status_code == 304 and cached_entry:
+            return http_cache.revalidated(url, cached_entry, response.headers)
         if response.status_code >= 400:
-            return {'error': f'HTTP {response.status_code}', 'success': False}
+            result = {'error': f'HTTP {response.status_code}', 'success': False}
+            http_cache.store(url, response.status_code, response.headers, result)
+            return result
         
-        data = trafilatura.bare_extraction(
-            response.text,
-            include_comments=False,
-            with_metadata=True 
-        )
+        # CPU-heavy parsing runs in the extraction process pool
+        if kind == 'pdf':
+            data = extraction.extract_pdf(content, truncated=truncated)
+        else:
+            # trafilatura detects the encoding of raw bytes itself
+            data = extraction.extract(content)
         
         result = {
             'success': True,
             'url': url,
-            'title': data.title if data and data.title else None,
-            'authors': data.author if data and data.author else None,
-            'date': data.date if data and data.date else None,
-            'full_text': data.text[:3000] if data and data.text else None,  # First 3000 chars
+            'content_type': kind,
+            'truncated': truncated,
+            'title': data['title'],
+            'authors': data['authors'],
+            'date': data['date'],
+            'full_text': data['full_text'],  # First 3000 chars
         }
         
+        http_cache.store(url, response.status_code, response.headers, result)
         return result
         
     except Exception as e:
         return {'error': f'Fetch failed: {str(e)[:100]}', 'success': False}
 
 
-def query_openalex(paper_info):
+def timed_call(func, *args):
     """
-    Query OpenAlex API for paper metadata using DOI or search by title.
-    Returns dict with verified paper information including citations, authors, venue.
+    Run func(*args) and measure it. Returns tuple (result, exception or None, seconds).
+    
+    The duration is returned rather than recorded: a lookup that runs past its deadline
+    finishes in the background, after the caller has already recorded the deadline.
     """
+    started = time.monotonic()
     try:
-        # Extract DOI from link if present
-        doi = None
-        link = paper_info.get('link', '')
-        if 'doi.org/' in link:
-            doi = link.split('doi.org/')[-1]
-        
-        # Build query
-        base_url = "https://api.openalex.org"
-        
-        if doi:
-            # Direct DOI lookup
-            url = f"{base_url}/works/doi:{doi}"
-                    # Fetch work details
-            response = httpx.get(url, timeout=10.0)
-            if response.status_code != 200:
-                return {'error': f'OpenAlex API error: {response.status_code}', 'success': False}
-        
-            work = response.json()
-        else:
-            # Search by title
-            title = paper_info.get('title', '')
-            if not title:
-                return {'error': 'No title or DOI provided', 'success': False}
-            
-            url = f"{base_url}/works"
-            params = {
-                'filter': f'title.search:{title}',
-                'per-page': 1
-            }
-            
-            response = httpx.get(url, params=params, timeout=10.0)
-            if response.status_code != 200:
-                return {'error': f'OpenAlex API error: {response.status_code}', 'success': False}
-            
-            data = response.json()
-            results = data.get('results', [])
-            if not results:
-                return {'error': 'Paper not found in OpenAlex', 'success': False}
-            
-            # Get detailed work info
-            work = results[0]
-                
-        # Extract relevant metadata (filtered but raw for LLM evaluation)
-        primary_location = work.get('primary_location', {})
-        source = primary_location.get('source', {}) if primary_location else {}
-        
-        result = {
-            'success': True,
-            'title': work.get('title'),
-            'doi': work.get('doi'),
-            'publication_year': work.get('publication_year'),
-            'publication_date': work.get('publication_date'),
-            'cited_by_count': work.get('cited_by_count', 0),
-            'authors': [
-                {
-                    'name': author.get('author', {}).get('display_name'),
-                    'orcid': author.get('author', {}).get('orcid'),
-                    'works_count': author.get('author', {}).get('works_count', 0),
-                    'cited_by_count': author.get('author', {}).get('cited_by_count', 0),
-                    'h_index': author.get('author', {}).get('summary_stats', {}).get('h_index', 0)
-                }
-                for author in work.get('authorships', [])
-            ],
-            'venue': {
-                'name': source.get('display_name'),
-                'type': source.get('type'),
-                'issn': source.get('issn_l'),
-            } if source else None,
-            'open_access': work.get('open_access', {}).get('is_oa', False),
-            'pdf_url': primary_location.get('pdf_url'),
-            'referenced_works_count': work.get('referenced_works_count', 0),
-            # 'concepts': [
-            #     {'name': c.get('display_name'), 'score': c.get('score')}
-            #     for c in work.get('concepts', [])[:5]  # Top 5 concepts
-            # ]
-        }
-        
-        return result
-        
-    except httpx.TimeoutException:
-        return {'error': 'OpenAlex request timeout', 'success': False}
+        return func(*args), None, round(time.monotonic() - started, 3)
     except Exception as e:
-        return {'error': f'OpenAlex query failed: {str(e)[:100]}', 'success': False}
+        return None, e, round(time.monotonic() - started, 3)
 
 
-
-
-
-def verify_single_paper(client, model, paper_info, paper_index):
+def fetch_content_and_metadata(link, paper_info, timings, openalex_lookup=None):
     """
-    Step 1: Verify a single paper using trafilatura and OpenAlex.
+    Run fetch_paper_content and the OpenAlex lookup in parallel.
     
-    Process:
-    1. Fetches paper content with trafilatura (single HTTP request) - FIRST
-    2. Queries OpenAlex for metadata (citations, authors, venue)
-    3. Uses LLM to evaluate the paper comprehensively:
-       - Verify content matches claimed paper
-       - Evaluate paper quality/credibility based on OpenAlex data
-       - Assess assistant's summary accuracy
+    openalex_lookup is a callable returning the OpenAlex metadata (e.g. waiting for a
+    batched lookup of all papers of a message); defaults to query_openalex(paper_info).
+    
+    The two lookups are independent, so the I/O stage takes max(fetch, openalex)
+    instead of their sum. Each lookup has its own deadline
+    (VERIFICATION_FETCH_DEADLINE / VERIFICATION_OPENALEX_DEADLINE); a lookup that
+    is still running when its deadline passes is reported as failed and left to
+    finish in the background.
     
-    Returns dict with verification results including LLM-calculated scores.
+    Per-step durations (seconds) are written into the timings dict, by this thread only.
+    Returns tuple (content_fetch, openalex_metadata).
     """
+    fetch_deadline = getattr(settings, 'VERIFICATION_FETCH_DEADLINE', 20)
+    openalex_deadline = getattr(settings, 'VERIFICATION_OPENALEX_DEADLINE', 15)
     
-    print(f"[Paper Verification] Verifying paper {paper_index}: {paper_info.get('title', '')[:50]}")
+    executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='paper-io')
+    started = time.monotonic()
+    try:
+        fetch_future = executor.submit(timed_call, fetch_paper_content, link)
+        if openalex_lookup is None:
+            openalex_lookup = lambda: query_openalex(paper_info)
+        openalex_future = executor.submit(timed_call, openalex_lookup)
+        
+        try:
+            paper_content, error, timings['content_fetch'] = fetch_future.result(timeout=fetch_deadline)
+            if error:
+                paper_content = {'error': f'Fetch failed: {str(error)[:100]}', 'success': False}
+        except FuturesTimeoutError:
+            timings['content_fetch'] = fetch_deadline
+            paper_content = {'error': f'Fetch deadline exceeded ({fetch_deadline}s)', 'success': False}
+        
+        remaining = max(0, openalex_deadline - (time.monotonic() - started))
+        try:
+            openalex_data, error, timings['openalex'] = openalex_future.result(timeout=remaining)
+            if error:
+                openalex_data = {'error': f'OpenAlex query failed: {str(error)[:100]}', 'success': False}
+        except FuturesTimeoutError:
+            timings['openalex'] = openalex_deadline
+            openalex_data = {'error': f'OpenAlex deadline exceeded ({openalex_deadline}s)', 'success': False}
+    finally:
+        # Don't wait for lookups that ran past their deadline
+        executor.shutdown(wait=False, cancel_futures=True)
     
-    result = {
+    return paper_content, openalex_data
+
+
+def new_paper_result(paper_info, paper_index):
+    """Base result dict for a paper with the claim made by the assistant."""
+    return {
         'paper_index': paper_index,
         'title': paper_info.get('title', ''),
         'link': paper_info.get('link', ''),
@@ -194,20 +169,40 @@ def verify_single_paper(client, model, paper_info, paper_index):
         'claimed_date': paper_info.get('date', ''),
         'assistant_summary': paper_info.get('summary', '')
     }
+
+
+def gather_paper_evidence(paper_info, paper_index, openalex_lookup=None):
+    """
+    Step 1.1 + 1.2: Fetch paper content and query OpenAlex at the same time.
+    
+    Returns the paper result with content_fetch, openalex_metadata and I/O timings
+    (timings['started'] is the monotonic start time, removed once the paper is evaluated).
+    """
+    print(f"[Paper Verification] Verifying paper {paper_index}: {paper_info.get('title', '')[:50]}")
+    
+    result = new_paper_result(paper_info, paper_index)
+    timings = {'started': time.monotonic()}
     
-    # Step 1.1: Fetch paper content FIRST with trafilatura
     link = paper_info.get('link', '')
-    paper_content = fetch_paper_content(link)
+    paper_content, openalex_data = fetch_content_and_metadata(link, paper_info, timings, openalex_lookup)
     result['content_fetch'] = paper_content
-    
-    # Step 1.2: Query OpenAlex for metadata
-    openalex_data = query_openalex(paper_info)
     result['openalex_metadata'] = openalex_data
-    
-    # Step 1.3: Use LLM to evaluate everything comprehensively
-    verification_prompt = f"""You are evaluating a research paper for verification. Analyze the following information and provide a comprehensive evaluation.
+    timings['io'] = round(time.monotonic() - timings['started'], 3)
+    result['timings'] = timings
+    return result
+
+
+def finish_timings(result, llm_seconds):
+    timings = result['timings']
+    started = timings.pop('started', None)
+    timings['llm_evaluation'] = round(llm_seconds, 3)
+    if started is not None:
+        timings['total'] = round(time.monotonic() - started, 3)
+
 
-CLAIMED PAPER (from assistant):
+def paper_evidence(paper_info, paper_content, openalex_data):
+    """Claimed information, fetched content and OpenAlex metadata of one paper, as prompt text."""
+    return f"""CLAIMED PAPER (from assistant):
 Title: {paper_info.get('title', '')}
 Authors: {paper_info.get('authors', '')}
 Year: {paper_info.get('date', '')}
@@ -218,11 +213,10 @@ FETCHED CONTENT (from URL):
 {json.dumps(paper_content, indent=2)}
 
 OPENALEX METADATA (bibliometric data):
-{json.dumps(openalex_data, indent=2)}
+{json.dumps(openalex_data, indent=2)}"""
 
-Evaluate the paper on these dimensions:
 
-1. **Content Match Verification**:
+PAPER_EVALUATION_CRITERIA = """1. **Content Match Verification**:
    - Does the fetched content match the claimed paper information?
    - Title similarity, author match, date match
    - Is this actually an academic/research paper?
@@ -234,11 +228,10 @@ Evaluate the paper on these dimensions:
 
 3. **Summary Accuracy**:
    - Does the assistant's summary accurately reflect the paper content?
-   - Are there any misrepresentations or inaccuracies in the summary?
+   - Are there any misrepresentations or inaccuracies in the summary?"""
 
-Respond ONLY with valid JSON in this exact format:
-{{
-    "content_match": {{
+PAPER_EVALUATION_FORMAT = """{
+    "content_match": {
         "matches": <true/false>,
         "confidence": <0-100>,
         "title_match": <true/false>,
@@ -246,32 +239,65 @@ Respond ONLY with valid JSON in this exact format:
         "date_match": <true/false>,
         "issues": ["<issue 1>", "<issue 2>", ...],
         "explanation": "<brief explanation>"
-    }},
-    "paper_quality": {{
+    },
+    "paper_quality": {
         "credibility_score": <1-10, based on citations, authors, venue>,
         "quality_score": <1-10, overall academic quality>,
         "credibility_notes": "<explain the credibility assessment>",
         "quality_notes": "<explain the quality assessment>"
-    }},
-    "summary_evaluation": {{
+    },
+    "summary_evaluation": {
         "accurate": <true/false>,
         "score": <1-10, how accurate is the summary>,
         "issues": ["<issue 1>", "<issue 2>", ...],
         "notes": "<explanation of summary accuracy>"
-    }},
+    },
     "overall_assessment": "<2-3 sentence overall evaluation>"
-}}
+}"""
+
+PAPER_EVALUATION_SYSTEM_PROMPT = 'You are a research paper verification expert. Evaluate papers comprehensively based on fetched content, bibliometric data, and claimed information. Respond only with valid JSON.'
+
+
+def apply_evaluation(result, evaluation):
+    """Copy an LLM paper evaluation into a paper result, including the scores stored in the database."""
+    result['content_verification'] = evaluation.get('content_match', {})
+    result['paper_quality'] = evaluation.get('paper_quality', {})
+    result['summary_evaluation'] = evaluation.get('summary_evaluation', {})
+    result['overall_assessment'] = evaluation.get('overall_assessment', '')
+    
+    # Extract scores for database storage
+    result['credibility_score'] = evaluation.get('paper_quality', {}).get('credibility_score', 5.0)
+    result['credibility_notes'] = evaluation.get('paper_quality', {}).get('credibility_notes', '')
+    result['overall_quality'] = evaluation.get('paper_quality', {}).get('quality_score', 5.0)
+    return result
+
+
+def evaluate_paper(client, model, paper_info, result):
+    """
+    Step 1.3: Use LLM to evaluate one paper comprehensively:
+    - Verify content matches claimed paper
+    - Evaluate paper quality/credibility based on OpenAlex data
+    - Assess assistant's summary accuracy
+    """
+    verification_prompt = f"""You are evaluating a research paper for verification. Analyze the following information and provide a comprehensive evaluation.
+
+{paper_evidence(paper_info, result['content_fetch'], result['openalex_metadata'])}
+
+Evaluate the paper on these dimensions:
+
+{PAPER_EVALUATION_CRITERIA}
+
+Respond ONLY with valid JSON in this exact format:
+{PAPER_EVALUATION_FORMAT}
 
 Be thorough and fair. If data is missing (e.g., OpenAlex failed), note it but still evaluate what you have."""
     
+    llm_started = time.monotonic()
     try:
         llm_response = client.chat.completions.create(
             model=model,
             messages=[
-                {
-                    'role': 'system',
-                    'content': 'You are a research paper verification expert. Evaluate papers comprehensively based on fetched content, bibliometric data, and claimed information. Respond only with valid JSON.'
-                },
+                {'role': 'system', 'content': PAPER_EVALUATION_SYSTEM_PROMPT},
                 {'role': 'user', 'content': verification_prompt}
             ],
             temperature=0.1
@@ -295,52 +321,239 @@ Be thorough and fair. If data is missing (e.g., OpenAlex failed), note it but st
                 else:
                     raise ValueError("Could not parse verification response")
         
-        result['content_verification'] = evaluation.get('content_match', {})
-        result['paper_quality'] = evaluation.get('paper_quality', {})
-        result['summary_evaluation'] = evaluation.get('summary_evaluation', {})
-        result['overall_assessment'] = evaluation.get('overall_assessment', '')
-        
-        # Extract scores for database storage
-        result['credibility_score'] = evaluation.get('paper_quality', {}).get('credibility_score', 5.0)
-        result['credibility_notes'] = evaluation.get('paper_quality', {}).get('credibility_notes', '')
-        result['overall_quality'] = evaluation.get('paper_quality', {}).get('quality_score', 5.0)
+        apply_evaluation(result, evaluation)
         
     except Exception as e:
         print(f"[Paper Verification] LLM evaluation error: {e}")
-        # Return fallback structure
-        result['content_verification'] = {
-            'matches': False,
-            'confidence': 0,
-            'issues': [f'Evaluation error: {str(e)[:100]}'],
-            'explanation': 'LLM evaluation failed'
-        }
-        result['paper_quality'] = {
-            'credibility_score': 5.0,
-            'quality_score': 5.0,
-            'credibility_notes': 'Evaluation failed',
-            'quality_notes': 'Evaluation failed'
-        }
-        result['summary_evaluation'] = {
-            'accurate': False,
-            'score': 5.0,
-            'issues': ['Evaluation failed'],
-            'notes': 'Could not evaluate summary'
-        }
-        result['overall_assessment'] = f'Paper evaluation failed: {str(e)[:100]}'
-        result['credibility_score'] = 5.0
-        result['credibility_notes'] = 'Evaluation failed'
-        result['overall_quality'] = 5.0
+        apply_failed_evaluation(result, e)
+    
+    finish_timings(result, time.monotonic() - llm_started)
+    return result
+
+
+def verify_single_paper(client, model, paper_info, paper_index, openalex_lookup=None):
+    """
+    Step 1: Verify a single paper using trafilatura and OpenAlex.
     
+    Process:
+    1. Fetches paper content with trafilatura (single HTTP request)
+    2. Queries OpenAlex for metadata (citations, authors, venue) - in parallel with 1.
+    3. Uses LLM to evaluate the paper comprehensively:
+       - Verify content matches claimed paper
+       - Evaluate paper quality/credibility based on OpenAlex data
+       - Assess assistant's summary accuracy
+    
+    Returns dict with verification results including LLM-calculated scores
+    and per-step timings (seconds).
+    """
+    result = gather_paper_evidence(paper_info, paper_index, openalex_lookup)
+    return evaluate_paper(client, model, paper_info, result)
+
+
+def evaluate_papers_batched(client, model, papers):
+    """
+    Evaluate several papers with a single structured-output LLM request.
+    
+    papers is a list of (paper_info, result) tuples whose results already hold the
+    gathered evidence. The shared instructions are sent once, followed by the evidence
+    of every paper; the response must match BATCH_EVALUATION_SCHEMA (one evaluation per
+    paper_index). Every returned evaluation is validated again before it is applied.
+    
+    Returns list of (paper_info, result) tuples that could not be evaluated in the batch
+    (request failed, paper missing from the response or evaluation failed validation).
+    """
+    by_index = {result['paper_index']: (paper_info, result) for paper_info, result in papers}
+    evidence = "\n\n".join(
+        f"===== PAPER paper_index={result['paper_index']} =====\n"
+        f"{paper_evidence(paper_info, result['content_fetch'], result['openalex_metadata'])}"
+        for paper_info, result in papers
+    )
+    batch_prompt = f"""You are evaluating {len(papers)} research papers for verification. Analyze the following information and provide a comprehensive evaluation of each paper, independently of the others.
+
+{evidence}
+
+Evaluate each paper on these dimensions:
+
+{PAPER_EVALUATION_CRITERIA}
+
+Respond ONLY with valid JSON: {{"papers": [<one evaluation per paper>]}}, where each evaluation carries the paper's "paper_index" and has this format:
+{PAPER_EVALUATION_FORMAT}
+
+Be thorough and fair. If data is missing (e.g., OpenAlex failed), note it but still evaluate what you have."""
+    
+    llm_started = time.monotonic()
+    try:
+        llm_response = client.chat.completions.create(
+            model=model,
+            messages=[
+                {'role': 'system', 'content': PAPER_EVALUATION_SYSTEM_PROMPT},
+                {'role': 'user', 'content': batch_prompt}
+            ],
+            response_format=evaluation_schema.batch_response_format(),
+            temperature=0.1
+        )
+        response = json.loads(llm_response.choices[0].message.content)
+        evaluations = response.get('papers') if isinstance(response, dict) else None
+        if not isinstance(evaluations, list):
+            raise ValueError('Batch response has no papers list')
+    except Exception as e:
+        print(f"[Paper Verification] Batched evaluation failed, evaluating papers individually: {e}")
+        return papers
+    llm_seconds = time.monotonic() - llm_started
+    
+    evaluated = set()
+    for evaluation in evaluations:
+        paper_index = evaluation.get('paper_index') if isinstance(evaluation, dict) else None
+        if paper_index not in by_index or paper_index in evaluated:
+            continue
+        errors = evaluation_schema.schema_errors(evaluation, evaluation_schema.BATCH_EVALUATION_SCHEMA['properties']['papers']['items'])
+        if errors:
+            print(f"[Paper Verification] Invalid batched evaluation for paper {paper_index}: {errors[:3]}")
+            continue
+        _, result = by_index[paper_index]
+        apply_evaluation(result, evaluation)
+        finish_timings(result, llm_seconds)
+        result['timings']['llm_batch_size'] = len(papers)
+        evaluated.add(paper_index)
+    
+    return [(paper_info, result) for paper_info, result in papers if result['paper_index'] not in evaluated]
+
+
+def apply_failed_evaluation(result, error):
+    """Fill a paper result with the fallback evaluation used when verification fails."""
+    result['content_verification'] = {
+        'matches': False,
+        'confidence': 0,
+        'issues': [f'Evaluation error: {str(error)[:100]}'],
+        'explanation': 'LLM evaluation failed'
+    }
+    result['paper_quality'] = {
+        'credibility_score': 5.0,
+        'quality_score': 5.0,
+        'credibility_notes': 'Evaluation failed',
+        'quality_notes': 'Evaluation failed'
+    }
+    result['summary_evaluation'] = {
+        'accurate': False,
+        'score': 5.0,
+        'issues': ['Evaluation failed'],
+        'notes': 'Could not evaluate summary'
+    }
+    result['overall_assessment'] = f'Paper evaluation failed: {str(error)[:100]}'
+    result['credibility_score'] = 5.0
+    result['credibility_notes'] = 'Evaluation failed'
+    result['overall_quality'] = 5.0
+    result['evaluation_error'] = str(error)[:100]
     return result
 
 
+def verify_papers_concurrently(client, model, papers_to_verify, max_workers=None, on_result=None, batched=None):
+    """
+    Verify several papers at once with a bounded thread pool.
+    
+    papers_to_verify is a list of (paper_index, paper_info) tuples. Each paper is
+    verified independently: an exception raised while verifying one paper is turned
+    into a fallback result for that paper and does not affect the others.
+    on_result(paper_index, result) is called from the calling thread as soon as
+    each paper finishes.
+    
+    OpenAlex metadata for all papers is resolved in one batched lookup that runs
+    alongside the content fetches.
+    
+    With batched=True (default: VERIFICATION_BATCHED_EVALUATION) the pool only gathers
+    evidence, and all papers are then scored in one structured-output LLM request
+    (chunks of VERIFICATION_BATCH_MAX_PAPERS); papers the batch could not evaluate
+    fall back to individual requests.
+    
+    Returns dict mapping paper_index -> verification result.
+    """
+    if not papers_to_verify:
+        return {}
+    
+    if max_workers is None:
+        max_workers = getattr(settings, 'VERIFICATION_MAX_CONCURRENCY', 5)
+    max_workers = max(1, min(max_workers, len(papers_to_verify)))
+    if batched is None:
+        batched = getattr(settings, 'VERIFICATION_BATCHED_EVALUATION', False)
+    
+    # Separate executor: papers wait on the batch, so it must not queue behind them
+    openalex_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='openalex-batch')
+    openalex_batch = openalex_executor.submit(resolve_papers, [paper_info for _, paper_info in papers_to_verify])
+    openalex_executor.shutdown(wait=False)
+    
+    def openalex_lookup(position):
+        return lambda: openalex_batch.result()[position]
+    
+    results = {}
+    
+    def handle_failure(paper_index, paper_info, error):
+        print(f"[Paper Verification] Paper {paper_index} failed: {error}")
+        results[paper_index] = apply_failed_evaluation(new_paper_result(paper_info, paper_index), error)
+        if on_result:
+            on_result(paper_index, results[paper_index])
+    
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='paper-verify') as executor:
+        if batched:
+            futures = {
+                executor.submit(gather_paper_evidence, paper_info, paper_index, openalex_lookup(position)): (paper_index, paper_info)
+                for position, (paper_index, paper_info) in enumerate(papers_to_verify)
+            }
+            gathered = []
+            for future in as_completed(futures):
+                paper_index, paper_info = futures[future]
+                try:
+                    gathered.append((paper_info, future.result()))
+                except Exception as e:
+                    handle_failure(paper_index, paper_info, e)
+            gathered.sort(key=lambda item: item[1]['paper_index'])
+            
+            batch_size = max(1, getattr(settings, 'VERIFICATION_BATCH_MAX_PAPERS', 10))
+            fallback = []
+            for start in range(0, len(gathered), batch_size):
+                chunk = gathered[start:start + batch_size]
+                failed = evaluate_papers_batched(client, model, chunk)
+                failed_indexes = {result['paper_index'] for _, result in failed}
+                for paper_info, result in chunk:
+                    if result['paper_index'] not in failed_indexes:
+                        results[result['paper_index']] = result
+                        if on_result:
+                            on_result(result['paper_index'], result)
+                fallback.extend(failed)
+            
+            if fallback:
+                print(f"[Paper Verification] Evaluating {len(fallback)} paper(s) individually")
+            futures = {
+                executor.submit(evaluate_paper, client, model, paper_info, result): (result['paper_index'], paper_info)
+                for paper_info, result in fallback
+            }
+        else:
+            futures = {
+                executor.submit(verify_single_paper, client, model, paper_info, paper_index, openalex_lookup(position)): (paper_index, paper_info)
+                for position, (paper_index, paper_info) in enumerate(papers_to_verify)
+            }
+        
+        for future in as_completed(futures):
+            paper_index, paper_info = futures[future]
+            try:
+                results[paper_index] = future.result()
+            except Exception as e:
+                handle_failure(paper_index, paper_info, e)
+                continue
+            if on_result:
+                on_result(paper_index, results[paper_index])
+    
+    return results
+
+
 def comprehensive_response_evaluation(client, model, conversation_history, system_prompt, 
                                       assistant_response, papers_data, verified_papers):
     """
     Step 2: Comprehensive evaluation of the assistant's response.
     
-    Uses full conversation history, system prompt, original papers data,
+    Uses conversation history, system prompt, original papers data,
     and verified paper information to evaluate the response quality.
+    The prompt is assembled within VERIFICATION_PROMPT_TOKEN_BUDGET (see prompt_budget);
+    the estimated token counts are returned under 'prompt_tokens'.
     
     This combines textual evaluation with knowledge of verified papers to:
     - Assess response accuracy and relevance
@@ -351,32 +564,27 @@ def comprehensive_response_evaluation(client, model, conversation_history, syste
     Returns dict with comprehensive evaluation results.
     """
     
-    # Build conversation context
-    conversation_context = "\n".join([
-        f"{msg['role'].upper()}: {msg['content']}"
-        for msg in conversation_history
-    ])
-    
-    # Format papers and verifications
-    papers_formatted = json.dumps(papers_data, indent=2)
-    verified_formatted = json.dumps(verified_papers, indent=2)
+    # Compact, token-budgeted sections (digests instead of full verification results)
+    context = prompt_budget.build_evaluation_context(
+        conversation_history, system_prompt, assistant_response, papers_data, verified_papers
+    )
     
     evaluation_prompt = f"""You are a scientific verification assistant. Perform a comprehensive evaluation of this research assistant's response.
 
 SYSTEM INSTRUCTIONS (given to the assistant):
-{system_prompt}
+{context['system_prompt']}
 
-FULL CONVERSATION HISTORY:
-{conversation_context}
+CONVERSATION HISTORY (before the response; older messages may be condensed):
+{context['history']}
 
 ASSISTANT'S RESPONSE TO EVALUATE:
-{assistant_response}
+{context['assistant_response']}
 
-PAPERS PROVIDED BY ASSISTANT:
-{papers_formatted}
+PAPERS PROVIDED BY ASSISTANT (one JSON object per line):
+{context['papers']}
 
-VERIFIED PAPER DATA (from our verification process):
-{verified_formatted}
+VERIFIED PAPER DATA (from our verification process, one digest per paper):
+{context['verified_papers']}
 
 Perform a comprehensive evaluation considering:
 
@@ -446,6 +654,10 @@ Respond ONLY with valid JSON in this exact format:
 
 Be thorough and fair. Acknowledge quality where present, but be specific about concerns."""
     
+    token_counts = context['token_counts']
+    token_counts['prompt'] = prompt_budget.estimate_tokens(evaluation_prompt)
+    print(f"[Comprehensive Evaluation] Prompt ~{token_counts['prompt']} tokens (budget {token_counts['budget']}, history {token_counts['history_messages']})")
+    
     try:
         response = client.chat.completions.create(
             model=model,
@@ -477,6 +689,10 @@ Be thorough and fair. Acknowledge quality where present, but be specific about c
                 else:
                     raise ValueError("Could not parse evaluation response")
         
+        usage = getattr(response, 'usage', None)
+        if usage is not None and getattr(usage, 'prompt_tokens', None):
+            token_counts['api_prompt_tokens'] = usage.prompt_tokens
+        evaluation['prompt_tokens'] = token_counts
         return evaluation
         
     except Exception as e:
@@ -514,21 +730,216 @@ Be thorough and fair. Acknowledge quality where present, but be specific about c
                 "description": "Comprehensive evaluation failed",
                 "explanation": f"Error: {str(e)[:100]}"
             }],
-            "summary": f"Evaluation could not be completed: {str(e)[:100]}"
+            "summary": f"Evaluation could not be completed: {str(e)[:100]}",
+            "prompt_tokens": token_counts
         }
 
 
+def serialize_job(job):
+    """Serialize a VerificationJob with per-paper progress for API responses."""
+    data = {
+        'job_id': job.id,
+        'message_id': job.message_id,
+        'status': job.status,
+        'stage': job.stage,
+        'error': job.error,
+        'papers': [
+            {
+                'paper_index': p.paper_index,
+                'title': p.title,
+                'status': p.status,
+                'result': p.result,
+            }
+            for p in job.papers.all()
+        ],
+        'created_at': job.created_at.isoformat(),
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
+    if job.verification_id:
+        data['verification'] = serialize_verification(job.verification)
+    return data
+
+
+def run_verification(message, client, model, on_stage=None, on_paper_result=None):
+    """
+    Run the full two-step verification pipeline for an assistant message.
+    
+    Optional callbacks report progress (always called from the calling thread):
+    - on_stage(stage, paper_indexes): a pipeline stage starts
+      ('verifying_papers' with the indexes that need a new verification, 'evaluating_response')
+    - on_paper_result(paper_index, paper_result): a paper verification is available
+    
+    Returns the saved Verification.
+    """
+    # Parse the message content
+    parsed_content = verifiable_answer(message)
+    if not parsed_content:
+        raise ValueError('Invalid message format')
+    
+    assistant_text = parsed_content.get('text', '')
+    papers = parsed_content.get('papers', [])
+    
+    # Get the system prompt (from settings or default)
+    system_prompt = message.system_prompt
+    
+    # Get the full conversation history for context
+    conversation_history = []
+    for msg in message.conversation.messages.filter(created_at__lte=message.created_at).order_by('created_at'):
+        # Assistant messages contribute the text of their answer
+        conversation_history.append({
+            'role': msg.role,
+            'content': msg.text
+        })
+    
+    print(f"[Verification] Starting verification for message {message.id}")
+    
+    # STEP 1: Verify papers (only if not already in database)
+    print(f"[Verification] Step 1: Paper verification ({len(papers)} papers)")
+    paper_results = {}
+    cache_entries = {}
+    papers_to_verify = []
+    
+    for i, paper in enumerate(papers):
+        # Check if this paper has already been verified (by canonical identifier)
+        link = paper.get('link', '')
+        cache_entry = verification_cache.lookup(link) if link else None
+        
+        if cache_entry:
+            print(f"[Paper Verification] Using cached verification ({cache_entry.identifier}) for: {paper.get('title', '')[:50]}")
+            # Reuse cached paper-level results with the claim made in this message
+            paper_result = {
+                'paper_index': i,
+                'title': paper.get('title', ''),
+                'link': link,
+                'claimed_authors': paper.get('authors', ''),
+                'claimed_date': paper.get('date', ''),
+                'assistant_summary': paper.get('summary', ''),
+                **verification_cache.entry_result(cache_entry),
+                'reused': True  # Flag to indicate this was reused
+            }
+            cache_entries[i] = cache_entry
+            paper_results[i] = paper_result
+            if on_paper_result:
+                on_paper_result(i, paper_result)
+        else:
+            papers_to_verify.append((i, paper))
+    
+    # Perform new verifications concurrently
+    if on_stage:
+        on_stage('verifying_papers', [i for i, _ in papers_to_verify])
+    
+    def handle_new_result(i, paper_result):
+        paper_result['reused'] = False
+        paper_results[i] = paper_result
+        if on_paper_result:
+            on_paper_result(i, paper_result)
+    
+    verify_papers_concurrently(
+        client=client,
+        model=model,
+        papers_to_verify=papers_to_verify,
+        on_result=handle_new_result
+    )
+    
+    # Keep results in paper_index order
+    paper_verifications = [paper_results[i] for i in sorted(paper_results)]
+    
+    # STEP 2: Comprehensive response evaluation with verified paper knowledge
+    print(f"[Verification] Step 2: Comprehensive response evaluation")
+    if on_stage:
+        on_stage('evaluating_response', [])
+    comprehensive_eval = comprehensive_response_evaluation(
+        client=client,
+        model=model,
+        conversation_history=conversation_history,
+        system_prompt=system_prompt,
+        assistant_response=assistant_text,
+        papers_data=papers,
+        verified_papers=paper_verifications
+    )
+    
+    # Use confidence score from comprehensive evaluation
+    final_confidence_score = comprehensive_eval.get('confidence_score', 50)
+    final_summary = comprehensive_eval.get('summary', '')
+    
+    # Save verification and paper verifications together
+    with transaction.atomic():
+        # Save verification to database
+        verification = Verification.objects.create(
+            message=message,
+            confidence_score=round(final_confidence_score, 1),
+            textual_verification=comprehensive_eval,
+            summary=final_summary
+        )
+    
+        # Save paper verifications; paper-level results go to the shared cache
+        for paper_result in paper_verifications:
+            paper_index = paper_result.get('paper_index', 0)
+            cache_entry = cache_entries.get(paper_index)
+            if not cache_entry and not paper_result.get('evaluation_error'):
+                # A failed cache write only loses the sharing: the results are kept on the row
+                try:
+                    with transaction.atomic():
+                        cache_entry = verification_cache.store(paper_result.get('link', ''), paper_result)
+                except DatabaseError as e:
+                    print(f"[Verification] Could not cache paper {paper_index}: {e}")
+            
+            fields = verification_cache.result_fields(paper_result)
+            if cache_entry:
+                # Scores stay on the row, the JSON results are read from the cache entry
+                fields = {'credibility_score': fields['credibility_score'], 'overall_quality': fields['overall_quality']}
+            
+            PaperVerification.objects.create(
+                verification=verification,
+                paper_index=paper_index,
+                title=paper_result.get('title', ''),
+                link=paper_result.get('link', ''),
+                claimed_authors=paper_result.get('claimed_authors', ''),
+                claimed_date=paper_result.get('claimed_date', ''),
+                cache_entry=cache_entry,
+                **fields
+            )
+    
+    print(f"[Verification] Completed. Confidence: {final_confidence_score:.1f}")
+    
+    return verification
+
+
+def create_verification_job(user, message, model, parsed_content):
+    """Queue a verification job for a message, with one progress row per paper."""
+    with transaction.atomic():
+        job = VerificationJob.objects.create(user=user, message=message, model=model)
+        VerificationJobPaper.objects.bulk_create([
+            VerificationJobPaper(job=job, paper_index=i, title=paper.get('title', '')[:500])
+            for i, paper in enumerate(parsed_content.get('papers', []))
+        ])
+    print(f"[Verification] Queued job {job.id} for message {message.id}")
+    return job
+
+
+def queued_job_response(job):
+    """verify_message payload for a queued or running job."""
+    data = serialize_job(job)
+    data['status_url'] = f'/api/verification-jobs/{job.id}/'
+    data['events_url'] = f'/api/verification-jobs/{job.id}/events/'
+    return data
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def verify_message(request, message_id):
     """
-    Verify an assistant message for accuracy, credibility, and hallucinations.
+    Queue verification of an assistant message for accuracy, credibility, and hallucinations.
     
-    Two-step verification process:
-    1. Paper verification - Validates papers (if not already in DB) using trafilatura + OpenAlex
+    Two-step verification process (run by the run_verification_worker command):
+    1. Paper verification - Validates papers (if not already cached) using trafilatura + OpenAlex,
+       running all new paper verifications concurrently (bounded by VERIFICATION_MAX_CONCURRENCY)
     2. Comprehensive evaluation - Evaluates response with verified paper knowledge
     
-    Returns comprehensive verification results.
+    Returns the existing verification (200) if the message was already verified,
+    otherwise a verification job (202) whose progress is available from
+    verification_job_detail (polling) or verification_job_events (SSE).
     """
     try:
         # Get the message and ensure it belongs to the user's conversation
@@ -542,165 +953,23 @@ def verify_message(request, message_id):
         # Check if verification already exists
         existing_verification = message.verifications.first()
         if existing_verification:
-            return Response({
-                'id': existing_verification.id,
-                'message_id': message.id,
-                'confidence_score': existing_verification.confidence_score,
-                'textual_verification': existing_verification.textual_verification,
-                'paper_verifications': existing_verification.get_paper_verifications(),
-                'summary': existing_verification.summary,
-                'created_at': existing_verification.created_at.isoformat()
-            })
-        
-        # Parse the message content
-        parsed_content = parse_papers_response(message.content)
-        if not parsed_content:
-            return Response({'error': 'Invalid message format'}, status=400)
-        
-        assistant_text = parsed_content.get('text', '')
-        papers = parsed_content.get('papers', [])
-        
-        # Get the system prompt (from settings or default)
-        system_prompt = message.system_prompt
+            return Response(serialize_verification(existing_verification))
         
-        # Get the full conversation history for context
-        conversation_history = []
-        for msg in message.conversation.messages.filter(created_at__lte=message.created_at).order_by('created_at'):
-            content = msg.content
-            # For assistant messages, extract text if it's JSON
-            if msg.role == 'assistant':
-                try:
-                    parsed = parse_papers_response(content)
-                    if parsed:
-                        content = parsed.get('text', content)
-                except:
-                    pass
-            conversation_history.append({
-                'role': msg.role,
-                'content': content
-            })
-        
-        # Initialize OpenAI client
-        client = get_openai_client(request.user)
-        # Use model from request or default
-        model = request.data.get('model', DEFAULTS['model'])
-        
-        print(f"[Verification] Starting verification for message {message_id}")
-        
-        # STEP 1: Verify papers (only if not already in database)
-        print(f"[Verification] Step 1: Paper verification ({len(papers)} papers)")
-        paper_verifications = []
-        
-        for i, paper in enumerate(papers):
-            # Check if this paper has already been verified (by link)
-            link = paper.get('link', '')
-            existing_paper_verification = None
-            
-            if link:
-                # Look for existing verification with same link
-                existing_paper_verification = PaperVerification.objects.filter(
-                    link=link
-                ).first()
+        # Reuse a job that is already waiting or running for this message
+        job = message.verification_jobs.filter(status__in=['queued', 'running']).first()
+        if not job:
+            # Parse the message content
+            parsed_content = verifiable_answer(message)
+            if not parsed_content:
+                return Response({'error': 'Invalid message format'}, status=400)
             
-            if existing_paper_verification:
-                print(f"[Paper Verification] Using existing verification for: {paper.get('title', '')[:50]}")
-                # Reuse existing verification data
-                paper_result = {
-                    'paper_index': i,
-                    'title': existing_paper_verification.title,
-                    'link': existing_paper_verification.link,
-                    'claimed_authors': existing_paper_verification.claimed_authors,
-                    'claimed_date': existing_paper_verification.claimed_date,
-                    'assistant_summary': paper.get('summary', ''),
-                    'openalex_metadata': existing_paper_verification.openalex_metadata,
-                    'verified_metadata': existing_paper_verification.verified_metadata,
-                    'content_fetch': existing_paper_verification.content_fetch,
-                    'content_verification': existing_paper_verification.content_verification,
-                    'paper_quality': existing_paper_verification.paper_quality,
-                    'summary_evaluation': existing_paper_verification.summary_evaluation,
-                    'overall_assessment': existing_paper_verification.overall_assessment,
-                    'credibility_score': existing_paper_verification.credibility_score,
-                    'credibility_notes': existing_paper_verification.credibility_notes,
-                    'overall_quality': existing_paper_verification.overall_quality,
-                    'reused': True  # Flag to indicate this was reused
-                }
-            else:
-                # Perform new verification
-                paper_result = verify_single_paper(
-                    client=client,
-                    model=model,
-                    paper_info=paper,
-                    paper_index=i
-                )
-                paper_result['reused'] = False
+            # Fail fast if the user has no API key instead of failing in the worker
+            get_openai_client(request.user)
             
-            paper_verifications.append(paper_result)
-        
-        # STEP 2: Comprehensive response evaluation with verified paper knowledge
-        print(f"[Verification] Step 2: Comprehensive response evaluation")
-        comprehensive_eval = comprehensive_response_evaluation(
-            client=client,
-            model=model,
-            conversation_history=conversation_history,
-            system_prompt=system_prompt,
-            assistant_response=assistant_text,
-            papers_data=papers,
-            verified_papers=paper_verifications
-        )
+            # Use model from request or default
+            job = create_verification_job(request.user, message, request.data.get('model', DEFAULTS['model']), parsed_content)
         
-        # Use confidence score from comprehensive evaluation
-        final_confidence_score = comprehensive_eval.get('confidence_score', 50)
-        final_summary = comprehensive_eval.get('summary', '')
-        
-        # Save verification to database
-        verification = Verification.objects.create(
-            message=message,
-            confidence_score=round(final_confidence_score, 1),
-            textual_verification=comprehensive_eval,
-            summary=final_summary
-        )
-        
-        # Save paper verifications as separate model instances (only new ones)
-        for paper_result in paper_verifications:
-            # Check if this was reused - don't create duplicate
-            if paper_result.get('reused', False):
-                # Link existing paper verification to this verification
-                # Find the existing one and update if needed, or just skip
-                # For now, we'll create a new entry for this verification
-                # (allows same paper to be part of multiple verifications)
-                pass
-            
-            # Always create new PaperVerification for this Verification
-            PaperVerification.objects.create(
-                verification=verification,
-                paper_index=paper_result.get('paper_index', 0),
-                title=paper_result.get('title', ''),
-                link=paper_result.get('link', ''),
-                claimed_authors=paper_result.get('claimed_authors', ''),
-                claimed_date=paper_result.get('claimed_date', ''),
-                openalex_metadata=paper_result.get('openalex_metadata'),
-                verified_metadata=paper_result.get('verified_metadata'),
-                content_fetch=paper_result.get('content_fetch'),
-                content_verification=paper_result.get('content_verification'),
-                paper_quality=paper_result.get('paper_quality'),
-                summary_evaluation=paper_result.get('summary_evaluation'),
-                overall_assessment=paper_result.get('overall_assessment', ''),
-                credibility_score=paper_result.get('credibility_score', 5.0),
-                credibility_notes=paper_result.get('credibility_notes', ''),
-                overall_quality=paper_result.get('overall_quality', 5.0)
-            )
-        
-        print(f"[Verification] Completed. Confidence: {final_confidence_score:.1f}")
-        
-        return Response({
-            'id': verification.id,
-            'message_id': message.id,
-            'confidence_score': verification.confidence_score,
-            'textual_verification': verification.textual_verification,
-            'paper_verifications': verification.get_paper_verifications(),
-            'summary': verification.summary,
-            'created_at': verification.created_at.isoformat()
-        }, status=201)
+        return Response(queued_job_response(job), status=202)
     
     except Message.DoesNotExist:
         return Response({'error': 'Message not found'}, status=404)
@@ -711,3 +980,70 @@ def verify_message(request, message_id):
         import traceback
         traceback.print_exc()
         return Response({'error': f'Verification failed: {str(e)}'}, status=500)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def verification_job_detail(request, job_id):
+    """Poll the status of a verification job, including per-paper results finished so far."""
+    try:
+        job = request.user.verification_jobs.get(pk=job_id)
+    except VerificationJob.DoesNotExist:
+        return Response({'error': 'Verification job not found'}, status=404)
+    return Response(serialize_job(job))
+
+
+def verification_job_events(request, job_id):
+    """
+    Stream verification job progress as Server-Sent Events.
+    
+    Events:
+    - stage: {'status', 'stage'} whenever the job moves to a new stage
+    - paper: {'paper_index', 'title', 'status', 'result'} when a paper verification finishes
+    - complete: full verification result once the job is done
+    - error: {'error'} if the job failed
+    
+    Plain Django view: DRF content negotiation would reject the text/event-stream Accept header.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    try:
+        job = request.user.verification_jobs.get(pk=job_id)
+    except VerificationJob.DoesNotExist:
+        return JsonResponse({'error': 'Verification job not found'}, status=404)
+    
+    poll_interval = getattr(settings, 'VERIFICATION_JOB_POLL_INTERVAL', 1.0)
+    max_duration = getattr(settings, 'VERIFICATION_JOB_STREAM_TIMEOUT', 600)
+    
+    def events():
+        sent_papers = set()
+        last_stage = None
+        started = time.monotonic()
+        while True:
+            current = VerificationJob.objects.get(pk=job.pk)
+            if (current.status, current.stage) != last_stage:
+                last_stage = (current.status, current.stage)
+                yield sse_event('stage', {'status': current.status, 'stage': current.stage})
+            
+            for paper in current.papers.filter(status__in=['reused', 'done', 'failed']).exclude(paper_index__in=sent_papers):
+                sent_papers.add(paper.paper_index)
+                yield sse_event('paper', {
+                    'paper_index': paper.paper_index,
+                    'title': paper.title,
+                    'status': paper.status,
+                    'result': paper.result,
+                })
+            
+            if current.status == 'completed':
+                yield sse_event('complete', serialize_verification(current.verification))
+                return
+            if current.status == 'failed':
+                yield sse_event('error', {'error': current.error or 'Verification failed'})
+                return
+            if time.monotonic() - started > max_duration:
+                yield sse_event('timeout', {'job_id': current.id, 'status': current.status})
+                return
+            
+            time.sleep(poll_interval)
+    
+    return sse_response(events())
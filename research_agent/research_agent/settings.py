@@ -93,3 +93,120 @@ SESSION_COOKIE_SAMESITE = 'Lax'
 # CSRF settings
 CSRF_COOKIE_HTTPONLY = False
 CSRF_COOKIE_SAMESITE = 'Lax'
+
+# OpenAI
+# Keep conversation state on the server (Responses API previous_response_id) instead of
+# replaying the history every turn; falls back to replay when the chain is broken
+OPENAI_CONVERSATION_STATE = False
+# Serve chat, conversation chat, BibTeX generation and verify requests, and the verification job
+# and title progress streams, with the async views
+# (openai_api/views_async.py); run under an ASGI server (uvicorn research_agent.asgi:application)
+ASYNC_LLM_VIEWS = True
+# Alternative API endpoint, e.g. the local stand-in server (python manage.py openai_standin_server)
+OPENAI_BASE_URL = None
+# Cached clients per API key sharing keep-alive connection pools (see openai_api/openai_clients.py)
+OPENAI_CLIENT_CACHE_SIZE = 256
+OPENAI_CLIENT_IDLE_TIMEOUT = 600                 # seconds a cached client may stay unused
+OPENAI_TIMEOUT = 600.0                           # seconds per request (long reasoning / web search answers)
+OPENAI_CONNECT_TIMEOUT = 10.0
+OPENAI_MAX_RETRIES = 2
+OPENAI_MAX_CONNECTIONS = 1000
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = 100
+OPENAI_KEEPALIVE_EXPIRY = 60.0
+
+# Conversation history sent with each chat turn (see openai_api/history.py)
+CHAT_HISTORY_RECENT_TURNS = 4                    # turns replayed verbatim
+CHAT_HISTORY_COMPACT_TURNS = 8                   # older turns shrunk to text + paper titles
+CHAT_HISTORY_SUMMARY_BATCH = 4                   # turns folded into the rolling summary at once (after the answer)
+CHAT_HISTORY_SUMMARY_MAX_CHARS = 3000
+CHAT_HISTORY_SUMMARY_MODEL = None                # default: the model of the chat request
+
+# Page sizes of the cursor-paginated lists (see openai_api/pagination.py); ?limit= up to PAGINATION_MAX_LIMIT
+CONVERSATIONS_PAGE_SIZE = 50
+MESSAGES_PAGE_SIZE = 50
+PAPERS_PAGE_SIZE = 100
+PAGINATION_MAX_LIMIT = 200
+
+# Rendered context-papers blocks of the system prompt cached per project version (see openai_api/system_prompts.py)
+SYSTEM_PROMPT_CACHE_SIZE = 256
+# Context papers beyond this many tokens are ranked against the user's message (see openai_api/context_index.py)
+CONTEXT_PAPERS_TOKEN_BUDGET = 6000
+CONTEXT_PAPERS_TOP_K = 30                        # most papers listed from a ranked project
+
+# Verification settings
+# Maximum number of papers verified in parallel for a single verify request
+VERIFICATION_MAX_CONCURRENCY = 5
+# Score all new papers of a message in one structured-output LLM request instead of one
+# request per paper (at most VERIFICATION_BATCH_MAX_PAPERS papers per request)
+VERIFICATION_BATCHED_EVALUATION = False
+VERIFICATION_BATCH_MAX_PAPERS = 10
+# Estimated token budget for the comprehensive evaluation prompt (see openai_api/prompt_budget.py)
+VERIFICATION_PROMPT_TOKEN_BUDGET = 12000
+# Deadlines (seconds) for the parallel content fetch and OpenAlex lookup of a single paper
+VERIFICATION_FETCH_DEADLINE = 20
+VERIFICATION_OPENALEX_DEADLINE = 15
+
+# Verification job queue (processed by `python manage.py run_verification_worker`)
+# Seconds between queue polls in the worker and between progress checks in the SSE stream
+VERIFICATION_JOB_POLL_INTERVAL = 1.0
+# Running jobs not updated for this many seconds are assumed dead and re-queued
+VERIFICATION_JOB_STALE_AFTER = 600
+# Seconds between liveness updates of a running job (well below VERIFICATION_JOB_STALE_AFTER)
+VERIFICATION_JOB_HEARTBEAT = 60
+VERIFICATION_JOB_MAX_ATTEMPTS = 3
+# Maximum lifetime of a progress stream in seconds
+VERIFICATION_JOB_STREAM_TIMEOUT = 600
+
+# Conversation titles (generated in the background, see openai_api/titles.py)
+# Generate titles in a thread of the serving process; run_verification_worker also picks up stalled ones
+CONVERSATION_TITLE_IN_PROCESS = True
+CONVERSATION_TITLE_MAX_ATTEMPTS = 3
+CONVERSATION_TITLE_RETRY_DELAY = 5               # seconds before the first retry, doubled each time
+CONVERSATION_TITLE_LEASE = 60                    # seconds a claimed title is reserved for one worker
+CONVERSATION_TITLE_STALL_AFTER = 10              # seconds overdue before a pending title counts as abandoned
+# Maximum lifetime of a title stream in seconds
+CONVERSATION_TITLE_STREAM_TIMEOUT = 60
+
+# Paper verification cache (keyed by DOI / arXiv id / canonical URL)
+VERIFICATION_CACHE_TTL = 60 * 60 * 24 * 30          # 30 days
+VERIFICATION_CACHE_FAILURE_TTL = 60 * 60 * 24       # 1 day if the fetch or OpenAlex lookup failed
+VERIFICATION_CACHE_MAX_ENTRIES = 10000
+
+# BibTeX entries rendered from resolved metadata (see openai_api/bibtex_builder.py)
+BIBTEX_OPENALEX_LOOKUP = True                    # query OpenAlex for papers not in the verification cache
+BIBTEX_TITLE_MATCH = 0.9                         # minimum title similarity of metadata found by title search
+BIBTEX_LLM_WORKERS = 4                           # parallel LLM calls for unresolved papers of a project
+# Papers read per query by the streaming bibliography export (see openai_api/bibliography.py)
+BIBLIOGRAPHY_EXPORT_CHUNK_SIZE = 500
+
+# OpenAlex client (shared pooled HTTP/2 connection)
+OPENALEX_TIMEOUT = 10.0
+OPENALEX_MAX_CONNECTIONS = 10
+# Contact email for OpenAlex's polite pool (optional)
+OPENALEX_MAILTO = ''
+
+# On-disk cache of paper page fetches (see openai_api/http_cache.py)
+HTTP_CACHE_DIR = BASE_DIR / 'http_cache'
+HTTP_CACHE_MAX_BYTES = 100 * 1024 * 1024         # 100 MB
+HTTP_CACHE_DEFAULT_TTL = 60 * 60 * 24            # when the response has no max-age
+HTTP_CACHE_NEGATIVE_TTL = 60 * 10                # 4xx/5xx responses
+HTTP_CACHE_RESCAN_INTERVAL = 300                 # seconds between size rescans (other processes' writes)
+HTTP_CACHE_HIT_FLUSH = 20                        # hits tallied in memory before they are written to the entry
+
+# Paper page fetcher (pooled curl_cffi sessions, see openai_api/fetcher.py)
+FETCH_POOL_SIZE = 8
+FETCH_TIMEOUT = 15
+FETCH_IMPERSONATE = 'chrome'
+FETCH_PER_HOST_CONCURRENCY = 2
+FETCH_HOST_DELAY = 0.5                           # seconds between request starts to the same host
+FETCH_HOST_WAIT_TIMEOUT = 30
+FETCH_DNS_CACHE_TTL = 300
+FETCH_MAX_HTML_BYTES = 1024 * 1024               # stop downloading a page after this many bytes
+FETCH_MAX_PDF_BYTES = 4 * 1024 * 1024            # enough for the first pages of most papers
+
+# HTML (trafilatura) / PDF (pypdf) extraction process pool, see openai_api/extraction.py
+EXTRACTION_USE_PROCESS_POOL = True
+EXTRACTION_WORKERS = 2
+EXTRACTION_TIMEOUT = 5                           # CPU seconds per document
+EXTRACTION_MAX_INPUT_BYTES = 2 * 1024 * 1024
+EXTRACTION_PDF_PAGES = 2                         # PDF pages whose text is extracted